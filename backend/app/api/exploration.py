@@ -1,5 +1,6 @@
 """Data exploration API endpoints."""
 
+import asyncio
 import logging
 import uuid
 from typing import List, Optional
@@ -61,7 +62,7 @@ async def get_discovered_metrics():
             return []
         
         # Group semantically
-        groups = discovery_service.group_metrics_semantically(discovered)
+        groups = await asyncio.to_thread(discovery_service.group_metrics_semantically, discovered)
         
         return groups
     except Exception as e:
@@ -133,7 +134,7 @@ async def accept_metric_group(request: AcceptMetricGroupRequest = Body(...)):
             # Get the original metrics from the group to create aliases
             # We'll need to get this from the discovery service
             discovered = discovery_service.get_discovered_metrics()
-            groups = discovery_service.group_metrics_semantically(discovered)
+            groups = await asyncio.to_thread(discovery_service.group_metrics_semantically, discovered)
             
             group = next((g for g in groups if g["group_id"] == request.group_id), None)
             
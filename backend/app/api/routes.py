@@ -1,7 +1,8 @@
 """API routes for extraction service."""
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File, Form
 from typing import Optional
+from datetime import datetime
 import uuid
 
 from app.models import (
@@ -17,6 +18,12 @@ from app.models import (
     ResultStatus,
 )
 from app.services import ExtractionService
+from app.services.batch_extraction import get_batch_provider
+from app.services.document_parser import table_rows
+from app.services.parse_executor import get_parse_executor, ExecutorBusyError
+from app.services.rule_extractor import get_compiled_rule_cache
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_scheduler import get_llm_scheduler
 from app.core.config import settings
 from app.api.mock_data import (
     MOCK_RULES,
@@ -36,6 +43,19 @@ jobs_db: dict[str, ExtractionJob] = {j.id: j for j in MOCK_JOBS}
 # Use real AI if API keys are configured, otherwise fall back to mock
 extraction_service = ExtractionService(use_mock_ai=False)
 glossary_loader = get_glossary_loader()
+parse_executor = get_parse_executor()
+compiled_rules = get_compiled_rule_cache()
+
+
+def _rule_changed(rule: ExtractionRule) -> None:
+    """Mark a rule as modified so its compiled patterns are rebuilt."""
+    rule.updated_at = datetime.utcnow()
+    compiled_rules.invalidate(rule.id)
+
+
+def _busy_error(e: ExecutorBusyError) -> HTTPException:
+    """503 response telling the client to retry once the parse queue drains."""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
 
 
 def _ensure_glossary_rules() -> None:
@@ -90,6 +110,7 @@ async def create_rule(rule: ExtractionRule):
     """Create a new extraction rule."""
     if not rule.id:
         rule.id = f"rule-{uuid.uuid4().hex[:8]}"
+    compiled_rules.invalidate(rule.id)
     rules_db[rule.id] = rule
     return rule
 
@@ -100,6 +121,7 @@ async def update_rule(rule_id: str, rule: ExtractionRule):
     if rule_id not in rules_db:
         raise HTTPException(status_code=404, detail="Rule not found")
     rule.id = rule_id
+    _rule_changed(rule)
     rules_db[rule_id] = rule
     return rule
 
@@ -110,6 +132,7 @@ async def delete_rule(rule_id: str):
     if rule_id not in rules_db:
         raise HTTPException(status_code=404, detail="Rule not found")
     del rules_db[rule_id]
+    compiled_rules.invalidate(rule_id)
     return {"status": "deleted"}
 
 
@@ -125,6 +148,7 @@ async def add_semantic_mapping(rule_id: str, mapping: SemanticMapping):
     if not mapping.id:
         mapping.id = f"sem-{uuid.uuid4().hex[:8]}"
     rule.semantic_mappings.append(mapping)
+    _rule_changed(rule)
     return rule
 
 
@@ -136,6 +160,7 @@ async def remove_semantic_mapping(rule_id: str, mapping_id: str):
 
     rule = rules_db[rule_id]
     rule.semantic_mappings = [m for m in rule.semantic_mappings if m.id != mapping_id]
+    _rule_changed(rule)
     return {"status": "deleted"}
 
 
@@ -203,13 +228,38 @@ async def create_job(
 
 
 @router.post("/jobs/{job_id}/run", response_model=ExtractionJob)
-async def run_job(job_id: str):
-    """Run an extraction job (mock for Phase 0)."""
+async def run_job(job_id: str, background_tasks: BackgroundTasks, batch: bool = False):
+    """Run an extraction job (mock for Phase 0).
+
+    With `batch`, the job runs in the background on its uploaded files and
+    sends all AI prompts through the provider batch API named by
+    settings.ai_batch_provider, which is cheaper but may take hours; poll
+    GET /jobs/{job_id} for progress and results.
+    """
     if job_id not in jobs_db:
         raise HTTPException(status_code=404, detail="Job not found")
 
     job = jobs_db[job_id]
 
+    if batch:
+        from app.api.upload import uploaded_files_db
+        try:
+            batch_provider = get_batch_provider()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        _ensure_glossary_rules()
+        rules = [rules_db[rid] for rid in job.rule_ids if rid in rules_db]
+        if not rules:
+            raise HTTPException(status_code=400, detail="No valid rules provided")
+        documents = {
+            doc_id: (uploaded_files_db[doc_id]["upload_path"], None)
+            for doc_id in job.document_ids
+            if doc_id in uploaded_files_db
+        }
+        job.status = "queued"
+        background_tasks.add_task(extraction_service.run_job, job, documents, rules, batch_provider)
+        return job
+
     # For Phase 0, return mock results
     job.status = "completed"
     job.progress = 100.0
@@ -318,14 +368,26 @@ async def extract_from_file(
         method=method_enum
     )
 
-    results = extraction_service.process_document(
+    # Parse in a worker process; the slot is released before extraction so
+    # requests waiting on AI calls do not hold parse capacity
+    try:
+        async with parse_executor.slot():
+            doc = await parse_executor.parse(
+                filename, content, detect_tables=extraction_service.rules_need_tables(rules)
+            )
+    except ExecutorBusyError as e:
+        raise _busy_error(e)
+
+    # Extraction awaits AI calls without blocking the event loop
+    results = await extraction_service.process_document(
         file_path=filename,
         file_content=content,
         rules=rules,
         method=method_enum,
         document_id=document_id,
         job_id=job.id,
-        preview_only=preview_only
+        preview_only=preview_only,
+        doc=doc
     )
 
     job.results = results
@@ -356,8 +418,11 @@ async def preview_extracted_text(
         )
 
     # Parse document to get extracted text
-    parser = extraction_service.parser
-    doc = parser.parse(file.filename or "upload", content)
+    try:
+        async with parse_executor.slot():
+            doc = await parse_executor.parse(file.filename or "upload", content, detect_tables=True)
+    except ExecutorBusyError as e:
+        raise _busy_error(e)
     
     return {
         "filename": doc.filename,
@@ -367,11 +432,20 @@ async def preview_extracted_text(
         "page_count": len(doc.pages),
         "table_count": len(doc.tables),
         "metadata": doc.metadata,
-        "pages": doc.pages[:3] if len(doc.pages) > 3 else doc.pages,  # First 3 pages
-        "tables": doc.tables[:5] if len(doc.tables) > 5 else doc.tables  # First 5 tables
+        "pages": doc.pages[:3],  # First 3 pages
+        "tables": [_serialize_table(t) for t in doc.tables[:5]]  # First 5 tables
     }
 
 
+def _serialize_table(table: dict) -> dict:
+    """Convert column-oriented (NumPy) tables to JSON-friendly rows."""
+    if "columns" not in table:
+        return table
+    serialized = {k: v for k, v in table.items() if k != "columns"}
+    serialized["data"] = table_rows(table)
+    return serialized
+
+
 # ============ Results API ============
 
 @router.get("/results", response_model=list[ExtractionResult])
@@ -426,3 +500,28 @@ async def update_ai_config(config: AIConfig):
     """Update AI configuration."""
     extraction_service.ai_config = config
     return config
+
+
+@router.get("/ai/cache")
+async def get_ai_cache_stats():
+    """Get LLM response cache hit/miss counters and size."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+
+@router.delete("/ai/cache")
+async def clear_ai_cache():
+    """Drop all cached LLM responses."""
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    cache.clear()
+    return cache.stats()
+
+
+@router.get("/ai/scheduler")
+async def get_ai_scheduler_stats():
+    """Get LLM rate limiter budgets and queue state."""
+    return get_llm_scheduler().stats()
@@ -1,5 +1,6 @@
 """Webhook API endpoints for n8n integration."""
 
+import asyncio
 import logging
 import uuid
 from typing import List, Optional
@@ -92,7 +93,8 @@ async def process_n8n_webhook(payload: N8NWebhookPayload = Body(...)):
                     "source_url": payload.source_url,
                     "source_name": payload.source_name
                 }
-                metric_id = processor.map_metric_name(obs.raw_metric_name, context=context)
+                # AI-assisted mapping blocks on the LLM rate limiter, so keep it off the event loop
+                metric_id = await asyncio.to_thread(processor.map_metric_name, obs.raw_metric_name, context=context)
                 
                 if metric_id:
                     # Metric exists in glossary - save as regular observation
@@ -101,7 +103,8 @@ async def process_n8n_webhook(payload: N8NWebhookPayload = Body(...)):
                     unit = glossary_metric.unit if glossary_metric else "number"
                     
                     # Validate dimensions
-                    validated_dimensions = processor.validate_dimensions(
+                    validated_dimensions = await asyncio.to_thread(
+                        processor.validate_dimensions,
                         obs.dimensions,
                         metric_id
                     )
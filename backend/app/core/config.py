@@ -44,10 +44,44 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     default_ai_provider: str = "openai"  # Use OpenAI/GPT by default
     default_ai_model: str = "gpt-4-turbo-preview"  # Use GPT-4 Turbo by default
+    ai_max_concurrent_requests: int = 4  # Max AI requests in flight at once
+    ai_chunk_max_tokens: int = 0  # Cap on document tokens per AI chunk (0 = fill the model context)
+    ai_chunk_overlap_tokens: int = 200  # Tokens of trailing paragraphs repeated in the next chunk
+    ai_relevance_top_k: int = 3  # Chunks per rule sent to the AI, most relevant first (0 = all chunks)
+    ai_batch_result_tokens_per_rule: int = 512  # Response tokens reserved per metric in a multi-metric prompt
+    ai_batch_min_chunk_tokens: int = 2000  # Document tokens a multi-metric prompt must leave room for
+    llm_max_connections: int = 20  # Connections per shared LLM client pool
+    llm_max_keepalive_connections: int = 10  # Idle connections kept warm per pool
+    llm_keepalive_expiry_seconds: float = 60.0  # Close idle connections after this long
+    llm_connect_timeout_seconds: float = 10.0
+    llm_read_timeout_seconds: float = 120.0
+    llm_max_retries: int = 3  # Rate-limited retries with exponential backoff on 429/5xx/connection errors
+    llm_http2: bool = True  # Use HTTP/2 when the h2 package is installed
+    llm_requests_per_minute: int = 500  # Per-provider request budget shared by all LLM callers (0 = unlimited)
+    llm_tokens_per_minute: int = 200_000  # Per-provider token budget, prompt + max response (0 = unlimited)
+    ai_batch_provider: str = "openai"  # Batch API used by batch extraction jobs: openai, anthropic, local
+    ai_batch_poll_interval_seconds: float = 60.0  # How often to check a submitted batch
+    ai_batch_timeout_seconds: float = 24 * 3600  # Give up (and cancel) after this long
+    llm_cache_enabled: bool = True  # Cache LLM responses in data/llm_cache.db
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600  # Cached responses expire after a week
+    llm_cache_max_bytes: int = 256 * 1024 * 1024  # 256MB of responses, LRU-evicted
 
     # Storage
     upload_dir: str = "./uploads"
     max_upload_size: int = 50 * 1024 * 1024  # 50MB
+
+    # Document parsing
+    pdf_parse_workers: int = 1  # Worker processes for PDF parsing (1 = serial)
+    pdf_parallel_min_pages: int = 16  # Only fan out PDFs with at least this many pages
+    pdf_stream_min_bytes: int = 20 * 1024 * 1024  # Jobs stream PDFs this large page by page instead of parsing them whole
+    excel_streaming: bool = True  # Stream .xlsx with openpyxl read-only instead of pandas
+    excel_text_row_cap: int = 5000  # Max rows per sheet rendered into document text
+    csv_chunk_rows: int = 50_000  # Rows read per pandas chunk
+    csv_text_row_cap: int = 5000  # Max CSV rows rendered into document text
+    parse_workers: int = 2  # Worker processes that parse documents off the event loop
+    parse_queue_size: int = 8  # Extra requests allowed to wait before /extract returns 503
+    parse_cache_enabled: bool = True  # Cache parsed documents under upload_dir/.parse_cache
+    parse_cache_max_bytes: int = 512 * 1024 * 1024  # 512MB, LRU-evicted
     
     # Database
     database_url: Optional[str] = None  # If None, uses default SQLite path
@@ -9,6 +9,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import router
 from app.db.database import init_db
+from app.services.parse_executor import get_parse_executor
+from app.services.document_parser import shutdown_pdf_page_pool
+from app.services.llm_clients import get_llm_clients
 
 # Configure logging
 logging.basicConfig(
@@ -66,6 +69,14 @@ async def startup_event():
     logger.info(f"  - HYBRID: Available")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker processes and LLM connections on shutdown."""
+    get_parse_executor().shutdown()
+    shutdown_pdf_page_pool()
+    await get_llm_clients().aclose()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -13,6 +13,7 @@ class PatternType(str, Enum):
     FUZZY = "fuzzy"
     SEMANTIC = "semantic"
     TABLE_HEADER = "table_header"
+    TABLE_CELL = "table_cell"
     LABEL_VALUE = "label_value"
     CONTEXT = "context"
 
@@ -171,6 +172,7 @@ class AIConfig(BaseModel):
     temperature: float = Field(0.1, ge=0, le=1)
     max_tokens: int = Field(4096, ge=100)
     fallback_to_rules: bool = Field(True, description="Use rules if AI fails")
+    batch_metrics: bool = Field(False, description="Extract all rules' metrics with one prompt per chunk")
 
     # Prompt customization
     system_prompt: Optional[str] = None
@@ -261,3 +263,87 @@ IMPORTANT:
 - confidence MUST be between 0.0 and 1.0 for each result
 - If the same metric appears multiple times with different contexts, include ALL of them"""
     )
+    batch_extraction_prompt_template: str = Field(
+        default="""Extract ALL occurrences of each of the following metrics from the document text. Return EVERY matching value you find.
+
+Metrics to extract:
+{metrics}
+
+Document text:
+{text}
+
+CRITICAL INSTRUCTIONS - Extract ALL matching values for EVERY metric listed above and return them as one array:
+
+1. SCAN THE ENTIRE DOCUMENT for each metric
+2. Find EVERY occurrence of each metric (even if values differ)
+3. Extract each occurrence with its own context, dimensions, and geography
+4. Tag each result with the metric_id of the metric it belongs to, exactly as listed above
+
+For EACH occurrence, extract:
+
+ENTITY: Identify the entity this metric applies to
+   - entity_type: Type of entity (e.g., "Institution", "Department", "Program", "Campus", "Location")
+   - entity_name: Name or identifier of the entity
+   - entity_id: Unique identifier if found
+
+DIMENSIONS: Extract all relevant dimension values
+   - fiscal_year: Fiscal year if mentioned
+   - document_type: Type of document (e.g., "pdf", "financial_statement", "report")
+   - period: Time period if mentioned (e.g., "Q1 2024", "FY2024")
+   - geography: Geographic location (country, state, city, region, campus name, etc.) - REQUIRED if mentioned
+   - location: Specific location name (campus, building, department location)
+   - Any other dimensions mentioned in the text
+
+METRIC: Extract the metric value
+   - metric_id: ID of the metric from the list above
+   - value: Numeric value (convert millions/billions to full number)
+   - unit: Unit of measurement
+   - confidence: Your confidence score (0.0-1.0)
+
+SOURCE: Where you found the data
+   - raw_text: Exact text where value was found
+   - page_number: Page number if available
+   - context: Surrounding context (50-100 words)
+
+You MUST respond in this exact JSON format (no markdown, no code blocks):
+{{
+    "results": [
+        {{
+            "entity": {{
+                "type": "<entity_type>",
+                "name": "<entity_name>",
+                "id": "<entity_id or null>"
+            }},
+            "dimensions": {{
+                "fiscal_year": <year or null>,
+                "document_type": "<type or null>",
+                "period": "<period or null>",
+                "geography": "<country/state/city/region/campus or null>",
+                "location": "<specific location name or null>",
+                "additional_dimensions": {{}}
+            }},
+            "metric": {{
+                "metric_id": "<metric_id>",
+                "value": <number or null>,
+                "unit": "<unit>",
+                "confidence": <0.0-1.0>,
+                "metric_name": "<metric name>"
+            }},
+            "source": {{
+                "raw_text": "<exact text matched>",
+                "page_number": <number or null>,
+                "context": "<surrounding context>"
+            }},
+            "fiscal_year": <year or null>,
+            "notes": "<any relevant notes or null>"
+        }}
+    ]
+}}
+
+IMPORTANT:
+- Return ALL matching values for ALL metrics in the "results" array
+- If NO values found, return empty array: {{"results": []}}
+- Every result MUST include the metric_id it belongs to
+- Respect the dimension constraints given for each metric
+- confidence MUST be between 0.0 and 1.0 for each result"""
+    )
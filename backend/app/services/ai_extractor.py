@@ -1,8 +1,10 @@
 """AI-based extraction service."""
 
 import json
+import asyncio
 import logging
-from typing import Optional, List
+import weakref
+from typing import Iterable, Iterator, Optional, List
 from dataclasses import dataclass
 
 from app.models import (
@@ -13,9 +15,20 @@ from app.models import (
 )
 from app.core.config import settings
 from app.services.glossary_loader import GlossaryLoader
+from app.services.document_parser import ParsedPage
+from app.services.chunk_relevance import ChunkRelevanceFilter, rule_terms
+from app.services.llm_cache import get_llm_cache
+from app.services.llm_clients import get_llm_clients
+from app.services.llm_scheduler import Priority, get_llm_scheduler
+from app.services.text_chunker import TextChunk, TokenChunker, context_window, count_tokens
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SYSTEM_PROMPT = "You are a precise data extraction assistant."
+
+# Tokens reserved for chat message framing around the prompt
+MESSAGE_OVERHEAD_TOKENS = 50
+
 
 @dataclass
 class AIExtractionResult:
@@ -33,6 +46,8 @@ class AIExtractionResult:
     dimensions: Optional[dict] = None
     metric_name: Optional[str] = None
     unit: Optional[str] = None
+    # Metric the result belongs to in batched multi-metric prompts
+    metric_id: Optional[str] = None
 
 
 class AIExtractor:
@@ -43,47 +58,63 @@ class AIExtractor:
         self.glossary_loader = glossary_loader
         self._anthropic_client = None
         self._openai_client = None
+        self._async_anthropic_client = None
+        self._async_openai_client = None
+        # Scheduling class of this extractor's requests in the global rate limiter
+        self.priority = Priority.INTERACTIVE
+        # One semaphore per event loop bounds the AI requests in flight
+        self._request_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
 
     @property
     def anthropic_client(self):
-        """Lazy load Anthropic client."""
+        """Shared Anthropic client."""
         if self._anthropic_client is None:
-            try:
-                import anthropic
-                api_key = settings.anthropic_api_key
-                if not api_key:
-                    raise ValueError("ANTHROPIC_API_KEY not configured. Please set it in .env file.")
-                self._anthropic_client = anthropic.Anthropic(
-                    api_key=api_key
-                )
-            except ImportError:
-                raise ImportError("anthropic package not installed")
+            self._anthropic_client = get_llm_clients().anthropic()
         return self._anthropic_client
 
     @property
     def openai_client(self):
-        """Lazy load OpenAI client."""
+        """Shared OpenAI client."""
         if self._openai_client is None:
-            try:
-                import openai
-                api_key = settings.openai_api_key
-                if not api_key:
-                    raise ValueError("OPENAI_API_KEY not configured. Please set it in .env file.")
-                self._openai_client = openai.OpenAI(
-                    api_key=api_key
-                )
-            except ImportError:
-                raise ImportError("openai package not installed")
+            self._openai_client = get_llm_clients().openai()
         return self._openai_client
 
+    @property
+    def async_anthropic_client(self):
+        """Shared async Anthropic client for the running event loop."""
+        return self._async_anthropic_client or get_llm_clients().async_anthropic()
+
+    @property
+    def async_openai_client(self):
+        """Shared async OpenAI client for the running event loop."""
+        return self._async_openai_client or get_llm_clients().async_openai()
+
+    def _get_request_slots(self) -> asyncio.Semaphore:
+        """Semaphore limiting concurrent AI requests on the running event loop."""
+        loop = asyncio.get_running_loop()
+        slots = self._request_slots.get(loop)
+        if slots is None:
+            slots = asyncio.Semaphore(max(1, settings.ai_max_concurrent_requests))
+            self._request_slots[loop] = slots
+        return slots
+
     async def extract(
         self,
         text: str,
         rule: ExtractionRule,
-        chunk_size: int = 8000,
-        glossary_metric: Optional[GlossaryMetric] = None
+        chunk_tokens: Optional[int] = None,
+        glossary_metric: Optional[GlossaryMetric] = None,
+        chunks: Optional[list[TextChunk]] = None
     ) -> list[AIExtractionResult]:
-        """Extract values from text using AI with optional glossary context."""
+        """Extract values from text using AI with optional glossary context.
+
+        Pass the rule's `chunks` from prepare_chunks() to reuse a document
+        chunked once for several rules. Chunks are sent concurrently, up to
+        settings.ai_max_concurrent_requests at a time; results are returned
+        in chunk order.
+        """
         results = []
 
         # Build variations string for the prompt
@@ -93,67 +124,404 @@ class AIExtractor:
         if not glossary_metric and self.glossary_loader:
             glossary_metric = self.glossary_loader.get_metric(rule.target_metric_id)
 
-        # Chunk text if too long
-        chunks = self._chunk_text(text, chunk_size)
+        if chunks is None:
+            # Chunking and relevance scoring are CPU-bound; keep them off the event loop
+            prepared = await asyncio.to_thread(
+                self.prepare_chunks, text, [rule], chunk_tokens, {rule.id: glossary_metric}
+            )
+            chunks = prepared[rule.id]
 
-        for chunk_idx, chunk in enumerate(chunks):
-            prompt = self._build_prompt(rule, chunk, variations_text, glossary_metric)
+        chunk_results = await asyncio.gather(*(
+            self._extract_chunk_bounded(
+                rule, chunk.text, chunk_idx, len(chunks), variations_text, glossary_metric
+            )
+            for chunk_idx, chunk in enumerate(chunks)
+        ))
+        for parsed_results in chunk_results:
+            results.extend(parsed_results)
 
-            # Log the full prompt for debugging
+        return results
+
+    async def extract_pages(
+        self,
+        pages: Iterable[ParsedPage],
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[AIExtractionResult]]:
+        """Extract values for many rules from a streamed document, by rule ID.
+
+        Pages are packed into chunks as they arrive and each chunk is sent for
+        every rule, so at most a window of chunks is held in memory. Reading
+        pages happens in a worker thread. Every chunk is sent, as relevance
+        ranking needs the whole document.
+        """
+        glossary_metrics = self._glossary_metrics(rules, glossary_metrics)
+        variations = {rule.id: self._format_variations(rule) for rule in rules}
+        chunker = self._make_chunker(
+            [self._build_prompt(rule, "", variations[rule.id], glossary_metrics.get(rule.id)) for rule in rules],
+            chunk_tokens
+        )
+
+        results: dict[str, list[AIExtractionResult]] = {rule.id: [] for rule in rules}
+        chunks = self._chunk_pages(pages, chunker)
+        # Keep only as many requests in flight as there are request slots, so
+        # pages are not read ahead of what can be sent
+        max_pending = max(1, settings.ai_max_concurrent_requests)
+        pending: list[tuple[str, asyncio.Task]] = []
+        try:
+            chunk_idx = 0
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                for rule in rules:
+                    if len(pending) >= max_pending:
+                        rule_id, task = pending.pop(0)
+                        results[rule_id].extend(await task)
+                    pending.append((rule.id, asyncio.create_task(self._extract_chunk_bounded(
+                        rule, chunk, chunk_idx, None, variations[rule.id], glossary_metrics.get(rule.id)
+                    ))))
+                chunk_idx += 1
+            while pending:
+                rule_id, task = pending.pop(0)
+                results[rule_id].extend(await task)
+        finally:
+            for _, task in pending:
+                task.cancel()
+            chunks.close()
+
+        return results
+
+    async def extract_batch(
+        self,
+        text: str,
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[AIExtractionResult]]:
+        """Extract the metrics of many rules with one prompt per chunk.
+
+        Rules are split into groups whose prompt leaves room for document text
+        and whose results fit in max_tokens (see _batch_groups); each chunk
+        costs one AI request per group. Returns results by rule ID, leaving
+        out the rules of groups with a failed request so callers can retry
+        them with per-rule prompts.
+        """
+        glossary_metrics = self._glossary_metrics(rules, glossary_metrics)
+        plan = await asyncio.to_thread(self._batch_plan, text, rules, chunk_tokens, glossary_metrics)
+
+        async def run_chunk(group: list[ExtractionRule], chunk_idx: int, chunk_count: int, chunk: TextChunk):
+            async with self._get_request_slots():
+                parsed_results = await self._extract_batch_chunk(
+                    group, chunk.text, chunk_idx, chunk_count, glossary_metrics
+                )
+            if parsed_results is None:
+                return group, None
+            return group, self._route_batch_results(parsed_results, group)
+
+        chunk_results = await asyncio.gather(*(
+            run_chunk(group, chunk_idx, len(chunks), chunk)
+            for group, chunks in plan
+            for chunk_idx, chunk in enumerate(chunks)
+        ))
+
+        failed = {
+            rule.id for group, routed in chunk_results if routed is None for rule in group
+        }
+        if failed:
+            logger.warning(f"Batched AI requests failed for rules: {', '.join(sorted(failed))}")
+        results: dict[str, list[AIExtractionResult]] = {
+            rule.id: [] for rule in rules if rule.id not in failed
+        }
+        for _, routed in chunk_results:
+            for rule_id, rule_results in (routed or {}).items():
+                if rule_id in results:
+                    results[rule_id].extend(rule_results)
+        return results
+
+    def prepare_chunks(
+        self,
+        text: str,
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[TextChunk]]:
+        """Chunks of a document worth sending for each rule, by rule ID.
+
+        The text is chunked once, with a budget that fits the longest of the
+        rules' prompts, and every rule is scored against the same chunks.
+        This is CPU-bound (tokenization and fuzzy scoring), so async callers
+        should run it in a worker thread.
+        """
+        glossary_metrics = self._glossary_metrics(rules, glossary_metrics)
+        chunker = self._make_chunker(
+            [
+                self._build_prompt(rule, "", self._format_variations(rule), glossary_metrics.get(rule.id))
+                for rule in rules
+            ],
+            chunk_tokens
+        )
+        relevance_filter = self._relevance_filter(self._chunk_document(chunker, text))
+        return {
+            rule.id: relevance_filter.select(rule_terms(rule, glossary_metrics.get(rule.id)))
+            for rule in rules
+        }
+
+    def chunk_prompts(
+        self,
+        text: str,
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[tuple[str, str]]]:
+        """(chunk, prompt) pairs that extract() would send for a document, by rule ID.
+
+        Used to submit the requests through a provider batch API instead of
+        calling the model directly.
+        """
+        glossary_metrics = self._glossary_metrics(rules, glossary_metrics)
+        prepared = self.prepare_chunks(text, rules, chunk_tokens, glossary_metrics)
+        prompts = {}
+        for rule in rules:
+            variations_text = self._format_variations(rule)
+            prompts[rule.id] = [
+                (chunk.text, self._build_prompt(rule, chunk.text, variations_text, glossary_metrics.get(rule.id)))
+                for chunk in prepared[rule.id]
+            ]
+        return prompts
+
+    def _batch_plan(
+        self,
+        text: str,
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int],
+        glossary_metrics: dict[str, Optional[GlossaryMetric]]
+    ) -> list[tuple[list[ExtractionRule], list[TextChunk]]]:
+        """Rule groups of multi-metric prompts, each with the chunks to send it.
+
+        The document is chunked once, sized for the longest group prompt; a
+        group gets the chunks that are among the most relevant for at least
+        one of its rules.
+        """
+        groups = self._batch_groups(rules, glossary_metrics)
+        chunker = self._make_chunker(
+            [self._build_batch_prompt(group, "", glossary_metrics) for group in groups], chunk_tokens
+        )
+        chunks = self._chunk_document(chunker, text)
+        relevance_filter = self._relevance_filter(chunks)
+
+        plan = []
+        for group in groups:
+            relevant = set()
+            for rule in group:
+                relevant.update(
+                    id(chunk) for chunk in relevance_filter.select(rule_terms(rule, glossary_metrics.get(rule.id)))
+                )
+            plan.append((group, [chunk for chunk in chunks if id(chunk) in relevant]))
+        return plan
+
+    def _batch_groups(
+        self,
+        rules: list[ExtractionRule],
+        glossary_metrics: dict[str, Optional[GlossaryMetric]]
+    ) -> list[list[ExtractionRule]]:
+        """Split rules into groups that fit one multi-metric prompt each.
+
+        A group's results, estimated at settings.ai_batch_result_tokens_per_rule
+        per metric, must fit in max_tokens, and its prompt must leave at least
+        settings.ai_batch_min_chunk_tokens of the context for document text.
+        Rules are packed greedily in order; a rule too large for any group
+        gets a group of its own.
+        """
+        model = self.request_model
+        per_rule = max(settings.ai_batch_result_tokens_per_rule, 1)
+        max_rules = max(self.config.max_tokens // per_rule, 1)
+        prompt_budget = (
+            context_window(model)
+            - count_tokens(self._build_batch_prompt([], "", glossary_metrics), model)
+            - count_tokens(self.config.system_prompt or DEFAULT_SYSTEM_PROMPT, model)
+            - MESSAGE_OVERHEAD_TOKENS
+            - self.config.max_tokens
+            - settings.ai_batch_min_chunk_tokens
+        )
+
+        groups: list[list[ExtractionRule]] = []
+        group_tokens = 0
+        for rule in rules:
+            block_tokens = count_tokens(self._batch_metric_block(rule, glossary_metrics.get(rule.id)), model)
+            if groups and len(groups[-1]) < max_rules and group_tokens + block_tokens <= prompt_budget:
+                groups[-1].append(rule)
+                group_tokens += block_tokens
+            else:
+                groups.append([rule])
+                group_tokens = block_tokens
+
+        if len(groups) > 1:
+            logger.info(f"Split {len(rules)} rules into {len(groups)} multi-metric prompts: {[len(g) for g in groups]}")
+        return groups
+
+    def _glossary_metrics(
+        self,
+        rules: list[ExtractionRule],
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, Optional[GlossaryMetric]]:
+        """Glossary metric per rule ID, looking up the ones not given."""
+        resolved = dict(glossary_metrics or {})
+        for rule in rules:
+            if not resolved.get(rule.id) and self.glossary_loader:
+                resolved[rule.id] = self.glossary_loader.get_metric(rule.target_metric_id)
+        return resolved
+
+    def request_body(self, prompt: str, provider: str = "openai") -> dict:
+        """Request body for a prompt in a provider's format, as sent by _call_openai or _call_anthropic."""
+        system_prompt = self.config.system_prompt or DEFAULT_SYSTEM_PROMPT
+        if provider == "anthropic":
+            return {
+                "model": self.config.model,
+                "max_tokens": self.config.max_tokens,
+                "temperature": self.config.temperature,
+                "system": system_prompt,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+        return {
+            "model": self.openai_model,
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ],
+        }
+
+    async def _extract_chunk_bounded(self, *args, **kwargs) -> list[AIExtractionResult]:
+        """Run _extract_chunk once a request slot is free."""
+        async with self._get_request_slots():
+            return await self._extract_chunk(*args, **kwargs)
+
+    async def _extract_batch_chunk(
+        self,
+        rules: list[ExtractionRule],
+        chunk: str,
+        chunk_idx: int,
+        chunk_count: int,
+        glossary_metrics: dict[str, Optional[GlossaryMetric]]
+    ) -> Optional[list[AIExtractionResult]]:
+        """Run the multi-metric extraction prompt on a single chunk; None if the request failed."""
+        prompt = self._build_batch_prompt(rules, chunk, glossary_metrics)
+
+        logger.info("=" * 80)
+        logger.info(f"AI BATCH EXTRACTION PROMPT - Chunk {chunk_idx + 1}/{chunk_count}")
+        logger.info(f"Provider: {self.config.provider}, Model: {self.config.model}")
+        logger.info(f"Rules: {', '.join(rule.id for rule in rules)}")
+        logger.info("-" * 80)
+        logger.info("FULL PROMPT:")
+        logger.info(prompt)
+        logger.info("=" * 80)
+
+        try:
+            response = await self._call_provider(prompt)
+            logger.info(f"AI BATCH RESPONSE RECEIVED - Chunk {chunk_idx + 1}/{chunk_count} ({len(response)} characters)")
+            logger.info(response)
+            return self.parse_response(response, chunk, chunk_idx)
+        except Exception as e:
+            # Log error but continue with other chunks
+            logger.warning(f"AI batch extraction error on chunk {chunk_idx + 1}/{chunk_count}: {e}")
+            return None
+
+    def _route_batch_results(
+        self,
+        results: list[AIExtractionResult],
+        rules: list[ExtractionRule]
+    ) -> dict[str, list[AIExtractionResult]]:
+        """Assign batched results to rules by the metric_id the model echoed back.
+
+        Falls back to the rule's target metric ID or name when the model
+        returned those instead of the rule ID.
+        """
+        routed: dict[str, list[AIExtractionResult]] = {}
+        by_rule_id = {rule.id: rule for rule in rules}
+
+        for result in results:
+            targets = []
+            if result.metric_id in by_rule_id:
+                targets = [by_rule_id[result.metric_id]]
+            else:
+                metric_key = str(result.metric_id or result.metric_name or "").strip().lower()
+                targets = [
+                    rule for rule in rules
+                    if metric_key and metric_key in (rule.target_metric_id.lower(), rule.target_metric_name.lower())
+                ]
+            if not targets:
+                logger.warning(f"Dropping batched AI result with unknown metric_id: {result.metric_id}")
+                continue
+            for rule in targets:
+                routed.setdefault(rule.id, []).append(result)
+
+        return routed
+
+    async def _extract_chunk(
+        self,
+        rule: ExtractionRule,
+        chunk: str,
+        chunk_idx: int,
+        chunk_count: Optional[int],
+        variations_text: str,
+        glossary_metric: Optional[GlossaryMetric] = None
+    ) -> list[AIExtractionResult]:
+        """Run the AI extraction prompt on a single chunk."""
+        chunk_label = f"{chunk_idx + 1}/{chunk_count}" if chunk_count else f"{chunk_idx + 1}"
+        prompt = self._build_prompt(rule, chunk, variations_text, glossary_metric)
+
+        # Log the full prompt for debugging
+        logger.info("=" * 80)
+        logger.info(f"AI EXTRACTION PROMPT (Async) - Chunk {chunk_label}")
+        logger.info(f"Provider: {self.config.provider}, Model: {self.config.model}")
+        logger.info(f"Rule ID: {rule.id}, Metric: {rule.target_metric_name} ({rule.target_metric_id})")
+        logger.info(f"System Prompt: {self.config.system_prompt or DEFAULT_SYSTEM_PROMPT}")
+        logger.info("-" * 80)
+        logger.info("FULL PROMPT:")
+        logger.info(prompt)
+        logger.info("=" * 80)
+
+        try:
+            response = await self._call_provider(prompt)
+
+            # Log the AI response
             logger.info("=" * 80)
-            logger.info(f"AI EXTRACTION PROMPT (Async) - Chunk {chunk_idx + 1}/{len(chunks)}")
-            logger.info(f"Provider: {self.config.provider}, Model: {self.config.model}")
-            logger.info(f"Rule ID: {rule.id}, Metric: {rule.target_metric_name} ({rule.target_metric_id})")
-            logger.info(f"System Prompt: {self.config.system_prompt or 'You are a precise data extraction assistant.'}")
+            logger.info(f"AI RESPONSE RECEIVED (Async) - Chunk {chunk_label}")
+            logger.info(f"Response length: {len(response)} characters")
             logger.info("-" * 80)
-            logger.info("FULL PROMPT:")
-            logger.info(prompt)
+            logger.info("RAW AI RESPONSE:")
+            logger.info(response)
             logger.info("=" * 80)
 
-            try:
-                if self.config.provider == "anthropic":
-                    response = await self._call_anthropic(prompt)
-                else:
-                    response = await self._call_openai(prompt)
-
-                # Log the AI response
-                logger.info("=" * 80)
-                logger.info(f"AI RESPONSE RECEIVED (Async) - Chunk {chunk_idx + 1}/{len(chunks)}")
-                logger.info(f"Response length: {len(response)} characters")
-                logger.info("-" * 80)
-                logger.info("RAW AI RESPONSE:")
-                logger.info(response)
-                logger.info("=" * 80)
-
-                parsed_results = self._parse_response(response, chunk, chunk_idx)
-                
-                # Log parsed results
-                if parsed_results:
-                    logger.info(f"✅ Successfully parsed {len(parsed_results)} results from AI response")
-                    for idx, parsed in enumerate(parsed_results, 1):
-                        logger.info(f"   Result {idx}: value={parsed.value}, confidence={parsed.confidence:.2f}")
-                        logger.info(f"      Entity: {parsed.entity_type}/{parsed.entity_name}")
-                        logger.info(f"      Dimensions: {parsed.dimensions}")
-                        logger.info(f"      Geography: {parsed.dimensions.get('geography') if parsed.dimensions else 'N/A'}")
-                        logger.info(f"      Location: {parsed.dimensions.get('location') if parsed.dimensions else 'N/A'}")
-                else:
-                    logger.warning("❌ Failed to parse AI response or no results found")
-                
-                if parsed_results:
-                    results.extend(parsed_results)  # Add all results
-
-            except Exception as e:
-                # Log error but continue with other chunks
-                print(f"AI extraction error: {e}")
-                continue
+            parsed_results = self.parse_response(response, chunk, chunk_idx)
+            
+            # Log parsed results
+            if parsed_results:
+                logger.info(f"✅ Successfully parsed {len(parsed_results)} results from AI response")
+                for idx, parsed in enumerate(parsed_results, 1):
+                    logger.info(f"   Result {idx}: value={parsed.value}, confidence={parsed.confidence:.2f}")
+                    logger.info(f"      Entity: {parsed.entity_type}/{parsed.entity_name}")
+                    logger.info(f"      Dimensions: {parsed.dimensions}")
+                    logger.info(f"      Geography: {parsed.dimensions.get('geography') if parsed.dimensions else 'N/A'}")
+                    logger.info(f"      Location: {parsed.dimensions.get('location') if parsed.dimensions else 'N/A'}")
+            else:
+                logger.warning("❌ Failed to parse AI response or no results found")
+            
+            return parsed_results
 
-        return results
+        except Exception as e:
+            # Log error but continue with other chunks
+            logger.warning(f"AI extraction error on chunk {chunk_label}: {e}")
+            return []
 
     def extract_sync(
         self,
         text: str,
         rule: ExtractionRule,
-        chunk_size: int = 8000,
+        chunk_tokens: Optional[int] = None,
         glossary_metric: Optional[GlossaryMetric] = None
     ) -> list[AIExtractionResult]:
         """Synchronous extraction for simpler use cases."""
@@ -164,9 +532,10 @@ class AIExtractor:
         if not glossary_metric and self.glossary_loader:
             glossary_metric = self.glossary_loader.get_metric(rule.target_metric_id)
         
-        chunks = self._chunk_text(text, chunk_size)
+        chunks = self.prepare_chunks(text, [rule], chunk_tokens, {rule.id: glossary_metric})[rule.id]
 
-        for chunk_idx, chunk in enumerate(chunks):
+        for chunk_idx, text_chunk in enumerate(chunks):
+            chunk = text_chunk.text
             prompt = self._build_prompt(rule, chunk, variations_text, glossary_metric)
 
             # Log the full prompt for debugging
@@ -174,7 +543,7 @@ class AIExtractor:
             logger.info(f"AI EXTRACTION PROMPT (Sync) - Chunk {chunk_idx + 1}/{len(chunks)}")
             logger.info(f"Provider: {self.config.provider}, Model: {self.config.model}")
             logger.info(f"Rule ID: {rule.id}, Metric: {rule.target_metric_name} ({rule.target_metric_id})")
-            logger.info(f"System Prompt: {self.config.system_prompt or 'You are a precise data extraction assistant.'}")
+            logger.info(f"System Prompt: {self.config.system_prompt or DEFAULT_SYSTEM_PROMPT}")
             logger.info("-" * 80)
             logger.info("FULL PROMPT:")
             logger.info(prompt)
@@ -188,7 +557,7 @@ class AIExtractor:
                 # Additional logging after response is received
                 logger.info(f"✅ Response received for chunk {chunk_idx + 1}/{len(chunks)}")
 
-                parsed_results = self._parse_response(response, chunk, chunk_idx)
+                parsed_results = self.parse_response(response, chunk, chunk_idx)
                 
                 # Log parsed results
                 if parsed_results:
@@ -206,7 +575,7 @@ class AIExtractor:
                     results.extend(parsed_results)  # Add all results
 
             except Exception as e:
-                print(f"AI extraction error: {e}")
+                logger.warning(f"AI extraction error on chunk {chunk_idx + 1}/{len(chunks)}: {e}")
                 continue
 
         return results
@@ -227,6 +596,56 @@ class AIExtractor:
         glossary_metric: Optional[GlossaryMetric] = None
     ) -> str:
         """Build the extraction prompt with optional glossary enrichment."""
+        metric_name, metric_description, unit, all_variations, glossary_sections = self._metric_prompt_parts(
+            rule, variations, glossary_metric
+        )
+
+        # Format the prompt with all available information
+        prompt_text = self.config.extraction_prompt_template.format(
+            metric_name=metric_name,
+            metric_description=metric_description,
+            unit=unit,
+            variations=all_variations,
+            text=text
+        )
+        
+        # Append glossary-specific sections if available
+        return prompt_text + glossary_sections
+
+    def _build_batch_prompt(
+        self,
+        rules: list[ExtractionRule],
+        text: str,
+        glossary_metrics: dict[str, Optional[GlossaryMetric]]
+    ) -> str:
+        """Build one prompt requesting the metrics of all rules, keyed by rule ID."""
+        metric_blocks = [self._batch_metric_block(rule, glossary_metrics.get(rule.id)) for rule in rules]
+        return self.config.batch_extraction_prompt_template.format(
+            metrics="\n\n".join(metric_blocks),
+            text=text
+        )
+
+    def _batch_metric_block(self, rule: ExtractionRule, glossary_metric: Optional[GlossaryMetric] = None) -> str:
+        """Section of a multi-metric prompt describing one rule's metric."""
+        metric_name, metric_description, unit, all_variations, glossary_sections = self._metric_prompt_parts(
+            rule, self._format_variations(rule), glossary_metric
+        )
+        return (
+            f"### metric_id: {rule.id}\n"
+            f"Metric: {metric_name}\n"
+            f"Description: {metric_description}\n"
+            f"Expected unit: {unit}\n"
+            f"Known variations of this metric:\n{all_variations}"
+            f"{glossary_sections}"
+        )
+
+    def _metric_prompt_parts(
+        self,
+        rule: ExtractionRule,
+        variations: str,
+        glossary_metric: Optional[GlossaryMetric] = None
+    ) -> tuple[str, str, Optional[str], str, str]:
+        """Metric name, description, unit, variations and glossary sections for a prompt."""
         # Use glossary metric if available, otherwise fall back to rule
         metric_name = glossary_metric.canonical_name if glossary_metric else rule.target_metric_name
         metric_description = glossary_metric.description if glossary_metric else rule.description
@@ -284,93 +703,188 @@ class AIExtractor:
             
             dimension_constraints_section += "\n\n⚠️ IMPORTANT: If a dimension has authorized values listed above, you MUST use ONLY those values. Do NOT invent or hallucinate new values. If the document contains a value not in the authorized list, use null or the closest matching authorized value."
         
-        # Format the prompt with all available information
-        prompt_text = self.config.extraction_prompt_template.format(
-            metric_name=metric_name,
-            metric_description=metric_description,
-            unit=unit,
-            variations=all_variations,
-            text=text[:self.config.max_tokens * 2]  # Rough char limit
+        glossary_sections = calculation_section + domain_section + validation_section + dimension_constraints_section
+        return metric_name, metric_description, unit, all_variations, glossary_sections
+
+    @property
+    def request_model(self) -> str:
+        """Model name actually sent to the configured provider."""
+        return self.provider_model(self.config.provider)
+
+    def provider_model(self, provider: str) -> str:
+        """Model name sent to a provider ("openai" or "anthropic")."""
+        return self.config.model if provider == "anthropic" else self.openai_model
+
+    def _make_chunker(self, empty_prompts: list[str], chunk_tokens: Optional[int] = None) -> TokenChunker:
+        """Chunker sized so prompt, chunk and response fit in the model context.
+
+        `empty_prompts` are the prompts the chunks will be sent with, rendered
+        without document text; the budget is the context window minus the
+        longest of them, the system prompt and max_tokens reserved for the
+        response, optionally capped by `chunk_tokens` or
+        settings.ai_chunk_max_tokens.
+        """
+        model = self.request_model
+        overhead = (
+            max(count_tokens(prompt, model) for prompt in empty_prompts)
+            + count_tokens(self.config.system_prompt or DEFAULT_SYSTEM_PROMPT, model)
+            + MESSAGE_OVERHEAD_TOKENS
         )
-        
-        # Append glossary-specific sections if available
-        if calculation_section or domain_section or validation_section or dimension_constraints_section:
-            prompt_text += calculation_section + domain_section + validation_section + dimension_constraints_section
-        
-        return prompt_text
+        budget = context_window(model) - overhead - self.config.max_tokens
+        cap = chunk_tokens or settings.ai_chunk_max_tokens
+        if cap:
+            budget = min(budget, cap)
+        if budget < 256:
+            logger.warning(f"Prompt leaves only {budget} tokens for document text on {model}")
+            budget = 256
+        return TokenChunker(model, budget, settings.ai_chunk_overlap_tokens)
 
-    def _chunk_text(self, text: str, chunk_size: int) -> list[str]:
-        """Split text into chunks for processing."""
-        if len(text) <= chunk_size:
-            return [text]
+    def _relevance_filter(self, chunks: list[TextChunk]) -> ChunkRelevanceFilter:
+        return ChunkRelevanceFilter(chunks, settings.ai_relevance_top_k)
 
-        chunks = []
-        paragraphs = text.split("\n\n")
-        current_chunk = ""
+    def _chunk_document(self, chunker: TokenChunker, text: str) -> list[TextChunk]:
+        """Split text into token-budgeted chunks and log their sizes."""
+        chunks = chunker.chunk(text)
+        logger.info(
+            f"Split document into {len(chunks)} chunk(s) of at most {chunker.max_tokens} tokens: "
+            f"{[chunk.token_count for chunk in chunks]}"
+        )
+        return chunks
 
-        for para in paragraphs:
-            if len(current_chunk) + len(para) < chunk_size:
-                current_chunk += para + "\n\n"
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk)
-                current_chunk = para + "\n\n"
+    def _chunk_pages(self, pages: Iterable[ParsedPage], chunker: TokenChunker) -> Iterator[str]:
+        """Pack streamed pages into chunks, yielding each chunk as soon as it is full."""
+        current_chunk = []
+        current_tokens = 0
+
+        for page in pages:
+            page_text = f"--- Page {page.number} ---\n{page.text}"
+            page_tokens = chunker.count(page_text)
+            if current_chunk and current_tokens + page_tokens > chunker.max_tokens:
+                logger.info(f"Page chunk ready: {current_tokens} tokens")
+                yield "\n".join(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+
+            if page_tokens > chunker.max_tokens:
+                # Oversized page: fall back to paragraph chunking for this page
+                for chunk in chunker.chunk(page_text):
+                    logger.info(f"Page chunk ready: {chunk.token_count} tokens")
+                    yield chunk.text
+                continue
+
+            current_chunk.append(page_text)
+            current_tokens += page_tokens + 1
 
         if current_chunk:
-            chunks.append(current_chunk)
+            logger.info(f"Page chunk ready: {current_tokens} tokens")
+            yield "\n".join(current_chunk)
 
-        return chunks
+    async def _call_provider(self, prompt: str) -> str:
+        """Send a prompt to the configured provider."""
+        if self.config.provider == "anthropic":
+            return await self._call_anthropic(prompt)
+        return await self._call_openai(prompt)
+
+    def cache_lookup(self, provider: str, model: str, prompt: str) -> tuple[Optional[str], Optional[str]]:
+        """Return (cache key, cached response) for a prompt.
+
+        The key is None when the response cache is disabled.
+        """
+        cache = get_llm_cache()
+        if cache is None:
+            return None, None
+        key = cache.make_key(
+            provider,
+            model,
+            self.config.temperature,
+            self.config.max_tokens,
+            prompt,
+            self.config.system_prompt or DEFAULT_SYSTEM_PROMPT,
+        )
+        return key, cache.get(key)
+
+    def cache_store(self, key: Optional[str], response: Optional[str]) -> None:
+        """Cache a response under a key from cache_lookup(); no-op without a key."""
+        cache = get_llm_cache()
+        if cache is not None and key and response:
+            cache.put(key, response)
+
+    def _reserve_tokens(self, model: str, prompt: str) -> int:
+        """Rate-limiter token estimate for one prompt."""
+        return get_llm_scheduler().estimate_tokens(
+            model, self.config.max_tokens, self.config.system_prompt or DEFAULT_SYSTEM_PROMPT, prompt
+        )
+
+    @property
+    def openai_model(self) -> str:
+        return self.config.model if "gpt" in self.config.model else "gpt-4-turbo-preview"
 
     async def _call_anthropic(self, prompt: str) -> str:
         """Call Anthropic API asynchronously."""
-        message = self.anthropic_client.messages.create(
-            model=self.config.model,
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            system=self.config.system_prompt or "You are a precise data extraction assistant.",
-            messages=[{"role": "user", "content": prompt}]
+        cache_key, cached = self.cache_lookup("anthropic", self.config.model, prompt)
+        if cached is not None:
+            return cached
+
+        message = await get_llm_scheduler().call_async(
+            "anthropic",
+            self._reserve_tokens(self.config.model, prompt),
+            self.priority,
+            lambda: self.async_anthropic_client.messages.create(**self.request_body(prompt, "anthropic")),
         )
-        return message.content[0].text
+        response_text = message.content[0].text
+        # The cache write commits to SQLite; keep it off the event loop
+        await asyncio.to_thread(self.cache_store, cache_key, response_text)
+        return response_text
 
     def _call_anthropic_sync(self, prompt: str) -> str:
         """Call Anthropic API synchronously."""
-        message = self.anthropic_client.messages.create(
-            model=self.config.model,
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            system=self.config.system_prompt or "You are a precise data extraction assistant.",
-            messages=[{"role": "user", "content": prompt}]
+        cache_key, cached = self.cache_lookup("anthropic", self.config.model, prompt)
+        if cached is not None:
+            return cached
+
+        message = get_llm_scheduler().call(
+            "anthropic",
+            self._reserve_tokens(self.config.model, prompt),
+            self.priority,
+            lambda: self.anthropic_client.messages.create(**self.request_body(prompt, "anthropic")),
         )
-        return message.content[0].text
+        response_text = message.content[0].text
+        self.cache_store(cache_key, response_text)
+        return response_text
 
     async def _call_openai(self, prompt: str) -> str:
         """Call OpenAI API asynchronously."""
-        response = self.openai_client.chat.completions.create(
-            model=self.config.model if "gpt" in self.config.model else "gpt-4-turbo-preview",
-            max_tokens=self.config.max_tokens,
-            temperature=self.config.temperature,
-            messages=[
-                {"role": "system", "content": self.config.system_prompt or "You are a precise data extraction assistant."},
-                {"role": "user", "content": prompt}
-            ]
+        cache_key, cached = self.cache_lookup("openai", self.openai_model, prompt)
+        if cached is not None:
+            return cached
+
+        response = await get_llm_scheduler().call_async(
+            "openai",
+            self._reserve_tokens(self.openai_model, prompt),
+            self.priority,
+            lambda: self.async_openai_client.chat.completions.create(**self.request_body(prompt, "openai")),
         )
-        return response.choices[0].message.content
+        response_text = response.choices[0].message.content
+        await asyncio.to_thread(self.cache_store, cache_key, response_text)
+        return response_text
 
     def _call_openai_sync(self, prompt: str) -> str:
         """Call OpenAI API synchronously."""
+        cache_key, cached = self.cache_lookup("openai", self.openai_model, prompt)
+        if cached is not None:
+            logger.info("📦 Using cached OpenAI response")
+            return cached
+
         logger.info("📡 Calling OpenAI API...")
-        logger.info(f"   Model: {self.config.model if 'gpt' in self.config.model else 'gpt-4-turbo-preview'}")
+        logger.info(f"   Model: {self.openai_model}")
         logger.info(f"   Max tokens: {self.config.max_tokens}, Temperature: {self.config.temperature}")
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model=self.config.model if "gpt" in self.config.model else "gpt-4-turbo-preview",
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
-                messages=[
-                    {"role": "system", "content": self.config.system_prompt or "You are a precise data extraction assistant."},
-                    {"role": "user", "content": prompt}
-                ]
+            response = get_llm_scheduler().call(
+                "openai",
+                self._reserve_tokens(self.openai_model, prompt),
+                self.priority,
+                lambda: self.openai_client.chat.completions.create(**self.request_body(prompt, "openai")),
             )
             
             # Extract response content
@@ -387,6 +901,7 @@ class AIExtractor:
             logger.info(response_text)
             logger.info("=" * 80)
             
+            self.cache_store(cache_key, response_text)
             return response_text
             
         except Exception as e:
@@ -397,7 +912,7 @@ class AIExtractor:
             logger.error("=" * 80)
             raise
 
-    def _parse_response(self, response: str, chunk: str, chunk_idx: int) -> List[AIExtractionResult]:
+    def parse_response(self, response: str, chunk: str, chunk_idx: int) -> List[AIExtractionResult]:
         """Parse the AI response into structured data with entities, dimensions, and metrics.
         Returns a LIST of all extracted results."""
         results = []
@@ -499,7 +1014,8 @@ class AIExtractor:
                         entity_id=entity_data.get("id") if entity_data else None,
                         dimensions=all_dimensions,
                         metric_name=metric_data.get("metric_name") if metric_data else None,
-                        unit=metric_data.get("unit") if metric_data else result_data.get("unit")
+                        unit=metric_data.get("unit") if metric_data else result_data.get("unit"),
+                        metric_id=(metric_data.get("metric_id") if metric_data else None) or result_data.get("metric_id")
                     )
                     
                     results.append(result)
@@ -529,11 +1045,47 @@ class AIExtractor:
 class MockAIExtractor(AIExtractor):
     """Mock AI extractor for testing without API calls."""
 
+    async def extract(
+        self,
+        text: str,
+        rule: ExtractionRule,
+        chunk_tokens: Optional[int] = None,
+        glossary_metric: Optional[GlossaryMetric] = None,
+        chunks: Optional[list[TextChunk]] = None
+    ) -> list[AIExtractionResult]:
+        """Return mock extraction results."""
+        return self.extract_sync(text, rule, chunk_tokens, glossary_metric)
+
+    async def extract_pages(
+        self,
+        pages: Iterable[ParsedPage],
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[AIExtractionResult]]:
+        """Return mock extraction results from the first page with a number, for every rule."""
+        results: dict[str, list[AIExtractionResult]] = {rule.id: [] for rule in rules}
+        for page in pages:
+            for rule in rules:
+                if not results[rule.id]:
+                    results[rule.id] = self.extract_sync(page.text, rule, chunk_tokens)
+        return results
+
+    async def extract_batch(
+        self,
+        text: str,
+        rules: list[ExtractionRule],
+        chunk_tokens: Optional[int] = None,
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None
+    ) -> dict[str, list[AIExtractionResult]]:
+        """Return mock extraction results for every rule."""
+        return {rule.id: self.extract_sync(text, rule, chunk_tokens) for rule in rules}
+
     def extract_sync(
         self,
         text: str,
         rule: ExtractionRule,
-        chunk_size: int = 8000,
+        chunk_tokens: Optional[int] = None,
         glossary_metric: Optional[GlossaryMetric] = None
     ) -> list[AIExtractionResult]:
         """Return mock extraction results."""
@@ -0,0 +1,429 @@
+"""Bulk AI extraction through provider batch APIs."""
+
+import asyncio
+import json
+import logging
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from app.core.config import settings
+from app.models import ExtractionRule, GlossaryMetric
+from app.services.ai_extractor import AIExtractionResult, AIExtractor
+from app.services.llm_clients import get_llm_clients
+from app.services.text_chunker import TextChunk, count_tokens
+
+logger = logging.getLogger(__name__)
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+
+# Normalized batch states returned by BatchProvider.status()
+BATCH_IN_PROGRESS = "in_progress"
+BATCH_COMPLETED = "completed"
+BATCH_FAILED = "failed"
+
+
+class BatchError(RuntimeError):
+    """Raised when a submitted batch fails, expires or times out."""
+
+
+@dataclass
+class BatchRequest:
+    """One chunk prompt of a batch, and where its results belong.
+
+    The prompt itself is only written to the batch input file.
+    """
+    custom_id: str
+    document_id: str
+    rule: ExtractionRule
+    chunk_idx: int
+    chunk: str
+    cache_key: Optional[str] = None
+
+
+def read_batch_output(lines: Iterable[str]) -> dict[str, str]:
+    """Response text by custom_id from batch output JSONL (OpenAI format).
+
+    Lines for failed requests are logged and skipped.
+    """
+    responses = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        custom_id = entry.get("custom_id")
+        response = entry.get("response") or {}
+        if entry.get("error") or response.get("status_code") != 200:
+            logger.warning(f"Batch request {custom_id} failed: {entry.get('error') or response.get('status_code')}")
+            continue
+        try:
+            responses[custom_id] = response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            logger.warning(f"Batch request {custom_id} returned no message content")
+    return responses
+
+
+class BatchProvider(ABC):
+    """Runs a JSONL file of model requests asynchronously.
+
+    `api` names the request format: with "openai" each input line is
+    {"custom_id", "method", "url", "body"} as accepted by the OpenAI Batch
+    API, with "anthropic" it is {"custom_id", "params"} as accepted by the
+    Anthropic Message Batches API. Bodies come from AIExtractor.request_body.
+    """
+
+    name: str = "batch"
+    api: str = "openai"
+
+    def request_line(self, custom_id: str, body: dict) -> dict:
+        """Input file line for one request body."""
+        if self.api == "anthropic":
+            return {"custom_id": custom_id, "params": body}
+        return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_ENDPOINT, "body": body}
+
+    @abstractmethod
+    def submit(self, input_path: Path) -> str:
+        """Submit a request file and return the batch ID."""
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """BATCH_IN_PROGRESS, BATCH_COMPLETED or BATCH_FAILED."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> dict[str, str]:
+        """Response text by custom_id for a completed batch."""
+
+    def cancel(self, batch_id: str) -> None:
+        """Stop a batch that is no longer awaited."""
+
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch API (24h completion window, discounted pricing)."""
+
+    name = "openai"
+    FAILED_STATUSES = {"failed", "expired", "cancelling", "cancelled"}
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        self._client = client
+        self.completion_window = completion_window
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_llm_clients().openai()
+        return self._client
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return BATCH_COMPLETED
+        if batch.status in self.FAILED_STATUSES:
+            return BATCH_FAILED
+        return BATCH_IN_PROGRESS
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        batch = self.client.batches.retrieve(batch_id)
+        if not batch.output_file_id:
+            return {}
+        content = self.client.files.content(batch.output_file_id)
+        return read_batch_output(content.text.splitlines())
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.batches.cancel(batch_id)
+
+
+class AnthropicBatchProvider(BatchProvider):
+    """Anthropic Message Batches API (24h processing window, discounted pricing)."""
+
+    name = "anthropic"
+    api = "anthropic"
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_llm_clients().anthropic()
+        return self._client
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        batch = self.client.messages.batches.retrieve(batch_id)
+        if batch.processing_status == "ended":
+            return BATCH_COMPLETED
+        if batch.processing_status == "canceling":
+            return BATCH_FAILED
+        return BATCH_IN_PROGRESS
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        responses = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                logger.warning(f"Batch request {entry.custom_id} {entry.result.type}")
+                continue
+            try:
+                responses[entry.custom_id] = entry.result.message.content[0].text
+            except (AttributeError, IndexError):
+                logger.warning(f"Batch request {entry.custom_id} returned no message content")
+        return responses
+
+    def cancel(self, batch_id: str) -> None:
+        self.client.messages.batches.cancel(batch_id)
+
+
+class LocalFileBatchProvider(BatchProvider):
+    """File-based stand-in for a batch API, for tests and offline runs.
+
+    Each batch is a directory under `root` holding input.jsonl. The batch
+    completes once output.jsonl appears next to it (or fails if error.txt
+    does). Input lines use the `api` request format; output.jsonl always
+    uses the OpenAI output format. With a `responder`, output is written at
+    submit time by calling it with each request body (a None response
+    marks the request as failed); without one, another process or a person
+    is expected to write output.jsonl.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path, responder: Optional[Callable[[dict], str]] = None, api: str = "openai"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.responder = responder
+        self.api = api
+
+    def _dir(self, batch_id: str) -> Path:
+        return self.root / batch_id
+
+    def submit(self, input_path: Path) -> str:
+        batch_id = f"batch-{uuid.uuid4().hex[:12]}"
+        batch_dir = self._dir(batch_id)
+        batch_dir.mkdir(parents=True)
+        shutil.copyfile(input_path, batch_dir / "input.jsonl")
+
+        if self.responder is not None:
+            with open(batch_dir / "input.jsonl", encoding="utf-8") as f_in, \
+                    open(batch_dir / "output.jsonl.tmp", "w", encoding="utf-8") as f_out:
+                for line in f_in:
+                    request = json.loads(line)
+                    content = self.responder(request["params"] if self.api == "anthropic" else request["body"])
+                    if content is None:
+                        entry = {"custom_id": request["custom_id"], "response": None, "error": {"message": "no response"}}
+                    else:
+                        entry = {
+                            "custom_id": request["custom_id"],
+                            "response": {
+                                "status_code": 200,
+                                "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                            },
+                            "error": None,
+                        }
+                    f_out.write(json.dumps(entry) + "\n")
+            (batch_dir / "output.jsonl.tmp").replace(batch_dir / "output.jsonl")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self._dir(batch_id)
+        if (batch_dir / "output.jsonl").exists():
+            return BATCH_COMPLETED
+        if (batch_dir / "error.txt").exists():
+            return BATCH_FAILED
+        return BATCH_IN_PROGRESS
+
+    def results(self, batch_id: str) -> dict[str, str]:
+        with open(self._dir(batch_id) / "output.jsonl", encoding="utf-8") as f:
+            return read_batch_output(f)
+
+
+def get_batch_provider(name: Optional[str] = None) -> BatchProvider:
+    """Batch provider by name ("openai", "anthropic" or "local"), defaulting to settings.ai_batch_provider."""
+    name = name or settings.ai_batch_provider
+    if name == "openai":
+        return OpenAIBatchProvider()
+    if name == "anthropic":
+        return AnthropicBatchProvider()
+    if name == "local":
+        return LocalFileBatchProvider(Path(settings.upload_dir) / ".batches" / "local")
+    raise ValueError(f"Unknown batch provider: {name}")
+
+
+class BatchExtractionRunner:
+    """Extracts the rules of a job's documents in one provider batch.
+
+    Builds the same chunk prompts extract() would send, writes them to a
+    JSONL file in the provider's request format, submits it and polls until
+    the batch finishes. Documents are consumed one at a time while the file
+    is written, and only each request's chunk is kept, so a job's documents
+    never have to be in memory together. Responses are parsed with
+    AIExtractor.parse_response and cached like direct calls; prompts
+    already in the LLM response cache are not submitted again. Requests
+    that failed in the batch or are missing from its output are sent
+    directly through AIExtractor.extract.
+    """
+
+    def __init__(
+        self,
+        ai_extractor: AIExtractor,
+        provider: BatchProvider,
+        work_dir: Optional[Path] = None,
+        poll_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.ai_extractor = ai_extractor
+        self.provider = provider
+        self.work_dir = Path(work_dir or Path(settings.upload_dir) / ".batches")
+        self.poll_interval = settings.ai_batch_poll_interval_seconds if poll_interval is None else poll_interval
+        self.timeout = settings.ai_batch_timeout_seconds if timeout is None else timeout
+
+    def write_requests(
+        self,
+        documents: Iterable[tuple[str, str, list[ExtractionRule]]],
+        glossary_metrics: dict[str, Optional[GlossaryMetric]],
+        path: Path,
+    ) -> tuple[list[BatchRequest], dict[str, str], dict[str, list[str]]]:
+        """Write the uncached chunk prompts of every (document, rule) pair to `path`.
+
+        `documents` yields (document ID, text, rules to extract). Returns all
+        requests, the responses already cached by custom_id, and the rule
+        IDs extracted per document.
+        """
+        extractor = self.ai_extractor
+        api = self.provider.api
+        model = extractor.provider_model(api)
+        requests: list[BatchRequest] = []
+        cached: dict[str, str] = {}
+        document_rules: dict[str, list[str]] = {}
+
+        with open(path, "w", encoding="utf-8") as f:
+            for document_id, text, rules in documents:
+                document_rules[document_id] = [rule.id for rule in rules]
+                if not rules:
+                    continue
+                prompts_by_rule = extractor.chunk_prompts(text, rules, glossary_metrics=glossary_metrics)
+                for rule in rules:
+                    for chunk_idx, (chunk, prompt) in enumerate(prompts_by_rule[rule.id]):
+                        request = BatchRequest(
+                            custom_id=f"req-{len(requests)}",
+                            document_id=document_id,
+                            rule=rule,
+                            chunk_idx=chunk_idx,
+                            chunk=chunk,
+                        )
+                        # Cached under the same keys as the direct calls to the provider
+                        request.cache_key, response = extractor.cache_lookup(api, model, prompt)
+                        if response is not None:
+                            cached[request.custom_id] = response
+                        else:
+                            line = self.provider.request_line(request.custom_id, extractor.request_body(prompt, api))
+                            f.write(json.dumps(line) + "\n")
+                        requests.append(request)
+        return requests, cached, document_rules
+
+    async def wait(self, batch_id: str) -> dict[str, str]:
+        """Poll a submitted batch until it completes; return its responses."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            status = await asyncio.to_thread(self.provider.status, batch_id)
+            if status == BATCH_COMPLETED:
+                return await asyncio.to_thread(self.provider.results, batch_id)
+            if status == BATCH_FAILED:
+                raise BatchError(f"Batch {batch_id} failed on {self.provider.name}")
+            if time.monotonic() >= deadline:
+                await asyncio.to_thread(self.provider.cancel, batch_id)
+                raise BatchError(f"Batch {batch_id} did not complete within {self.timeout}s")
+            await asyncio.sleep(self.poll_interval)
+
+    async def run(
+        self,
+        documents: Iterable[tuple[str, str, list[ExtractionRule]]],
+        glossary_metrics: Optional[dict[str, Optional[GlossaryMetric]]] = None,
+    ) -> dict[str, dict[str, list[AIExtractionResult]]]:
+        """AI results by document ID and rule ID for a whole job.
+
+        `documents` yields (document ID, text, rules to extract); it is
+        consumed in a worker thread, so it may parse documents lazily.
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        input_path = self.work_dir / f"requests-{uuid.uuid4().hex[:12]}.jsonl"
+        try:
+            requests, responses, document_rules = await asyncio.to_thread(
+                self.write_requests, documents, glossary_metrics or {}, input_path
+            )
+            pending = [request for request in requests if request.custom_id not in responses]
+            if pending:
+                batch_id = await asyncio.to_thread(self.provider.submit, input_path)
+                logger.info(
+                    f"Submitted batch {batch_id} to {self.provider.name}: {len(pending)} requests "
+                    f"({len(requests) - len(pending)} served from cache)"
+                )
+            else:
+                batch_id = None
+        finally:
+            input_path.unlink(missing_ok=True)
+
+        if batch_id is not None:
+            batch_responses = await self.wait(batch_id)
+            logger.info(f"Batch {batch_id} completed with {len(batch_responses)}/{len(pending)} responses")
+            for request in pending:
+                response = batch_responses.get(request.custom_id)
+                if response is not None:
+                    responses[request.custom_id] = response
+                    self.ai_extractor.cache_store(request.cache_key, response)
+
+        failed = [request for request in requests if request.custom_id not in responses]
+        direct_results = {}
+        if failed:
+            logger.warning(
+                f"{len(failed)} batch requests failed or are missing from the output; sending them directly"
+            )
+            direct_results = await self.extract_directly(failed, glossary_metrics or {})
+
+        results: dict[str, dict[str, list[AIExtractionResult]]] = {
+            document_id: {rule_id: [] for rule_id in rule_ids} for document_id, rule_ids in document_rules.items()
+        }
+        for request in requests:
+            response = responses.get(request.custom_id)
+            if response is None:
+                request_results = direct_results[request.custom_id]
+            else:
+                request_results = self.ai_extractor.parse_response(response, request.chunk, request.chunk_idx)
+            results[request.document_id][request.rule.id].extend(request_results)
+        return results
+
+    async def extract_directly(
+        self,
+        requests: list[BatchRequest],
+        glossary_metrics: dict[str, Optional[GlossaryMetric]],
+    ) -> dict[str, list[AIExtractionResult]]:
+        """AI results by custom_id for requests sent without the batch API."""
+        extractor = self.ai_extractor
+        model = extractor.provider_model(extractor.config.provider)
+        request_results = await asyncio.gather(*(
+            extractor.extract(
+                request.chunk,
+                request.rule,
+                glossary_metric=glossary_metrics.get(request.rule.id),
+                chunks=[TextChunk(request.chunk, count_tokens(request.chunk, model))]
+            )
+            for request in requests
+        ))
+        return {request.custom_id: results for request, results in zip(requests, request_results)}
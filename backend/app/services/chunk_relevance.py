@@ -0,0 +1,105 @@
+"""Relevance pre-filter that picks the chunks worth sending to the LLM."""
+
+import logging
+import re
+from collections import defaultdict
+from typing import Optional
+
+try:
+    from rapidfuzz import fuzz, process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    HAS_RAPIDFUZZ = False
+
+from app.models import ExtractionRule, GlossaryMetric
+from app.services.document_view import DocumentView
+from app.services.text_chunker import TextChunk
+
+logger = logging.getLogger(__name__)
+
+DIGIT = re.compile(r"\d")
+
+
+def rule_terms(rule: ExtractionRule, glossary_metric: Optional[GlossaryMetric] = None) -> list[str]:
+    """Lowercase names a rule's metric may appear under in a document."""
+    terms = [rule.target_metric_name]
+    for mapping in rule.semantic_mappings:
+        terms.append(mapping.canonical_term)
+        terms.extend(mapping.variations)
+    if glossary_metric:
+        terms.append(glossary_metric.canonical_name)
+        terms.extend(glossary_metric.semantic_variations)
+    return [term for term in dict.fromkeys(term.strip().lower() for term in terms if term) if term]
+
+
+class ChunkRelevanceFilter:
+    """Ranks the chunks of one document by how strongly they mention a metric.
+
+    A chunk scores the sum, over the metric's names, of the best match for
+    each name: 100 for an exact (case-insensitive) occurrence, otherwise the
+    best rapidfuzz ratio against token windows of the same word count, if at
+    least `score_cutoff`. Chunks without any digits cannot hold a value and
+    score 0. Only the `top_k` best chunks are kept, in document order; when
+    no chunk scores above 0 every chunk is kept, so nothing is lost on
+    documents that name the metric in an unexpected way. Each chunk's view
+    (lowercase text, token windows) is built once and shared by every rule
+    scored against the document.
+    """
+
+    def __init__(self, chunks: list[TextChunk], top_k: int, score_cutoff: float = 80):
+        self.chunks = chunks
+        self.top_k = top_k
+        self.score_cutoff = score_cutoff
+        self._views: dict[int, DocumentView] = {}
+        self._has_digits = [bool(DIGIT.search(chunk.text)) for chunk in chunks]
+
+    def _view(self, index: int) -> DocumentView:
+        if index not in self._views:
+            self._views[index] = DocumentView(self.chunks[index].text)
+        return self._views[index]
+
+    def score(self, index: int, terms: list[str]) -> float:
+        """Relevance of one chunk for a list of lowercase terms."""
+        if not self._has_digits[index]:
+            return 0.0
+
+        view = self._view(index)
+        total = 0.0
+        by_size: dict[int, list[str]] = defaultdict(list)
+        for term in terms:
+            if term in view.text_lower:
+                total += 100
+            elif HAS_RAPIDFUZZ:
+                by_size[len(term.split())].append(term)
+
+        for size, group in by_size.items():
+            windows, _ = view.token_windows(size)
+            if not windows:
+                continue
+            scores = process.cdist(
+                group, windows, scorer=fuzz.ratio, score_cutoff=self.score_cutoff, workers=-1
+            )
+            total += float(scores.max(axis=1).sum())
+        return total
+
+    def select(self, terms: list[str]) -> list[TextChunk]:
+        """Most relevant chunks in document order, or all of them on zero hits."""
+        chunks = self.chunks
+        if self.top_k <= 0 or len(chunks) <= self.top_k or not terms:
+            return chunks
+
+        scores = [self.score(idx, terms) for idx in range(len(chunks))]
+        ranked = sorted(
+            (idx for idx, score in enumerate(scores) if score > 0),
+            key=lambda idx: (-scores[idx], idx),
+        )
+        if not ranked:
+            logger.info(f"No chunk mentions any of {len(terms)} metric terms; sending all {len(chunks)} chunks")
+            return chunks
+
+        keep = sorted(ranked[:self.top_k])
+        logger.info(
+            f"Relevance filter kept {len(keep)}/{len(chunks)} chunks "
+            f"(scores {[round(scores[idx]) for idx in keep]})"
+        )
+        return [chunks[idx] for idx in keep]
@@ -3,22 +3,119 @@
 import io
 import re
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
-from dataclasses import dataclass
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Optional
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.services.parse_cache import get_parse_cache
 
 logger = logging.getLogger(__name__)
 
 
+class PageView(Sequence):
+    """Read-only list of page texts, sliced on demand from the document text."""
+
+    __slots__ = ("_text", "_spans")
+
+    def __init__(self, text: str, spans: list[tuple[int, int]]):
+        self._text = text
+        self._spans = spans
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._text[start:end] for start, end in self._spans[index]]
+        start, end = self._spans[index]
+        return self._text[start:end]
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PageView, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PageView({len(self)} pages)"
+
+
 @dataclass
 class ParsedDocument:
-    """Parsed document content."""
+    """Parsed document content.
+
+    `text` is the only copy of the document's characters; `pages` is a view
+    that slices each page out of it using `page_spans`.
+    """
     filename: str
     file_type: str
     text: str
-    pages: list[str]
+    # [start, end) character offsets of each page's text within `text`
+    page_spans: list[tuple[int, int]]
     tables: list[dict]
     metadata: dict
+    # Text block geometry (PDF only): page number, bbox, and [start, end)
+    # character offsets of the block within pages[page - 1]
+    blocks: list[dict] = field(default_factory=list)
+
+    @property
+    def pages(self) -> PageView:
+        """Page texts, sliced from `text` on access."""
+        return PageView(self.text, self.page_spans)
+
+    @classmethod
+    def from_pages(
+        cls,
+        filename: str,
+        file_type: str,
+        pages: Iterable[str],
+        tables: list[dict],
+        metadata: dict,
+        blocks: Optional[list[dict]] = None,
+        page_header: Optional[str] = None,
+    ) -> "ParsedDocument":
+        """Build a document from page texts joined by newlines into one buffer.
+
+        If page_header is given (formatted with the 1-based page `number`), it
+        is written before each page in `text` but is not part of the page.
+        """
+        parts = []
+        spans = []
+        offset = 0
+        for number, page_text in enumerate(pages, 1):
+            if parts:
+                parts.append("\n")
+                offset += 1
+            if page_header:
+                header = page_header.format(number=number)
+                parts.append(header)
+                offset += len(header)
+            parts.append(page_text)
+            spans.append((offset, offset + len(page_text)))
+            offset += len(page_text)
+
+        return cls(
+            filename=filename,
+            file_type=file_type,
+            text="".join(parts),
+            page_spans=spans,
+            tables=tables,
+            metadata=metadata,
+            blocks=blocks or [],
+        )
+
+
+@dataclass
+class ParsedPage:
+    """A single page (or sheet/slide) yielded by DocumentParser.iter_pages."""
+    number: int
+    text: str
+    tables: list[dict] = field(default_factory=list)
+    blocks: list[dict] = field(default_factory=list)
 
 
 class DocumentParser:
@@ -36,8 +133,75 @@ class DocumentParser:
         ".txt": "text",
     }
 
-    def parse(self, file_path: str | Path, content: Optional[bytes] = None) -> ParsedDocument:
-        """Parse a document and extract text content."""
+    # Bump whenever parser output changes so cached results are invalidated
+    PARSER_VERSION = "7"
+
+    def parse(
+        self,
+        file_path: str | Path,
+        content: Optional[bytes] = None,
+        use_cache: bool = True,
+        detect_tables: bool = False,
+    ) -> ParsedDocument:
+        """Parse a document and extract text content.
+
+        Table detection in PDFs is the most expensive step, so it only runs
+        when detect_tables is set; other formats always return their tables.
+        Results are served from the on-disk parse cache when the same content
+        was parsed before with the same parser version and options.
+        """
+        path = Path(file_path)
+        ext = path.suffix.lower()
+        file_type = self.SUPPORTED_TYPES.get(ext, "unknown")
+
+        if content is None:
+            with open(path, "rb") as f:
+                content = f.read()
+
+        cache = get_parse_cache() if use_cache and file_type != "unknown" else None
+        cache_key = None
+        if cache is not None:
+            # Table detection only changes PDF output
+            with_tables = detect_tables or file_type != "pdf"
+            options = self._cache_options(file_type)
+            cache_key = cache.make_key(content, self.PARSER_VERSION, file_type, with_tables, *options)
+            cached = cache.get(cache_key)
+            if cached is None and not with_tables:
+                # A parse that included tables also satisfies one that doesn't need them
+                cached = cache.get(cache.make_key(content, self.PARSER_VERSION, file_type, True, *options))
+            if cached is not None:
+                # Same bytes may have been uploaded under another name
+                cached.filename = path.name
+                return cached
+
+        doc = self._parse_content(path.name, file_type, ext, content, detect_tables)
+
+        if cache is not None and not doc.metadata.get("mock"):
+            cache.put(cache_key, doc)
+        return doc
+
+    @staticmethod
+    def _cache_options(file_type: str) -> tuple:
+        """Settings that change the parsed output of a file type, for the cache key."""
+        if file_type == "excel":
+            return (settings.excel_streaming, settings.excel_text_row_cap)
+        if file_type == "csv":
+            return (settings.csv_text_row_cap, settings.csv_chunk_rows)
+        return ()
+
+    def iter_pages(
+        self,
+        file_path: str | Path,
+        content: Optional[bytes] = None,
+        detect_tables: bool = False,
+    ) -> Iterator[ParsedPage]:
+        """Yield pages one at a time instead of building a full ParsedDocument.
+
+        PDFs are read page by page so only the current page's text and tables
+        are held in memory. Other formats are loaded whole by their libraries
+        anyway, so they are parsed normally and then yielded per page/sheet/slide.
+        Streamed pages bypass the parse cache.
+        """
         path = Path(file_path)
         ext = path.suffix.lower()
         file_type = self.SUPPORTED_TYPES.get(ext, "unknown")
@@ -47,21 +211,68 @@ class DocumentParser:
                 content = f.read()
 
         if file_type == "pdf":
-            return self._parse_pdf(path.name, content)
+            yield from self._iter_pdf_pages(path.name, content, detect_tables)
+            return
+
+        doc = self.parse(path, content, detect_tables=detect_tables)
+        for page_idx, page_text in enumerate(doc.pages):
+            yield ParsedPage(
+                number=page_idx + 1,
+                text=page_text,
+                tables=[
+                    table for table_idx, table in enumerate(doc.tables)
+                    if table_page_number(doc, table, table_idx) == page_idx + 1
+                ],
+            )
+
+    def _iter_pdf_pages(self, filename: str, content: bytes, detect_tables: bool) -> Iterator[ParsedPage]:
+        """Stream PDF pages from a single open fitz document."""
+        try:
+            import fitz  # PyMuPDF
+        except ImportError:
+            logger.warning("PyMuPDF not installed, using mock parser")
+            yield ParsedPage(number=1, text=self._mock_parse(filename, "pdf").text)
+            return
+
+        try:
+            doc = fitz.open(stream=content, filetype="pdf")
+        except Exception as e:
+            logger.error(f"Error opening PDF {filename}: {e}", exc_info=True)
+            raise ValueError(f"Failed to parse PDF: {str(e)}")
+
+        try:
+            logger.info(f"Streaming PDF: {filename} ({len(doc)} pages)")
+            for page_num, page in enumerate(doc):
+                page_text, blocks, tables = _extract_pdf_page(page, page_num, detect_tables)
+                yield ParsedPage(number=page_num + 1, text=page_text, tables=tables, blocks=blocks)
+        finally:
+            doc.close()
+
+    def _parse_content(
+        self,
+        filename: str,
+        file_type: str,
+        ext: str,
+        content: bytes,
+        detect_tables: bool = False,
+    ) -> ParsedDocument:
+        """Dispatch to the parser for the given file type."""
+        if file_type == "pdf":
+            return self._parse_pdf(filename, content, detect_tables)
         elif file_type == "excel":
-            return self._parse_excel(path.name, content)
+            return self._parse_excel(filename, content)
         elif file_type == "word":
-            return self._parse_word(path.name, content)
+            return self._parse_word(filename, content)
         elif file_type == "powerpoint":
-            return self._parse_powerpoint(path.name, content)
+            return self._parse_powerpoint(filename, content)
         elif file_type == "csv":
-            return self._parse_csv(path.name, content)
+            return self._parse_csv(filename, content)
         elif file_type == "text":
-            return self._parse_text(path.name, content)
+            return self._parse_text(filename, content)
         else:
             raise ValueError(f"Unsupported file type: {ext}")
 
-    def _parse_pdf(self, filename: str, content: bytes) -> ParsedDocument:
+    def _parse_pdf(self, filename: str, content: bytes, detect_tables: bool = False) -> ParsedDocument:
         """Parse PDF document using PyMuPDF."""
         try:
             import fitz  # PyMuPDF
@@ -71,81 +282,96 @@ class DocumentParser:
 
         try:
             doc = fitz.open(stream=content, filetype="pdf")
-            pages = []
+            page_count = len(doc)
+
+            logger.info(f"Parsing PDF: {filename} ({page_count} pages)")
+
+            workers = min(settings.pdf_parse_workers, page_count)
+            # Worker processes (e.g. the parse executor's) parse serially, so
+            # the page pool's bound holds for the whole server
+            in_worker = multiprocessing.parent_process() is not None
+            if workers > 1 and page_count >= settings.pdf_parallel_min_pages and not in_worker:
+                doc.close()
+                page_results = self._parse_pdf_parallel(content, page_count, workers, detect_tables)
+                parser_name = "PyMuPDF (parallel)"
+            else:
+                page_results = [
+                    _extract_pdf_page(page, page_num, detect_tables)
+                    for page_num, page in enumerate(doc)
+                ]
+                doc.close()
+                parser_name = "PyMuPDF"
+
+            blocks = []
             tables = []
-            full_text = []
-            
-            logger.info(f"Parsing PDF: {filename} ({len(doc)} pages)")
+            for _, page_blocks, page_tables in page_results:
+                blocks.extend(page_blocks)
+                tables.extend(page_tables)
 
-            for page_num, page in enumerate(doc):
-                # Extract text with layout preservation
-                text = page.get_text("text")
-                
-                # Also try blocks for better structure
-                blocks = page.get_text("blocks")
-                block_texts = []
-                for block in blocks:
-                    if block[6] == 0:  # Text block (not image)
-                        block_texts.append(block[4])
-                
-                # Use block text if available, otherwise use page text
-                page_text = "\n".join(block_texts) if block_texts else text
-                
-                pages.append(page_text)
-                full_text.append(f"--- Page {page_num + 1} ---\n{page_text}")
-                
-                logger.debug(f"Page {page_num + 1}: Extracted {len(page_text)} characters")
-
-                # Extract tables using PyMuPDF's table finder
-                try:
-                    tabs = page.find_tables()
-                    logger.info(f"Page {page_num + 1}: Found {len(tabs)} tables")
-                    
-                    for tab_idx, tab in enumerate(tabs):
-                        try:
-                            table_data = tab.extract()
-                            if table_data:
-                                tables.append({
-                                    "page": page_num + 1,
-                                    "table_index": tab_idx,
-                                    "data": table_data,
-                                    "bbox": list(tab.bbox) if hasattr(tab, 'bbox') else None
-                                })
-                                logger.debug(f"Page {page_num + 1}, Table {tab_idx}: {len(table_data)} rows")
-                        except Exception as e:
-                            logger.warning(f"Error extracting table {tab_idx} from page {page_num + 1}: {e}")
-                            continue
-                except Exception as e:
-                    logger.warning(f"Error finding tables on page {page_num + 1}: {e}")
-
-            doc.close()
-            
-            full_text_combined = "\n".join(full_text)
-            logger.info(f"PDF parsing complete: {len(full_text_combined)} total characters, {len(tables)} tables")
-            
-            # Log first 500 characters for debugging
-            preview = full_text_combined[:500].replace('\n', ' ')
-            logger.debug(f"Extracted text preview: {preview}...")
-
-            return ParsedDocument(
+            parsed = ParsedDocument.from_pages(
                 filename=filename,
                 file_type="pdf",
-                text=full_text_combined,
-                pages=pages,
+                pages=(page_text for page_text, _, _ in page_results),
                 tables=tables,
-                metadata={
-                    "page_count": len(pages),
-                    "table_count": len(tables),
-                    "total_characters": len(full_text_combined),
-                    "parser": "PyMuPDF"
-                }
+                blocks=blocks,
+                metadata={},
+                page_header="--- Page {number} ---\n",
             )
+            parsed.metadata.update({
+                "page_count": len(parsed.page_spans),
+                "table_count": len(tables),
+                "total_characters": len(parsed.text),
+                "tables_detected": detect_tables,
+                "parser": parser_name
+            })
+            logger.info(f"PDF parsing complete: {len(parsed.text)} total characters, {len(tables)} tables")
+            
+            # Log first 500 characters for debugging
+            preview = parsed.text[:500].replace('\n', ' ')
+            logger.debug(f"Extracted text preview: {preview}...")
+
+            return parsed
         except Exception as e:
             logger.error(f"Error parsing PDF {filename}: {e}", exc_info=True)
             raise ValueError(f"Failed to parse PDF: {str(e)}")
 
+    def _parse_pdf_parallel(
+        self,
+        content: bytes,
+        page_count: int,
+        workers: int,
+        detect_tables: bool = False,
+    ) -> list[tuple[str, list[dict], list[dict]]]:
+        """Parse page ranges in worker processes and merge them back in page order."""
+        # Split into contiguous ranges, a few per worker so slow pages don't stall one process
+        range_count = min(page_count, workers * 4)
+        step = -(-page_count // range_count)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+        logger.info(f"Parsing {page_count} pages in {len(ranges)} ranges across {workers} worker processes")
+
+        executor = get_pdf_page_pool()
+        futures = [
+            executor.submit(_parse_pdf_page_range, content, start, end, detect_tables)
+            for start, end in ranges
+        ]
+        page_results = []
+        # Futures are consumed in submission order, which keeps pages ordered
+        for future in futures:
+            page_results.extend(future.result())
+        return page_results
+
     def _parse_excel(self, filename: str, content: bytes) -> ParsedDocument:
         """Parse Excel document."""
+        # .xlsx files are zip archives; legacy .xls needs the pandas path
+        if settings.excel_streaming and content[:2] == b"PK":
+            try:
+                import openpyxl  # noqa: F401
+            except ImportError:
+                pass
+            else:
+                return self._parse_excel_streaming(filename, content)
+
         try:
             import pandas as pd
         except ImportError:
@@ -154,14 +380,12 @@ class DocumentParser:
         xlsx = pd.ExcelFile(io.BytesIO(content))
         pages = []
         tables = []
-        full_text = []
 
         for sheet_name in xlsx.sheet_names:
             df = pd.read_excel(xlsx, sheet_name=sheet_name)
             text = f"--- Sheet: {sheet_name} ---\n"
             text += df.to_string()
             pages.append(text)
-            full_text.append(text)
 
             tables.append({
                 "sheet": sheet_name,
@@ -169,15 +393,69 @@ class DocumentParser:
                 "data": df.values.tolist()
             })
 
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type="excel",
-            text="\n".join(full_text),
             pages=pages,
             tables=tables,
             metadata={"sheet_count": len(xlsx.sheet_names)}
         )
 
+    def _parse_excel_streaming(self, filename: str, content: bytes) -> ParsedDocument:
+        """Parse .xlsx with openpyxl in read-only mode, one row at a time.
+
+        Tables keep every row; the text form is tab-separated and capped at
+        settings.excel_text_row_cap rows per sheet.
+        """
+        import openpyxl
+
+        row_cap = settings.excel_text_row_cap
+        wb = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        pages = []
+        tables = []
+        truncated_sheets = []
+
+        try:
+            for ws in wb.worksheets:
+                lines = [f"--- Sheet: {ws.title} ---"]
+                headers = None
+                data = []
+
+                for row in ws.iter_rows(values_only=True):
+                    if all(cell is None for cell in row):
+                        continue
+                    if headers is None:
+                        headers = list(row)
+                    else:
+                        data.append(list(row))
+                    if len(data) <= row_cap:
+                        lines.append("\t".join(format_cell(cell) for cell in row))
+
+                if len(data) > row_cap:
+                    lines.append(f"... ({len(data) - row_cap} more rows)")
+                    truncated_sheets.append(ws.title)
+
+                pages.append("\n".join(lines))
+                tables.append({
+                    "sheet": ws.title,
+                    "headers": headers or [],
+                    "data": data
+                })
+        finally:
+            wb.close()
+
+        return ParsedDocument.from_pages(
+            filename=filename,
+            file_type="excel",
+            pages=pages,
+            tables=tables,
+            metadata={
+                "sheet_count": len(pages),
+                "parser": "openpyxl (read-only)",
+                "text_truncated_sheets": truncated_sheets
+            }
+        )
+
     def _parse_word(self, filename: str, content: bytes) -> ParsedDocument:
         """Parse Word document."""
         try:
@@ -195,10 +473,9 @@ class DocumentParser:
                 table_data.append([cell.text for cell in row.cells])
             tables.append({"data": table_data})
 
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type="word",
-            text="\n".join(paragraphs),
             pages=["\n".join(paragraphs)],
             tables=tables,
             metadata={"paragraph_count": len(paragraphs)}
@@ -214,7 +491,6 @@ class DocumentParser:
         prs = Presentation(io.BytesIO(content))
         pages = []
         tables = []
-        full_text = []
 
         for slide_num, slide in enumerate(prs.slides):
             slide_text = [f"--- Slide {slide_num + 1} ---"]
@@ -229,43 +505,70 @@ class DocumentParser:
 
             text = "\n".join(slide_text)
             pages.append(text)
-            full_text.append(text)
 
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type="powerpoint",
-            text="\n".join(full_text),
             pages=pages,
             tables=tables,
             metadata={"slide_count": len(prs.slides)}
         )
 
     def _parse_csv(self, filename: str, content: bytes) -> ParsedDocument:
-        """Parse CSV document."""
+        """Parse CSV document in chunks.
+
+        The table is stored column-oriented as one NumPy array per column, and
+        only the first settings.csv_text_row_cap rows are rendered into text.
+        """
         try:
+            import numpy as np
             import pandas as pd
         except ImportError:
             return self._mock_parse(filename, "csv")
 
-        df = pd.read_csv(io.BytesIO(content))
-        text = df.to_string()
+        row_cap = settings.csv_text_row_cap
+        headers = None
+        column_chunks: list[list] = []
+        sample_frames = []
+        sample_rows = 0
+        row_count = 0
+
+        for chunk in pd.read_csv(io.BytesIO(content), chunksize=settings.csv_chunk_rows):
+            if headers is None:
+                headers = chunk.columns.tolist()
+                column_chunks = [[] for _ in headers]
+            for col_idx in range(len(headers)):
+                column_chunks[col_idx].append(chunk.iloc[:, col_idx].to_numpy())
+            if sample_rows < row_cap:
+                sample_frames.append(chunk.iloc[:row_cap - sample_rows])
+                sample_rows += len(sample_frames[-1])
+            row_count += len(chunk)
+
+        if headers is None:
+            # Header-only or empty file
+            headers = pd.read_csv(io.BytesIO(content), nrows=0).columns.tolist()
+            columns = [np.array([], dtype=object) for _ in headers]
+            text = pd.DataFrame(columns=headers).to_string()
+        else:
+            columns = [np.concatenate(chunks) for chunks in column_chunks]
+            text = pd.concat(sample_frames).to_string()
+        if row_count > row_cap:
+            text += f"\n... ({row_count - row_cap} more rows)"
 
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type="csv",
-            text=text,
             pages=[text],
-            tables=[{"headers": df.columns.tolist(), "data": df.values.tolist()}],
-            metadata={"row_count": len(df)}
+            tables=[{"headers": headers, "columns": columns, "row_count": row_count}],
+            metadata={"row_count": row_count, "text_truncated": row_count > row_cap}
         )
 
     def _parse_text(self, filename: str, content: bytes) -> ParsedDocument:
         """Parse plain text document."""
         text = content.decode("utf-8", errors="ignore")
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type="text",
-            text=text,
             pages=[text],
             tables=[],
             metadata={}
@@ -273,11 +576,153 @@ class DocumentParser:
 
     def _mock_parse(self, filename: str, file_type: str) -> ParsedDocument:
         """Return mock data when parser libraries are not installed."""
-        return ParsedDocument(
+        return ParsedDocument.from_pages(
             filename=filename,
             file_type=file_type,
-            text=f"[Mock parsed content for {filename}]",
-            pages=["[Mock page content]"],
+            pages=[f"[Mock parsed content for {filename}]"],
             tables=[],
             metadata={"mock": True}
         )
+
+
+def table_rows(table: dict) -> list[list]:
+    """Return a parsed table's rows as plain Python lists.
+
+    Handles both the row-oriented layout ("data") and the column-oriented
+    NumPy layout ("columns") used for CSV files.
+    """
+    if "columns" in table:
+        columns = [column.tolist() for column in table["columns"]]
+        return [list(row) for row in zip(*columns)]
+    return table.get("data", [])
+
+
+def format_cell(value) -> str:
+    """Render a spreadsheet cell for the tab-separated text form."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def table_page_number(doc: ParsedDocument, table: dict, table_idx: int) -> int:
+    """Page (1-based) a parsed table belongs to, across the different parsers."""
+    if "page" in table:
+        return table["page"]
+    if "slide" in table:
+        return table["slide"]
+    if doc.file_type == "excel":
+        # Excel emits exactly one table per sheet, in sheet order
+        return table_idx + 1
+    return 1
+
+
+_pdf_page_pool: Optional[ProcessPoolExecutor] = None
+_pdf_page_pool_lock = threading.Lock()
+
+
+def get_pdf_page_pool() -> ProcessPoolExecutor:
+    """Get the shared worker pool for parallel PDF page parsing.
+
+    Started once with settings.pdf_parse_workers processes, which bounds page
+    parsing across all concurrent parses. Uses spawn rather than fork: parse()
+    is called from server threads.
+    """
+    global _pdf_page_pool
+    with _pdf_page_pool_lock:
+        if _pdf_page_pool is None:
+            _pdf_page_pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.pdf_parse_workers),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started PDF page pool with {settings.pdf_parse_workers} worker processes")
+        return _pdf_page_pool
+
+
+def shutdown_pdf_page_pool() -> None:
+    """Stop the PDF page pool's worker processes, if started."""
+    global _pdf_page_pool
+    with _pdf_page_pool_lock:
+        if _pdf_page_pool is not None:
+            _pdf_page_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_page_pool = None
+
+
+def _extract_pdf_page(page, page_num: int, detect_tables: bool = False) -> tuple[str, list[dict], list[dict]]:
+    """Extract text, text block geometry and (optionally) tables from a single PyMuPDF page."""
+    import fitz  # PyMuPDF
+
+    # Single pass: page text and block structure both come from one "dict"
+    # extraction (same flags as "blocks" mode, so images are skipped)
+    page_dict = page.get_text("dict", flags=fitz.TEXTFLAGS_BLOCKS)
+    block_texts = []
+    blocks = []
+    offset = 0
+    for block in page_dict["blocks"]:
+        if block["type"] != 0:  # Text block (not image)
+            continue
+        block_text = "".join(
+            "".join(span["text"] for span in line["spans"]) + "\n"
+            for line in block["lines"]
+        )
+        block_texts.append(block_text)
+        blocks.append({
+            "page": page_num + 1,
+            "bbox": list(block["bbox"]),
+            "start": offset,
+            "end": offset + len(block_text),
+        })
+        offset += len(block_text) + 1  # Blocks are joined with a newline
+
+    page_text = "\n".join(block_texts)
+    
+    logger.debug(f"Page {page_num + 1}: Extracted {len(page_text)} characters")
+
+    tables = []
+    if not detect_tables:
+        return page_text, blocks, tables
+
+    # Extract tables using PyMuPDF's table finder
+    try:
+        tabs = page.find_tables().tables
+        logger.info(f"Page {page_num + 1}: Found {len(tabs)} tables")
+        
+        for tab_idx, tab in enumerate(tabs):
+            try:
+                table_data = tab.extract()
+                if table_data:
+                    tables.append({
+                        "page": page_num + 1,
+                        "table_index": tab_idx,
+                        "data": table_data,
+                        "bbox": list(tab.bbox) if hasattr(tab, 'bbox') else None
+                    })
+                    logger.debug(f"Page {page_num + 1}, Table {tab_idx}: {len(table_data)} rows")
+            except Exception as e:
+                logger.warning(f"Error extracting table {tab_idx} from page {page_num + 1}: {e}")
+                continue
+    except Exception as e:
+        logger.warning(f"Error finding tables on page {page_num + 1}: {e}")
+
+    return page_text, blocks, tables
+
+
+def _parse_pdf_page_range(
+    content: bytes,
+    start: int,
+    end: int,
+    detect_tables: bool = False,
+) -> list[tuple[str, list[dict], list[dict]]]:
+    """Parse pages [start, end) of a PDF.
+
+    Module-level so it can run in a worker process; each call opens its own
+    fitz document from the raw bytes.
+    """
+    import fitz  # PyMuPDF
+
+    doc = fitz.open(stream=content, filetype="pdf")
+    try:
+        return [_extract_pdf_page(doc[page_num], page_num, detect_tables) for page_num in range(start, end)]
+    finally:
+        doc.close()
@@ -0,0 +1,318 @@
+"""Pre-tokenized view of a document shared by the rule-based strategies."""
+
+import re
+from bisect import bisect_right
+from functools import cached_property
+from typing import Optional, Union
+
+from app.services.document_parser import ParsedDocument, format_cell, table_page_number
+
+
+# Same boundaries as str.split() with no arguments
+TOKEN_PATTERN = re.compile(r"\S+")
+
+# Blank lines separating paragraphs
+PARAGRAPH_BREAK = re.compile(r"\n\n+")
+
+# Numeric value with optional scale suffix, shared by all strategies
+NUMBER_PATTERN = re.compile(r'\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million)?')
+
+
+class TableCells:
+    """Cell text of one parsed table; the header row, if any, is row 0.
+
+    Cells are formatted from the parsed table on access instead of being
+    copied: column-oriented tables (CSV) are read straight from their column
+    arrays, and lowercase text is built per column, only for the columns a
+    strategy searches.
+    """
+
+    def __init__(self, index: int, page: int, table: dict):
+        self.index = index
+        self.page = page
+        # Position on the page (PDF only)
+        self.bbox = table.get("bbox")
+        self._header = [format_cell(cell) for cell in table.get("headers") or []]
+        self._columns = table.get("columns")
+        self._data = table.get("data", []) if self._columns is None else None
+        self._columns_lower: dict[int, list[str]] = {}
+        self._term_cells: dict[str, list[tuple[int, int]]] = {}
+
+    @property
+    def has_header(self) -> bool:
+        """Whether row 0 is a parsed header row rather than data."""
+        return bool(self._header)
+
+    @property
+    def _offset(self) -> int:
+        return 1 if self._header else 0
+
+    def __len__(self) -> int:
+        if self._columns is not None:
+            body = len(self._columns[0]) if len(self._columns) else 0
+        else:
+            body = len(self._data)
+        return body + self._offset
+
+    @cached_property
+    def column_count(self) -> int:
+        if self._columns is not None:
+            return len(self._columns)
+        return max([len(self._header)] + [len(row) for row in self._data])
+
+    def row_len(self, r: int) -> int:
+        """Number of cells in row r."""
+        if r < self._offset:
+            return len(self._header)
+        if self._columns is not None:
+            return len(self._columns)
+        return len(self._data[r - self._offset])
+
+    def cell(self, r: int, c: int) -> str:
+        """Text of cell (r, c)."""
+        if r < self._offset:
+            return self._header[c]
+        if self._columns is not None:
+            value = self._columns[c][r - self._offset]
+            # NumPy scalars to plain Python values, as the text rendering does
+            return format_cell(value.item() if hasattr(value, "item") else value)
+        return format_cell(self._data[r - self._offset][c])
+
+    def row(self, r: int) -> list[str]:
+        """Text of every cell in row r."""
+        return [self.cell(r, c) for c in range(self.row_len(r))]
+
+    def column_lower(self, c: int) -> list[str]:
+        """Lowercase text of column c by row; "" where a row is too short."""
+        if c not in self._columns_lower:
+            self._columns_lower[c] = [
+                self.cell(r, c).lower() if c < self.row_len(r) else ""
+                for r in range(len(self))
+            ]
+        return self._columns_lower[c]
+
+    def cells_with(self, term: str) -> list[tuple[int, int]]:
+        """(row, column) of the cells containing a lowercase term, in row order."""
+        if term not in self._term_cells:
+            if not term:
+                found = [(r, c) for r in range(len(self)) for c in range(self.row_len(r))]
+            else:
+                found = sorted(
+                    (r, c)
+                    for c in range(self.column_count)
+                    for r, cell in enumerate(self.column_lower(c))
+                    if term in cell
+                )
+            self._term_cells[term] = found
+        return self._term_cells[term]
+
+
+class DocumentView:
+    """Text of one document with its lowercase form, tokens, lines and tables.
+
+    Everything is computed at most once per document, so strategies can
+    share offsets instead of re-lowercasing or re-splitting the text per
+    pattern. `text_lower` always has the same length as `text`, so offsets
+    found in one are valid in the other. Lines and paragraphs are indexed
+    lazily: numeric values per line/paragraph and line/paragraph numbers per
+    search term are looked up once and then served from memory.
+    """
+
+    def __init__(self, text: str, doc: Optional[ParsedDocument] = None):
+        self.text = text
+        self.doc = doc
+        self._windows: dict[int, tuple[list[str], list[tuple[int, int]]]] = {}
+        self._line_values: dict[int, Optional[tuple[str, Optional[str]]]] = {}
+        self._term_lines: dict[str, list[int]] = {}
+        self._paragraph_values: dict[int, list[tuple[str, str]]] = {}
+        self._term_paragraphs: dict[str, list[int]] = {}
+
+    @classmethod
+    def from_document(cls, doc: ParsedDocument) -> "DocumentView":
+        return cls(doc.text, doc)
+
+    @classmethod
+    def of(cls, text: Union[str, "DocumentView"]) -> "DocumentView":
+        """Wrap plain text in a view; views are returned as-is."""
+        return text if isinstance(text, DocumentView) else cls(text)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    @cached_property
+    def text_lower(self) -> str:
+        lowered = self.text.lower()
+        if len(lowered) != len(self.text):
+            # A few characters expand when lowercased (e.g. "İ"); keep those
+            # as-is so offsets stay aligned with the original text
+            lowered = "".join(
+                char.lower() if len(char.lower()) == 1 else char for char in self.text
+            )
+        return lowered
+
+    @cached_property
+    def token_spans(self) -> list[tuple[int, int]]:
+        """(start, end) of every whitespace-separated token."""
+        return [match.span() for match in TOKEN_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def tokens_lower(self) -> list[str]:
+        text_lower = self.text_lower
+        return [text_lower[start:end] for start, end in self.token_spans]
+
+    def token_windows(self, size: int) -> tuple[list[str], list[tuple[int, int]]]:
+        """Lowercase windows of `size` consecutive tokens and their spans.
+
+        Tokens in a window are joined by single spaces, so multi-word terms
+        can be compared regardless of the original whitespace.
+        """
+        if size not in self._windows:
+            tokens = self.tokens_lower
+            spans = self.token_spans
+            count = max(0, len(tokens) - size + 1)
+            if size == 1:
+                windows = list(tokens)
+            else:
+                windows = [" ".join(tokens[i:i + size]) for i in range(count)]
+            self._windows[size] = (
+                windows,
+                [(spans[i][0], spans[i + size - 1][1]) for i in range(count)],
+            )
+        return self._windows[size]
+
+    @cached_property
+    def line_starts(self) -> list[int]:
+        """Offset of the first character of every line."""
+        starts = [0]
+        find = self.text.find
+        pos = find("\n")
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+        return starts
+
+    @cached_property
+    def lines(self) -> list[str]:
+        """Lines of the text, as text.split("\\n")."""
+        return self.text.split("\n")
+
+    @cached_property
+    def lines_lower(self) -> list[str]:
+        return self.text_lower.split("\n")
+
+    def line_of(self, pos: int) -> int:
+        """Index of the line containing an offset."""
+        return bisect_right(self.line_starts, pos) - 1
+
+    def line_value(self, index: int) -> Optional[tuple[str, Optional[str]]]:
+        """First numeric (value, multiplier) on a line, or None."""
+        if index not in self._line_values:
+            match = NUMBER_PATTERN.search(self.lines[index])
+            self._line_values[index] = (match.group(1), match.group(2)) if match else None
+        return self._line_values[index]
+
+    def lines_with(self, term: str) -> list[int]:
+        """Indexes of the lines containing a lowercase term, in order."""
+        if term not in self._term_lines:
+            if not term:
+                found = list(range(len(self.line_starts)))
+            elif "\n" in term:
+                found = []
+            else:
+                found = []
+                text_lower = self.text_lower
+                starts = self.line_starts
+                pos = text_lower.find(term)
+                while pos != -1:
+                    line = bisect_right(starts, pos) - 1
+                    found.append(line)
+                    if line + 1 >= len(starts):
+                        break
+                    # Further hits on the same line add nothing
+                    pos = text_lower.find(term, starts[line + 1])
+            self._term_lines[term] = found
+        return self._term_lines[term]
+
+    @cached_property
+    def paragraph_spans(self) -> list[tuple[int, int]]:
+        """(start, end) of every paragraph, as re.split(r"\\n\\n+", text)."""
+        spans = []
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(self.text):
+            spans.append((start, match.start()))
+            start = match.end()
+        spans.append((start, len(self.text)))
+        return spans
+
+    def paragraph(self, index: int) -> str:
+        start, end = self.paragraph_spans[index]
+        return self.text[start:end]
+
+    def paragraph_values(self, index: int) -> list[tuple[str, str]]:
+        """All numeric (value, multiplier) pairs in a paragraph."""
+        if index not in self._paragraph_values:
+            self._paragraph_values[index] = NUMBER_PATTERN.findall(self.paragraph(index))
+        return self._paragraph_values[index]
+
+    def paragraphs_with(self, term: str) -> list[int]:
+        """Indexes of the paragraphs containing a lowercase term, in order."""
+        if term not in self._term_paragraphs:
+            spans = self.paragraph_spans
+            if not term:
+                found = list(range(len(spans)))
+            else:
+                found = []
+                text_lower = self.text_lower
+                starts = [start for start, _ in spans]
+                pos = text_lower.find(term)
+                while pos != -1:
+                    para = bisect_right(starts, pos) - 1
+                    if pos + len(term) > spans[para][1]:
+                        # Hit runs across a paragraph break
+                        pos = text_lower.find(term, pos + 1)
+                        continue
+                    found.append(para)
+                    if para + 1 >= len(spans):
+                        break
+                    # Further hits in the same paragraph add nothing
+                    pos = text_lower.find(term, starts[para + 1])
+            self._term_paragraphs[term] = found
+        return self._term_paragraphs[term]
+
+    @cached_property
+    def tables(self) -> list[TableCells]:
+        """Cell text of the document's parsed tables."""
+        if self.doc is None:
+            return []
+        tables = []
+        for table_idx, table in enumerate(self.doc.tables):
+            cells = TableCells(table_idx, table_page_number(self.doc, table, table_idx), table)
+            if len(cells):
+                tables.append(cells)
+        return tables
+
+    def table_text_spans(self, table: TableCells) -> list[tuple[int, int]]:
+        """[start, end) offsets of the text that renders a parsed table.
+
+        Spreadsheet and CSV pages are their table's rendering; in PDFs it is
+        the text blocks overlapping the table's bbox (the whole page if the
+        table has none). Word and PowerPoint tables are not part of the text.
+        """
+        doc = self.doc
+        if doc is None or not 0 < table.page <= len(doc.page_spans):
+            return []
+        page_start, page_end = doc.page_spans[table.page - 1]
+        if doc.file_type in ("excel", "csv"):
+            return [(page_start, page_end)]
+        if doc.file_type != "pdf":
+            return []
+        if not table.bbox:
+            return [(page_start, page_end)]
+        x0, y0, x1, y1 = table.bbox
+        return [
+            (page_start + block["start"], page_start + block["end"])
+            for block in doc.blocks
+            if block["page"] == table.page
+            and block["bbox"][0] < x1 and block["bbox"][2] > x0
+            and block["bbox"][1] < y1 and block["bbox"][3] > y0
+        ]
@@ -1,8 +1,12 @@
 """Main extraction orchestration service."""
 
+import os
 import uuid
+import asyncio
 import logging
+import threading
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 
 from app.models import (
@@ -10,13 +14,17 @@ from app.models import (
     ExtractionJob,
     ExtractionResult,
     ExtractionMethod,
+    PatternType,
     ResultStatus,
     AIConfig,
     FactMetric,
 )
 from app.services.document_parser import DocumentParser, ParsedDocument
-from app.services.rule_extractor import RuleBasedExtractor
-from app.services.ai_extractor import AIExtractor, MockAIExtractor
+from app.services.document_view import DocumentView
+from app.services.rule_extractor import MatchResult, RuleBasedExtractor
+from app.services.ai_extractor import AIExtractionResult, AIExtractor, MockAIExtractor
+from app.services.text_chunker import TextChunk
+from app.services.batch_extraction import BatchExtractionRunner, BatchProvider
 from app.services.glossary_loader import get_glossary_loader
 from app.services.glossary_matcher import GlossaryMatcher
 from app.services.data_storage import get_data_storage
@@ -37,6 +45,8 @@ class ExtractionService:
         self.glossary_loader.load_all()  # Ensure glossary is loaded
         self.glossary_matcher = GlossaryMatcher(self.glossary_loader)
         self.data_storage = get_data_storage()
+        # Fact saves read and rewrite shared storage; rules run concurrently
+        self._save_lock = threading.Lock()
         
         # Initialize AI config with defaults from settings if not provided
         if ai_config is None:
@@ -163,7 +173,7 @@ class ExtractionService:
             started_at=datetime.utcnow()
         )
 
-    def process_document(
+    async def process_document(
         self,
         file_path: str,
         file_content: Optional[bytes],
@@ -171,17 +181,35 @@ class ExtractionService:
         method: ExtractionMethod,
         document_id: str,
         job_id: str,
-        preview_only: bool = False
+        preview_only: bool = False,
+        doc: Optional[ParsedDocument] = None,
+        ai_results: Optional[dict[str, list[AIExtractionResult]]] = None
     ) -> list[ExtractionResult]:
-        """Process a single document and extract values."""
+        """Process a single document and extract values.
+
+        Pass an already parsed `doc` (e.g. from the parse executor) to skip parsing,
+        and `ai_results` by rule ID (e.g. from a batch job) to skip AI requests.
+        Rules are extracted concurrently; CPU-bound parsing and rule matching
+        run in a thread so the event loop keeps serving other requests while
+        AI calls are in flight. Large PDFs are streamed page by page instead
+        of being parsed whole (see _process_streamed).
+        """
         logger.info(f"Processing document: {file_path} with method: {method.value}")
         logger.info(f"Applying {len(rules)} extraction rules")
-        
+
+        if doc is None and self._should_stream(file_path, file_content):
+            return await self._process_streamed(
+                file_path, file_content, rules, method, document_id, job_id, preview_only, ai_results
+            )
+
         results = []
 
         # Parse document
-        logger.info("Step 1: Parsing document...")
-        doc = self.parser.parse(file_path, file_content)
+        if doc is None:
+            logger.info("Step 1: Parsing document...")
+            doc = await asyncio.to_thread(
+                self.parser.parse, file_path, file_content, detect_tables=self.rules_need_tables(rules)
+            )
         
         # Log extracted data for debugging
         logger.info(f"Document parsed: {doc.filename} ({doc.file_type})")
@@ -199,25 +227,162 @@ class ExtractionService:
 
         # Apply extraction rules
         logger.info("Step 2: Applying extraction rules...")
-        for rule_idx, rule in enumerate(rules, 1):
-            logger.info(f"Rule {rule_idx}/{len(rules)}: {rule.name} (ID: {rule.id})")
-            rule_results = self._extract_with_rule(doc, rule, method, document_id, job_id, preview_only)
+        scanned_matches = {}
+        if method in [ExtractionMethod.RULE_BASED, ExtractionMethod.HYBRID]:
+            # One pass over the document for the literal terms of every rule
+            scanned_matches = await asyncio.to_thread(
+                self.rule_extractor.extract_many, DocumentView.from_document(doc), rules
+            )
+
+        # Only rules whose rule-based results leave a gap go to the AI
+        ai_rules = [rule for rule in rules if self._needs_ai(method, scanned_matches.get(rule.id))]
+        batched_ai_results = ai_results or {}
+        if ai_results is None and self.ai_config.batch_metrics and ai_rules:
+            # One AI request per chunk for all rules instead of one per rule
+            logger.info(f"🤖 Starting batched AI extraction for {len(ai_rules)} rules")
+            try:
+                batched_ai_results = await self.ai_extractor.extract_batch(
+                    doc.text,
+                    ai_rules,
+                    glossary_metrics={rule.id: self.glossary_loader.get_metric(rule.target_metric_id) for rule in ai_rules}
+                )
+            except Exception as e:
+                logger.warning(f"Batched AI extraction failed, falling back to per-rule prompts: {e}")
+
+        ai_chunks = {}
+        per_rule_ai = [rule for rule in ai_rules if rule.id not in batched_ai_results]
+        if per_rule_ai:
+            # Chunk and score the document once for every rule, off the event loop
+            ai_chunks = await asyncio.to_thread(
+                self.ai_extractor.prepare_chunks,
+                doc.text,
+                per_rule_ai,
+                glossary_metrics={rule.id: self.glossary_loader.get_metric(rule.target_metric_id) for rule in per_rule_ai}
+            )
+
+        all_rule_results = await asyncio.gather(*(
+            self._extract_with_rule(
+                doc, rule, method, document_id, job_id, preview_only,
+                rule_matches=scanned_matches.get(rule.id),
+                ai_results=batched_ai_results.get(rule.id),
+                ai_chunks=ai_chunks.get(rule.id)
+            )
+            for rule in rules
+        ))
+        for rule, rule_results in zip(rules, all_rule_results):
             logger.info(f"Rule {rule.name}: Found {len(rule_results)} results")
             results.extend(rule_results)
 
         logger.info(f"Extraction complete: {len(results)} total results")
         return results
 
-    def _extract_with_rule(
+    def _should_stream(self, file_path: str, file_content: Optional[bytes]) -> bool:
+        """Whether a document is a PDF of at least settings.pdf_stream_min_bytes."""
+        if DocumentParser.SUPPORTED_TYPES.get(Path(file_path).suffix.lower()) != "pdf":
+            return False
+        try:
+            size = len(file_content) if file_content is not None else os.path.getsize(file_path)
+        except OSError:
+            return False
+        return size >= settings.pdf_stream_min_bytes
+
+    async def _process_streamed(
+        self,
+        file_path: str,
+        file_content: Optional[bytes],
+        rules: list[ExtractionRule],
+        method: ExtractionMethod,
+        document_id: str,
+        job_id: str,
+        preview_only: bool = False,
+        ai_results: Optional[dict[str, list[AIExtractionResult]]] = None
+    ) -> list[ExtractionResult]:
+        """Process a large document from DocumentParser.iter_pages.
+
+        No ParsedDocument is built: pages are read once for the rule-based
+        pass and, if any rule needs AI, once more while AI chunks are sent,
+        so only a page (rules) or a window of chunks (AI) is held at a time.
+        AI prompts are per rule; relevance filtering and batched prompts need
+        the whole text and are skipped.
+        """
+        logger.info(f"Streaming document page by page: {file_path}")
+
+        scanned_matches = {}
+        if method in [ExtractionMethod.RULE_BASED, ExtractionMethod.HYBRID]:
+            pages = self.parser.iter_pages(file_path, file_content, detect_tables=self.rules_need_tables(rules))
+            scanned_matches = await asyncio.to_thread(self.rule_extractor.extract_pages, pages, rules)
+
+        ai_results = dict(ai_results or {})
+        ai_rules = [
+            rule for rule in rules
+            if rule.id not in ai_results and self._needs_ai(method, scanned_matches.get(rule.id))
+        ]
+        if ai_rules:
+            logger.info(f"🤖 Starting streamed AI extraction for {len(ai_rules)} rules")
+            ai_results.update(await self.ai_extractor.extract_pages(
+                self.parser.iter_pages(file_path, file_content),
+                ai_rules,
+                glossary_metrics={rule.id: self.glossary_loader.get_metric(rule.target_metric_id) for rule in ai_rules}
+            ))
+
+        # Carries the name and type _extract_with_rule reports; no text is
+        # needed since matches and AI results are passed in for every rule
+        doc = ParsedDocument.from_pages(
+            filename=Path(file_path).name,
+            file_type="pdf",
+            pages=[],
+            tables=[],
+            metadata={"streamed": True}
+        )
+        all_rule_results = await asyncio.gather(*(
+            self._extract_with_rule(
+                doc, rule, method, document_id, job_id, preview_only,
+                rule_matches=scanned_matches.get(rule.id),
+                ai_results=ai_results.get(rule.id, [])
+            )
+            for rule in rules
+        ))
+        results = [result for rule_results in all_rule_results for result in rule_results]
+        logger.info(f"Extraction complete: {len(results)} total results")
+        return results
+
+    def rules_need_tables(self, rules: list[ExtractionRule]) -> bool:
+        """Whether any rule uses patterns that read structured tables."""
+        return any(
+            pattern.type in (PatternType.TABLE_HEADER, PatternType.TABLE_CELL)
+            for rule in rules
+            for pattern in rule.patterns
+        )
+
+    @staticmethod
+    def _needs_ai(method: ExtractionMethod, rule_matches: Optional[list[MatchResult]]) -> bool:
+        """Whether a rule goes to the AI: always in AI mode, and in HYBRID mode
+        when rule-based extraction found nothing with confidence of at least 0.8."""
+        if method == ExtractionMethod.AI:
+            return True
+        if method != ExtractionMethod.HYBRID:
+            return False
+        return not rule_matches or max(match.confidence for match in rule_matches) < 0.8
+
+    async def _extract_with_rule(
         self,
         doc: ParsedDocument,
         rule: ExtractionRule,
         method: ExtractionMethod,
         document_id: str,
         job_id: str,
-        preview_only: bool = False
+        preview_only: bool = False,
+        rule_matches: Optional[list[MatchResult]] = None,
+        ai_results: Optional[list[AIExtractionResult]] = None,
+        ai_chunks: Optional[list[TextChunk]] = None
     ) -> list[ExtractionResult]:
-        """Extract using a single rule."""
+        """Extract using a single rule.
+
+        `rule_matches` are pre-computed rule-based matches from extract_many(),
+        `ai_results` pre-computed AI results from a batched extract_batch(),
+        `ai_chunks` the rule's chunks from AIExtractor.prepare_chunks().
+        """
+        logger.info(f"Rule: {rule.name} (ID: {rule.id})")
         rule_results = []  # All results from this rule
         best_result = None
         best_confidence = 0.0
@@ -231,7 +396,8 @@ class ExtractionService:
         # Try rule-based extraction
         if use_rules:
             logger.debug(f"Applying rule-based extraction for: {rule.name}")
-            rule_matches = self.rule_extractor.extract(doc.text, rule)
+            if rule_matches is None:
+                rule_matches = self.rule_extractor.extract(doc.text, rule)
             logger.debug(f"Rule-based extraction found {len(rule_matches)} matches")
             
             for match_idx, match in enumerate(rule_matches):
@@ -255,19 +421,14 @@ class ExtractionService:
                         dimensions={}
                     )
                     rule_results.append(rule_result)
-                    if match.confidence > best_confidence:
-                        best_confidence = match.confidence
-                        best_result = rule_result
+                    best_result = rule_result
                     logger.info(f"Rule-based result: {match.value} (confidence: {match.confidence:.2f})")
 
         # Try AI extraction if enabled
         if use_ai:
             # In HYBRID mode, use AI if no results or low confidence
             # In AI mode, always use AI
-            should_use_ai = (
-                method == ExtractionMethod.AI or 
-                (method == ExtractionMethod.HYBRID and (best_result is None or best_confidence < 0.8))
-            )
+            should_use_ai = self._needs_ai(method, rule_matches)
             
             if should_use_ai:
                 logger.info(f"🤖 Starting AI extraction for rule: {rule.name} (ID: {rule.id})")
@@ -278,7 +439,10 @@ class ExtractionService:
                     glossary_metric = self.glossary_loader.get_metric(rule.target_metric_id)
                     if glossary_metric:
                         logger.info(f"   Glossary metric found: {glossary_metric.canonical_name} (Domain: {glossary_metric.domain.value})")
-                    ai_results = self.ai_extractor.extract_sync(doc.text, rule, glossary_metric=glossary_metric)
+                    if ai_results is None:
+                        ai_results = await self.ai_extractor.extract(
+                            doc.text, rule, glossary_metric=glossary_metric, chunks=ai_chunks
+                        )
                     logger.info(f"📊 AI extraction found {len(ai_results)} results")
                     
                     # Process ALL AI results, not just the best one
@@ -427,8 +591,8 @@ class ExtractionService:
                                 notes=result.notes
                             )
                             
-                            # Save fact
-                            self.data_storage.save_extracted_fact(fact)
+                            # Save fact (blocking storage write, off the event loop)
+                            await asyncio.to_thread(self._save_fact, fact)
                             logger.info(f"   ✅ Saved fact: {result.normalized_value} (confidence: {result.confidence:.2f}, domain: {glossary_metric.domain.value})")
                         except Exception as e:
                             logger.warning(f"Failed to save fact for result {result.id}: {e}")
@@ -437,13 +601,25 @@ class ExtractionService:
 
         return rule_results
 
-    def run_job(
+    def _save_fact(self, fact: FactMetric) -> None:
+        """Save a fact, one at a time across concurrently extracted rules."""
+        with self._save_lock:
+            self.data_storage.save_extracted_fact(fact)
+
+    async def run_job(
         self,
         job: ExtractionJob,
         documents: dict[str, tuple[str, Optional[bytes]]],  # id -> (path, content)
-        rules: list[ExtractionRule]
+        rules: list[ExtractionRule],
+        batch_provider: Optional[BatchProvider] = None
     ) -> ExtractionJob:
-        """Run a complete extraction job."""
+        """Run a complete extraction job.
+
+        With a `batch_provider`, all AI prompts of the job are submitted as
+        one provider batch (cheaper, but may take hours) instead of being sent
+        per chunk; the job falls back to direct requests if the batch fails.
+        Documents given as (path, None) are read from disk when needed.
+        """
         job.status = "processing"
         job.started_at = datetime.utcnow()
         all_results = []
@@ -451,6 +627,10 @@ class ExtractionService:
 
         total_docs = len(job.document_ids)
 
+        batch_results: dict[str, dict[str, list[AIExtractionResult]]] = {}
+        if batch_provider is not None and job.method in [ExtractionMethod.AI, ExtractionMethod.HYBRID]:
+            batch_results = await self._run_batch_ai(job, documents, rules, batch_provider, errors)
+
         for idx, doc_id in enumerate(job.document_ids):
             try:
                 if doc_id not in documents:
@@ -461,13 +641,14 @@ class ExtractionService:
                     continue
 
                 file_path, content = documents[doc_id]
-                doc_results = self.process_document(
+                doc_results = await self.process_document(
                     file_path=file_path,
                     file_content=content,
                     rules=rules,
                     method=job.method,
                     document_id=doc_id,
-                    job_id=job.id
+                    job_id=job.id,
+                    ai_results=batch_results.get(doc_id)
                 )
                 all_results.extend(doc_results)
 
@@ -486,3 +667,51 @@ class ExtractionService:
         job.completed_at = datetime.utcnow()
 
         return job
+
+    async def _run_batch_ai(
+        self,
+        job: ExtractionJob,
+        documents: dict[str, tuple[str, Optional[bytes]]],
+        rules: list[ExtractionRule],
+        batch_provider: BatchProvider,
+        errors: list[dict]
+    ) -> dict[str, dict[str, list[AIExtractionResult]]]:
+        """Extract a job's AI results through one provider batch.
+
+        Documents are parsed one at a time while the batch is written and
+        only their text is passed on; process_document parses them again
+        from the parse cache afterwards. In HYBRID mode only the rules whose
+        rule-based results need AI are batched. Returns AI results by
+        document and rule ID; they are empty if the batch fails, so the job
+        falls back to direct AI requests.
+        """
+        detect_tables = self.rules_need_tables(rules)
+
+        def batch_documents():
+            for doc_id in job.document_ids:
+                if doc_id not in documents:
+                    continue
+                file_path, content = documents[doc_id]
+                try:
+                    doc = self.parser.parse(file_path, content, detect_tables=detect_tables)
+                except Exception as e:
+                    # Reported when the document is processed
+                    logger.warning(f"Failed to parse {file_path} for batch extraction: {e}")
+                    continue
+                scanned_matches = {}
+                if job.method == ExtractionMethod.HYBRID:
+                    scanned_matches = self.rule_extractor.extract_many(DocumentView.from_document(doc), rules)
+                yield doc_id, doc.text, [
+                    rule for rule in rules if self._needs_ai(job.method, scanned_matches.get(rule.id))
+                ]
+
+        runner = BatchExtractionRunner(self.ai_extractor, batch_provider)
+        try:
+            return await runner.run(
+                batch_documents(),
+                {rule.id: self.glossary_loader.get_metric(rule.target_metric_id) for rule in rules}
+            )
+        except Exception as e:
+            logger.warning(f"Batch AI extraction failed, falling back to direct requests: {e}")
+            errors.append({"document_id": None, "message": f"Batch AI extraction failed: {e}"})
+            return {}
@@ -0,0 +1,190 @@
+"""Persistent cache of LLM responses keyed by prompt hash."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.db.database import DB_DIR
+
+logger = logging.getLogger(__name__)
+
+# Hits queue their LRU touch; queued touches are written in one transaction
+# once this many are pending, or together with the next put()
+TOUCH_FLUSH_THRESHOLD = 64
+
+
+class LLMResponseCache:
+    """SQLite store of LLM responses.
+
+    Keys are SHA-256 hashes of everything that determines a response
+    (provider, model, sampling parameters and the full prompt), so re-running
+    an extraction with the same document and rules is served locally. Entries
+    expire after `ttl_seconds`; once the stored responses exceed `max_bytes`
+    the least recently used ones are evicted. A hit only reads: its access
+    time is queued and written in batches, so lookups on the event loop do
+    not commit to SQLite.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int, max_bytes: int):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed ON llm_responses (accessed_at)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+    ) -> str:
+        """Build a cache key from the request parameters and prompt."""
+        digest = hashlib.sha256()
+        for part in (provider, model, temperature, max_tokens, system_prompt or "", prompt):
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[2] > self.ttl_seconds:
+                self._touched.pop(key, None)
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self._total_bytes -= row[1]
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_FLUSH_THRESHOLD:
+                self._flush_touches()
+                self._conn.commit()
+            self.hits += 1
+
+        logger.info(f"LLM cache hit ({key[:12]})")
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response and evict old entries if over budget."""
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            previous = self._conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+            self._conn.commit()
+
+    def _flush_touches(self) -> None:
+        """Write queued access times; the caller holds the lock and commits."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE llm_responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under budget."""
+        self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()[0]
+
+        excess = self._total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} LLM cache entries")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            total_bytes = self._total_bytes
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Get the global LLM response cache, or None when caching is disabled."""
+    global _llm_cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache(
+            DB_DIR / "llm_cache.db",
+            settings.llm_cache_ttl_seconds,
+            settings.llm_cache_max_bytes,
+        )
+    return _llm_cache
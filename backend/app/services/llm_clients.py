@@ -0,0 +1,154 @@
+"""Shared, connection-pooled OpenAI and Anthropic clients."""
+
+import asyncio
+import importlib
+import importlib.util
+import logging
+import threading
+import weakref
+from typing import Any, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+HAS_H2 = importlib.util.find_spec("h2") is not None
+
+API_KEYS = {
+    "openai": ("openai_api_key", "OPENAI_API_KEY"),
+    "anthropic": ("anthropic_api_key", "ANTHROPIC_API_KEY"),
+}
+
+
+def _import_sdk(provider: str):
+    if provider not in API_KEYS:
+        raise ValueError(f"Unsupported AI provider: {provider}")
+    try:
+        return importlib.import_module(provider)
+    except ImportError:
+        raise ImportError(f"{provider} package not installed")
+
+
+def _api_key(provider: str) -> str:
+    setting, env_name = API_KEYS[provider]
+    api_key = getattr(settings, setting)
+    if not api_key:
+        raise ValueError(f"{env_name} not configured. Please set it in .env file.")
+    return api_key
+
+
+class LLMClientRegistry:
+    """One sync and one async client per provider, shared by every service.
+
+    Clients are built on the SDK's own httpx client class with bounded
+    connection pools, keep-alive, explicit timeouts and the SDK's retry with
+    exponential backoff, so connections stay warm across requests and the
+    number of open connections is capped process-wide. HTTP/2 is used when
+    the `h2` package is installed. Async clients are kept per event loop,
+    since their connection pools cannot be shared between loops.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: dict[str, Any] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _http_options(self) -> dict:
+        """Pool, keep-alive and timeout options for the SDK's httpx client."""
+        options = {
+            "limits": httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+            ),
+            "timeout": httpx.Timeout(
+                settings.llm_read_timeout_seconds,
+                connect=settings.llm_connect_timeout_seconds,
+            ),
+        }
+        if settings.llm_http2 and HAS_H2:
+            options["http2"] = True
+        return options
+
+    def _build(self, provider: str, is_async: bool):
+        sdk = _import_sdk(provider)
+        api_key = _api_key(provider)
+        options = self._http_options()
+
+        if is_async:
+            http_client = sdk.DefaultAsyncHttpxClient(**options)
+            client_cls = sdk.AsyncOpenAI if provider == "openai" else sdk.AsyncAnthropic
+        else:
+            http_client = sdk.DefaultHttpxClient(**options)
+            client_cls = sdk.OpenAI if provider == "openai" else sdk.Anthropic
+
+        logger.info(
+            f"Created shared {'async ' if is_async else ''}{provider} client "
+            f"(max {settings.llm_max_connections} connections, http2={options.get('http2', False)})"
+        )
+        return client_cls(
+            api_key=api_key,
+            http_client=http_client,
+            timeout=options["timeout"],
+            # Retries go through the LLM scheduler so they count against the rate limits
+            max_retries=0,
+        )
+
+    def get(self, provider: str):
+        """Shared sync client for a provider ("openai" or "anthropic")."""
+        with self._lock:
+            if provider not in self._clients:
+                self._clients[provider] = self._build(provider, is_async=False)
+            return self._clients[provider]
+
+    def get_async(self, provider: str):
+        """Shared async client for a provider on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            if provider not in clients:
+                clients[provider] = self._build(provider, is_async=True)
+            return clients[provider]
+
+    def openai(self):
+        return self.get("openai")
+
+    def anthropic(self):
+        return self.get("anthropic")
+
+    def async_openai(self):
+        return self.get_async("openai")
+
+    def async_anthropic(self):
+        return self.get_async("anthropic")
+
+    def close(self) -> None:
+        """Close the sync clients' connection pools."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        """Close the connection pools of every client used by the running loop, and the sync ones."""
+        with self._lock:
+            clients = list(self._async_clients.pop(asyncio.get_running_loop(), {}).values())
+        for client in clients:
+            await client.close()
+        self.close()
+
+
+_llm_clients: Optional[LLMClientRegistry] = None
+
+
+def get_llm_clients() -> LLMClientRegistry:
+    """Get the global LLM client registry."""
+    global _llm_clients
+    if _llm_clients is None:
+        _llm_clients = LLMClientRegistry()
+    return _llm_clients
@@ -0,0 +1,349 @@
+"""Process-wide rate limiting of LLM requests with priority classes."""
+
+import asyncio
+import itertools
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.services.text_chunker import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# How often waiters that are not first in line re-check their turn
+POLL_INTERVAL_SECONDS = 0.05
+
+# Tokens of chat framing added to every request estimate
+MESSAGE_OVERHEAD_TOKENS = 50
+
+# Backoff between retried attempts, as the provider SDKs do it
+RETRY_INITIAL_DELAY_SECONDS = 0.5
+RETRY_MAX_DELAY_SECONDS = 8.0
+# Upper bound on a server-sent Retry-After delay
+RETRY_AFTER_MAX_SECONDS = 60.0
+
+
+class Priority(IntEnum):
+    """Scheduling classes; lower values are served first."""
+    INTERACTIVE = 0  # Document extraction
+    WEBHOOK = 1  # n8n ingestion
+    BACKGROUND = 2  # Metric discovery and other batch work
+
+
+class TokenBucket:
+    """Budget of `per_minute` units refilled continuously; 0 means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (amounts are capped at capacity)."""
+        if self.unlimited:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass(order=True)
+class _Ticket:
+    priority: int
+    seq: int
+    provider: str = field(compare=False)
+    tokens: int = field(compare=False)
+
+
+class LLMScheduler:
+    """Requests-per-minute and tokens-per-minute budgets shared by all LLM callers.
+
+    Every call site reserves one request and its estimated tokens (prompt
+    plus max response tokens) before calling a provider, from sync threads
+    or the event loop alike. Each provider has its own wait queue, served
+    strictly by priority class and then in arrival order, so interactive
+    extraction goes ahead of webhook and background traffic once a budget
+    runs low, and an exhausted provider never holds up another. Unused
+    reserved tokens are returned when the response reports its actual usage,
+    and the whole reservation when the request fails.
+
+    call() and call_async() wrap that protocol around a provider request and
+    retry transient errors themselves (the shared clients have SDK retries
+    disabled), so every attempt is counted against the budgets.
+
+    The blocking acquire() must not be called on an event loop thread: it
+    would stall the coroutines queued ahead of it. Run sync call sites in a
+    worker thread (asyncio.to_thread) or use acquire_async().
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._cond = threading.Condition()
+        self._buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+        self._waiting: dict[str, list[_Ticket]] = {}
+        self._seq = itertools.count()
+        self.granted = 0
+        self.retried = 0
+        self.waited_seconds = 0.0
+
+    def _provider_buckets(self, provider: str) -> tuple[TokenBucket, TokenBucket]:
+        if provider not in self._buckets:
+            self._buckets[provider] = (
+                TokenBucket(self.requests_per_minute),
+                TokenBucket(self.tokens_per_minute),
+            )
+        return self._buckets[provider]
+
+    def _try_grant(self, ticket: _Ticket) -> float:
+        """Grant the ticket if it is next in line and within budget.
+
+        Returns 0 when granted, otherwise how long to wait before retrying.
+        Must be called with the condition held.
+        """
+        if min(self._waiting[ticket.provider]) is not ticket:
+            return POLL_INTERVAL_SECONDS
+
+        now = time.monotonic()
+        requests, tokens = self._provider_buckets(ticket.provider)
+        requests.refill(now)
+        tokens.refill(now)
+        wait = max(requests.wait_time(1), tokens.wait_time(ticket.tokens))
+        if wait > 0:
+            return wait
+
+        requests.take(1)
+        tokens.take(ticket.tokens)
+        self._waiting[ticket.provider].remove(ticket)
+        self.granted += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _enqueue(self, provider: str, tokens: int, priority: Priority) -> _Ticket:
+        ticket = _Ticket(int(priority), next(self._seq), provider, tokens)
+        self._waiting.setdefault(provider, []).append(ticket)
+        return ticket
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        waiting = self._waiting.get(ticket.provider, [])
+        if ticket in waiting:
+            waiting.remove(ticket)
+            self._cond.notify_all()
+
+    def _log_wait(self, ticket: _Ticket, started: float) -> None:
+        waited = time.monotonic() - started
+        self.waited_seconds += waited
+        if waited >= 1:
+            logger.info(
+                f"Waited {waited:.1f}s for {ticket.provider} rate limit "
+                f"({Priority(ticket.priority).name.lower()}, {ticket.tokens} tokens)"
+            )
+
+    def acquire(self, provider: str, tokens: int, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Block the calling thread until a request of `tokens` tokens may be sent."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                "LLMScheduler.acquire() called on an event loop thread; "
+                "use acquire_async() or run the caller with asyncio.to_thread()"
+            )
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(provider, tokens, priority)
+            try:
+                while True:
+                    wait = self._try_grant(ticket)
+                    if wait == 0:
+                        break
+                    self._cond.wait(wait)
+            finally:
+                self._abandon(ticket)
+        self._log_wait(ticket, started)
+
+    async def acquire_async(self, provider: str, tokens: int, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Wait on the event loop until a request of `tokens` tokens may be sent."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = self._enqueue(provider, tokens, priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_grant(ticket)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            with self._cond:
+                self._abandon(ticket)
+        self._log_wait(ticket, started)
+
+    def settle(self, provider: str, reserved: int, used: Optional[int]) -> None:
+        """Return reserved tokens the request did not use."""
+        if used is None or used >= reserved:
+            return
+        with self._cond:
+            self._provider_buckets(provider)[1].give(reserved - used)
+            self._cond.notify_all()
+
+    def _should_retry(self, provider: str, attempt: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying a failed attempt, or None to give up."""
+        if attempt >= settings.llm_max_retries or not is_retryable(error):
+            return None
+        with self._cond:
+            self.retried += 1
+        delay = retry_delay(attempt, error)
+        logger.warning(
+            f"{provider} request failed ({type(error).__name__}), "
+            f"retry {attempt + 1}/{settings.llm_max_retries} in {delay:.1f}s"
+        )
+        return delay
+
+    def call(
+        self,
+        provider: str,
+        tokens: int,
+        priority: Priority,
+        send: Callable[[], Any],
+    ) -> Any:
+        """Send a request with `send()` once it is within budget, retrying transient errors.
+
+        Each attempt reserves its own request and tokens; the reservation is
+        settled with the reported usage, or refunded in full when the attempt
+        raises.
+        """
+        attempt = 0
+        while True:
+            self.acquire(provider, tokens, priority)
+            try:
+                response = send()
+            except BaseException as e:
+                self.settle(provider, tokens, 0)
+                delay = self._should_retry(provider, attempt, e) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.settle(provider, tokens, usage_tokens(response))
+            return response
+
+    async def call_async(
+        self,
+        provider: str,
+        tokens: int,
+        priority: Priority,
+        send: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Async counterpart of call(): `send()` returns the awaitable provider request."""
+        attempt = 0
+        while True:
+            await self.acquire_async(provider, tokens, priority)
+            try:
+                response = await send()
+            except BaseException as e:
+                self.settle(provider, tokens, 0)
+                delay = self._should_retry(provider, attempt, e) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.settle(provider, tokens, usage_tokens(response))
+            return response
+
+    def estimate_tokens(self, model: str, max_tokens: int, *texts: Optional[str]) -> int:
+        """Tokens a request may consume: its messages plus the response budget."""
+        prompt_tokens = sum(count_tokens(text, model) for text in texts if text)
+        return prompt_tokens + MESSAGE_OVERHEAD_TOKENS + max_tokens
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "granted": self.granted,
+                "retried": self.retried,
+                "waiting": {provider: len(waiting) for provider, waiting in self._waiting.items() if waiting},
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+def usage_tokens(response: Any) -> Optional[int]:
+    """Total tokens reported by an OpenAI or Anthropic response, if any."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    if total is not None:
+        return total
+    input_tokens = getattr(usage, "input_tokens", None)
+    output_tokens = getattr(usage, "output_tokens", None)
+    if input_tokens is None or output_tokens is None:
+        return None
+    return input_tokens + output_tokens
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI or Anthropic SDK error is transient.
+
+    Matches the SDKs' own retry policy: connection errors and timeouts, and
+    408, 409, 429 and 5xx responses.
+    """
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 429) or status >= 500
+    return any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__)
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Seconds to wait before retry number `attempt + 1`.
+
+    Honours a Retry-After header on the error's response, otherwise backs
+    off exponentially with jitter.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_AFTER_MAX_SECONDS)
+        except ValueError:
+            pass
+    delay = min(RETRY_INITIAL_DELAY_SECONDS * 2 ** attempt, RETRY_MAX_DELAY_SECONDS)
+    return delay * random.uniform(0.75, 1.0)
+
+
+_llm_scheduler: Optional[LLMScheduler] = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get the global LLM scheduler instance."""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = LLMScheduler(settings.llm_requests_per_minute, settings.llm_tokens_per_minute)
+    return _llm_scheduler
@@ -13,6 +13,8 @@ from app.db.models import (
     MetricMappingConfig as DBMetricMappingConfig,
 )
 from app.core.config import settings
+from app.services.llm_clients import get_llm_clients
+from app.services.llm_scheduler import Priority, get_llm_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +28,13 @@ class MetricDiscoveryService:
 
     @property
     def openai_client(self):
-        """Lazy load OpenAI client."""
+        """Shared OpenAI client, or None if unavailable."""
         if self._openai_client is None:
+            if not settings.openai_api_key:
+                logger.warning("OPENAI_API_KEY not configured. Semantic grouping will use fallback.")
+                return None
             try:
-                import openai
-                api_key = settings.openai_api_key
-                if not api_key:
-                    logger.warning("OPENAI_API_KEY not configured. Semantic grouping will use fallback.")
-                    return None
-                self._openai_client = openai.OpenAI(api_key=api_key)
+                self._openai_client = get_llm_clients().openai()
             except ImportError:
                 logger.warning("openai package not installed. Semantic grouping will use fallback.")
                 return None
@@ -149,14 +149,22 @@ Return JSON in this format:
     ]
 }}"""
 
-            response = self.openai_client.chat.completions.create(
-                model=settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a precise data governance assistant. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=2000
+            model = settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview"
+            system_prompt = "You are a precise data governance assistant. Always respond with valid JSON."
+            scheduler = get_llm_scheduler()
+            response = scheduler.call(
+                "openai",
+                scheduler.estimate_tokens(model, 2000, system_prompt, prompt),
+                Priority.BACKGROUND,
+                lambda: self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=2000
+                ),
             )
 
             response_text = response.choices[0].message.content
@@ -0,0 +1,137 @@
+"""On-disk cache of parsed documents keyed by content hash."""
+
+import os
+import pickle
+import hashlib
+import logging
+import threading
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """Content-addressed store for ParsedDocument objects.
+
+    Entries are zlib-compressed pickles named by the SHA-256 of the file
+    content plus the parser version and options, so a re-upload of the same
+    bytes hits the cache regardless of file name. Eviction is LRU by total
+    bytes on disk, using file mtimes as the access clock. Usage is measured
+    from the directory at eviction time, so worker processes sharing the
+    cache evict against the same total rather than their own writes.
+    """
+
+    SUFFIX = ".pkl.z"
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content: bytes, *parts: object) -> str:
+        """Build a cache key from the file content and parser options."""
+        digest = hashlib.sha256(content)
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(str(part).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str):
+        """Return the cached document for a key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            doc = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable parse cache entry {path.name}: {e}")
+            self._remove(path.name)
+            return None
+
+        # Touch the entry so it becomes most recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        logger.info(f"Parse cache hit: {doc.filename} ({key[:12]})")
+        return doc
+
+    def put(self, key: str, doc) -> None:
+        """Store a parsed document and evict old entries if over budget."""
+        data = zlib.compress(pickle.dumps(doc, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        if len(data) > self.max_bytes:
+            logger.debug(f"Parsed document {doc.filename} too large to cache ({len(data)} bytes)")
+            return
+
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write parse cache entry for {doc.filename}: {e}")
+            return
+
+        self._evict()
+
+    def _remove(self, name: str) -> None:
+        try:
+            (self.cache_dir / name).unlink()
+        except OSError:
+            pass
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """(mtime, name, size) of every entry currently on disk."""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(self.SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # Removed by another process since the listing
+                    continue
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under the byte budget."""
+        with self._lock:
+            entries = self._entries()
+            total_bytes = sum(size for _, _, size in entries)
+            if total_bytes <= self.max_bytes:
+                return
+
+            for _, name, size in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                logger.debug(f"Evicting parse cache entry {name}")
+                self._remove(name)
+                total_bytes -= size
+
+
+_parse_cache: Optional[ParseCache] = None
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Get the global parse cache instance, or None when caching is disabled."""
+    global _parse_cache
+    if not settings.parse_cache_enabled:
+        return None
+    if _parse_cache is None:
+        cache_dir = Path(settings.upload_dir) / ".parse_cache"
+        _parse_cache = ParseCache(cache_dir, settings.parse_cache_max_bytes)
+    return _parse_cache
@@ -0,0 +1,95 @@
+"""Process pool that keeps document parsing off the asyncio event loop."""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services.document_parser import DocumentParser, ParsedDocument
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the parse executor queue is full."""
+
+
+class ParseExecutor:
+    """Bounded worker pool for document parsing.
+
+    Requests take a slot while their document is parsed; once workers +
+    queue_size slots are taken, new requests are rejected with
+    ExecutorBusyError instead of piling up behind a long-running parse.
+    All bookkeeping happens on the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.max_in_flight = self.workers + max(0, queue_size)
+        self._in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Lazily start the worker processes."""
+        if self._executor is None:
+            # Spawn rather than fork: the server process runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started parse executor with {self.workers} worker processes")
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Reserve capacity for one request, or raise ExecutorBusyError."""
+        if self._in_flight >= self.max_in_flight:
+            raise ExecutorBusyError(
+                f"Document processing queue is full ({self._in_flight} requests in flight)"
+            )
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+
+    async def parse(
+        self,
+        file_path: str,
+        content: Optional[bytes],
+        detect_tables: bool = False,
+    ) -> ParsedDocument:
+        """Parse a document in a worker process."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, _parse_in_worker, file_path, content, detect_tables
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _parse_in_worker(file_path: str, content: Optional[bytes], detect_tables: bool) -> ParsedDocument:
+    """Worker-process entry point for parsing."""
+    return DocumentParser().parse(file_path, content, detect_tables=detect_tables)
+
+
+_parse_executor: Optional[ParseExecutor] = None
+
+
+def get_parse_executor() -> ParseExecutor:
+    """Get the global parse executor instance."""
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ParseExecutor(settings.parse_workers, settings.parse_queue_size)
+    return _parse_executor
@@ -1,10 +1,14 @@
 """Rule-based extraction service."""
 
 import re
-from typing import Optional
-from dataclasses import dataclass
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional, Union
+from dataclasses import dataclass, field
 
 try:
+    import numpy as np
     from rapidfuzz import fuzz, process
     HAS_RAPIDFUZZ = True
 except ImportError:
@@ -17,6 +21,165 @@ from app.models import (
     PatternType,
     ExtractionSource,
 )
+from app.services.document_parser import ParsedDocument, ParsedPage
+from app.services.document_view import NUMBER_PATTERN, DocumentView, TableCells
+
+
+# Common patterns for label-value extraction
+LABEL_VALUE_TEMPLATES = [
+    r"{label}[:\s]+\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?",
+    r"{label}[:\s]+\(\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?\)",
+    r"\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?\s+{label}",
+]
+
+# Token windows scored per cdist call; bounds the size of the score matrix
+FUZZY_BLOCK_SIZE = 50_000
+
+# Last template without the label, anchored at the label's start position
+VALUE_BEFORE_LABEL = re.compile(
+    r"\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?\s+\Z", re.IGNORECASE
+)
+
+# Table cells holding a year (column labels such as "2024" or "FY2023"), not a value
+YEAR_CELL = re.compile(r"(?:fy\s*)?(?:19|20)\d{2}", re.IGNORECASE)
+
+
+@dataclass
+class CompiledRule:
+    """Regexes of one ExtractionRule, compiled once."""
+    # REGEX pattern id -> compiled regex (None if the pattern is invalid)
+    regexes: dict[str, Optional[re.Pattern]] = field(default_factory=dict)
+    # LABEL_VALUE pattern id -> (label, compiled regex per template) for every label
+    label_values: dict[str, list[tuple[str, list[re.Pattern]]]] = field(default_factory=dict)
+
+
+class CompiledRuleCache:
+    """Caches CompiledRule objects keyed on rule id and updated_at.
+
+    The /rules API bumps updated_at and calls invalidate() whenever a rule
+    changes, so edited rules are recompiled on their next use.
+    """
+
+    def __init__(self):
+        self._cache: dict[str, tuple[datetime, CompiledRule]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, rule: ExtractionRule) -> CompiledRule:
+        """Return the compiled form of a rule, compiling it on a miss."""
+        with self._lock:
+            cached = self._cache.get(rule.id)
+        if cached is not None and cached[0] == rule.updated_at:
+            return cached[1]
+
+        compiled = self._compile(rule)
+        with self._lock:
+            self._cache[rule.id] = (rule.updated_at, compiled)
+        return compiled
+
+    def invalidate(self, rule_id: Optional[str] = None) -> None:
+        """Drop one rule (or all rules) from the cache."""
+        with self._lock:
+            if rule_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(rule_id, None)
+
+    def _compile(self, rule: ExtractionRule) -> CompiledRule:
+        compiled = CompiledRule()
+        for pattern in rule.patterns:
+            if pattern.type == PatternType.REGEX:
+                try:
+                    compiled.regexes[pattern.id] = re.compile(pattern.pattern, re.IGNORECASE | re.MULTILINE)
+                except re.error:
+                    compiled.regexes[pattern.id] = None
+            elif pattern.type == PatternType.LABEL_VALUE:
+                # Get all label variations
+                labels = [pattern.pattern]
+                for mapping in rule.semantic_mappings:
+                    if mapping.canonical_term.lower() == pattern.pattern.lower():
+                        labels.extend(mapping.variations)
+
+                compiled.label_values[pattern.id] = [
+                    (label, [
+                        re.compile(template.format(label=re.escape(label)), re.IGNORECASE)
+                        for template in LABEL_VALUE_TEMPLATES
+                    ])
+                    for label in labels
+                ]
+        return compiled
+
+
+_compiled_rule_cache: Optional[CompiledRuleCache] = None
+
+
+def get_compiled_rule_cache() -> CompiledRuleCache:
+    """Get the global compiled rule cache instance."""
+    global _compiled_rule_cache
+    if _compiled_rule_cache is None:
+        _compiled_rule_cache = CompiledRuleCache()
+    return _compiled_rule_cache
+
+
+class MultiRuleMatcher:
+    """Finds the EXACT terms and LABEL_VALUE labels of many rules in one scan.
+
+    All terms are folded into a single trie-shaped regex, so the document is
+    walked once no matter how many rules are active. Each hit is mapped back
+    to the rules/patterns that own the term.
+    """
+
+    SCANNED_TYPES = (PatternType.EXACT, PatternType.LABEL_VALUE)
+
+    def __init__(self, rules: list[ExtractionRule], compiled_rules: CompiledRuleCache):
+        # lowercase term -> [(rule id, pattern, label index, label, label regexes)]
+        # label index, label and regexes are None for EXACT patterns
+        self.targets: dict[str, list[tuple]] = defaultdict(list)
+
+        for rule in rules:
+            compiled = compiled_rules.get(rule)
+            for pattern in rule.patterns:
+                if pattern.type == PatternType.EXACT and pattern.pattern:
+                    self.targets[pattern.pattern.lower()].append((rule.id, pattern, None, None, None))
+                elif pattern.type == PatternType.LABEL_VALUE:
+                    for label_idx, (label, regexes) in enumerate(compiled.label_values.get(pattern.id, [])):
+                        if label:
+                            self.targets[label.lower()].append((rule.id, pattern, label_idx, label, regexes))
+
+        # Terms that are prefixes of a longer term match at the same positions
+        self._prefix_terms = {
+            term: [other for other in self.targets if term.startswith(other)]
+            for term in self.targets
+        }
+        self._regex = (
+            re.compile(f"(?=({self._trie_pattern(list(self.targets))}))") if self.targets else None
+        )
+
+    @staticmethod
+    def _trie_pattern(terms: list[str]) -> str:
+        """Build a regex matching the longest of `terms` at a position."""
+        trie: dict = {}
+        for term in terms:
+            node = trie
+            for char in term:
+                node = node.setdefault(char, {})
+            node[""] = {}  # End of term
+
+        def build(node: dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def find(self, text_lower: str) -> Iterable[tuple[int, str]]:
+        """Yield (position, term) for every occurrence of every term, overlaps included."""
+        if self._regex is None:
+            return
+        for match in self._regex.finditer(text_lower):
+            for term in self._prefix_terms[match.group(1)]:
+                yield match.start(), term
 
 
 @dataclass
@@ -32,7 +195,9 @@ class MatchResult:
 class RuleBasedExtractor:
     """Extracts data using configurable rules and patterns."""
 
-    def __init__(self):
+    def __init__(self, compiled_rules: Optional[CompiledRuleCache] = None):
+        self.compiled_rules = compiled_rules or get_compiled_rule_cache()
+        self._matchers: dict[tuple, MultiRuleMatcher] = {}
         self.currency_multipliers = {
             "k": 1_000,
             "K": 1_000,
@@ -47,16 +212,31 @@ class RuleBasedExtractor:
             "thousand": 1_000,
         }
 
-    def extract(self, text: str, rule: ExtractionRule) -> list[MatchResult]:
-        """Extract values from text using the given rule."""
+    def extract(
+        self,
+        text: Union[str, DocumentView],
+        rule: ExtractionRule,
+        scanned: Optional[dict[str, list[MatchResult]]] = None
+    ) -> list[MatchResult]:
+        """Extract values from text using the given rule.
+
+        Pass a DocumentView to share its lowercase text and offsets across
+        calls. `scanned` holds pre-computed EXACT/LABEL_VALUE matches by
+        pattern id, as produced by extract_many().
+        """
+        view = DocumentView.of(text)
         results = []
 
         # Build semantic variations lookup
         term_variations = self._build_variations_map(rule.semantic_mappings)
+        compiled = self.compiled_rules.get(rule)
 
         # Try each pattern
         for pattern in sorted(rule.patterns, key=lambda p: -p.priority):
-            matches = self._apply_pattern(text, pattern, term_variations, rule)
+            if scanned is not None and pattern.type in MultiRuleMatcher.SCANNED_TYPES:
+                matches = scanned.get(pattern.id, [])
+            else:
+                matches = self._apply_pattern(view, pattern, term_variations, rule, compiled)
             results.extend(matches)
 
         # Deduplicate and sort by confidence
@@ -65,6 +245,100 @@ class RuleBasedExtractor:
 
         return results
 
+    def extract_many(
+        self,
+        text: Union[str, DocumentView],
+        rules: list[ExtractionRule]
+    ) -> dict[str, list[MatchResult]]:
+        """Extract values for many rules, scanning the text once for all literal terms.
+
+        Returns results by rule id, identical to calling extract() per rule.
+        """
+        view = DocumentView.of(text)
+        text = view.text
+        matcher = self._get_matcher(rules)
+
+        # (rule id, pattern id) -> [(sort key, match)]; keys reproduce the
+        # order the per-pattern scans would have produced
+        hits: dict[tuple[str, str], list[tuple[tuple, MatchResult]]] = defaultdict(list)
+        for pos, term in matcher.find(view.text_lower):
+            for rule_id, pattern, label_idx, label, regexes in matcher.targets[term]:
+                if label_idx is None:
+                    result = self._exact_result(text, pattern, pos)
+                    if result:
+                        hits[(rule_id, pattern.id)].append(((pos,), result))
+                    continue
+
+                label_end = pos + len(term)
+                for template_idx, regex in enumerate(regexes):
+                    if template_idx < len(regexes) - 1:
+                        match = regex.match(text, pos)
+                        if match:
+                            result = self._label_value_result(
+                                text, pattern, label, match.group(1), match.group(2), match.start(), match.end()
+                            )
+                            hits[(rule_id, pattern.id)].append(((label_idx, template_idx, pos), result))
+                    else:
+                        # Value precedes the label
+                        match = VALUE_BEFORE_LABEL.search(text, max(0, pos - 256), pos)
+                        if match:
+                            result = self._label_value_result(
+                                text, pattern, label, match.group(1), match.group(2), match.start(), label_end
+                            )
+                            hits[(rule_id, pattern.id)].append(((label_idx, template_idx, pos), result))
+
+        results = {}
+        for rule in rules:
+            scanned = {}
+            for pattern in rule.patterns:
+                pattern_hits = sorted(hits.get((rule.id, pattern.id), []), key=lambda h: h[0])
+                scanned[pattern.id] = [result for _, result in pattern_hits]
+            results[rule.id] = self.extract(view, rule, scanned=scanned)
+        return results
+
+    def extract_pages(
+        self,
+        pages: Iterable[ParsedPage],
+        rules: list[ExtractionRule]
+    ) -> dict[str, list[MatchResult]]:
+        """Extract values for many rules from a streamed document, page by page.
+
+        Only one page is held at a time: each page and its tables are matched
+        with extract_many(). Matches are tagged with their page number and
+        deduplicated across the whole document at the end.
+        """
+        results: dict[str, list[MatchResult]] = {rule.id: [] for rule in rules}
+        for page in pages:
+            page_doc = ParsedDocument.from_pages(
+                filename="",
+                file_type="",
+                pages=[page.text],
+                tables=[table if "page" in table else {**table, "page": page.number} for table in page.tables],
+                metadata={}
+            )
+            for rule_id, matches in self.extract_many(DocumentView.from_document(page_doc), rules).items():
+                for match in matches:
+                    if match.source.page is None:
+                        match.source.page = page.number
+                results[rule_id].extend(matches)
+
+        for rule_id, matches in results.items():
+            matches = self._deduplicate_results(matches)
+            matches.sort(key=lambda r: -r.confidence)
+            results[rule_id] = matches
+        return results
+
+    def _get_matcher(self, rules: list[ExtractionRule]) -> MultiRuleMatcher:
+        """Reuse the combined matcher while the rule set is unchanged."""
+        key = tuple((rule.id, rule.updated_at) for rule in rules)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            if len(self._matchers) >= 16:
+                self._matchers.clear()
+            matcher = MultiRuleMatcher(rules, self.compiled_rules)
+            self._matchers[key] = matcher
+        return matcher
+
     def _build_variations_map(self, mappings: list[SemanticMapping]) -> dict[str, list[str]]:
         """Build a map of canonical terms to their variations."""
         variations_map = {}
@@ -76,34 +350,39 @@ class RuleBasedExtractor:
 
     def _apply_pattern(
         self,
-        text: str,
+        view: DocumentView,
         pattern: ExtractionPattern,
         variations: dict[str, list[str]],
         rule: ExtractionRule,
+        compiled: CompiledRule,
     ) -> list[MatchResult]:
         """Apply a single pattern to extract values."""
         results = []
 
         if pattern.type == PatternType.EXACT:
-            results = self._exact_match(text, pattern)
+            results = self._exact_match(view, pattern)
         elif pattern.type == PatternType.REGEX:
-            results = self._regex_match(text, pattern)
+            results = self._regex_match(view.text, pattern, compiled)
         elif pattern.type == PatternType.FUZZY:
-            results = self._fuzzy_match(text, pattern, variations)
+            results = self._fuzzy_match(view, pattern, variations)
         elif pattern.type == PatternType.LABEL_VALUE:
-            results = self._label_value_match(text, pattern, variations, rule)
+            results = self._label_value_match(view.text, pattern, compiled)
         elif pattern.type == PatternType.TABLE_HEADER:
-            results = self._table_header_match(text, pattern, variations)
+            results = self._table_header_match(view, pattern, variations)
+        elif pattern.type == PatternType.TABLE_CELL:
+            results = self._table_cell_match(view, pattern, variations)
         elif pattern.type == PatternType.CONTEXT:
-            results = self._context_match(text, pattern, variations, rule)
+            results = self._context_match(view, pattern, variations, rule)
 
         return results
 
-    def _exact_match(self, text: str, pattern: ExtractionPattern) -> list[MatchResult]:
+    def _exact_match(self, view: DocumentView, pattern: ExtractionPattern) -> list[MatchResult]:
         """Find exact matches of the pattern."""
         results = []
+        if not pattern.pattern:
+            return results
         pattern_lower = pattern.pattern.lower()
-        text_lower = text.lower()
+        text_lower = view.text_lower
 
         idx = 0
         while True:
@@ -111,63 +390,70 @@ class RuleBasedExtractor:
             if pos == -1:
                 break
 
-            # Extract surrounding context
-            context_start = max(0, pos - 100)
-            context_end = min(len(text), pos + len(pattern.pattern) + 100)
-            context = text[context_start:context_end]
-
-            # Try to find a numeric value nearby
-            value, normalized = self._extract_nearby_value(text, pos, pos + len(pattern.pattern))
-
-            if value:
-                results.append(MatchResult(
-                    value=value,
-                    normalized_value=normalized,
-                    confidence=pattern.confidence,
-                    source=ExtractionSource(
-                        context=context,
-                        matched_pattern=pattern.pattern,
-                        raw_text=text[pos:pos + len(pattern.pattern)]
-                    ),
-                    pattern_id=pattern.id
-                ))
+            result = self._exact_result(view.text, pattern, pos)
+            if result:
+                results.append(result)
 
             idx = pos + 1
 
         return results
 
-    def _regex_match(self, text: str, pattern: ExtractionPattern) -> list[MatchResult]:
-        """Find regex matches."""
-        results = []
-        try:
-            regex = re.compile(pattern.pattern, re.IGNORECASE | re.MULTILINE)
-            for match in regex.finditer(text):
-                # Get the captured group or full match
-                value = match.group(1) if match.groups() else match.group(0)
-                normalized = self._normalize_value(value)
+    def _exact_result(self, text: str, pattern: ExtractionPattern, pos: int) -> Optional[MatchResult]:
+        """Build the result for an exact hit at pos, if a value is nearby."""
+        # Extract surrounding context
+        context_start = max(0, pos - 100)
+        context_end = min(len(text), pos + len(pattern.pattern) + 100)
+        context = text[context_start:context_end]
 
-                context_start = max(0, match.start() - 50)
-                context_end = min(len(text), match.end() + 50)
+        # Try to find a numeric value nearby
+        value, normalized = self._extract_nearby_value(text, pos, pos + len(pattern.pattern))
 
-                results.append(MatchResult(
-                    value=value,
-                    normalized_value=normalized,
-                    confidence=pattern.confidence,
-                    source=ExtractionSource(
-                        context=text[context_start:context_end],
-                        matched_pattern=pattern.pattern,
-                        raw_text=match.group(0)
-                    ),
-                    pattern_id=pattern.id
-                ))
-        except re.error:
-            pass
+        if not value:
+            return None
+        return MatchResult(
+            value=value,
+            normalized_value=normalized,
+            confidence=pattern.confidence,
+            source=ExtractionSource(
+                context=context,
+                matched_pattern=pattern.pattern,
+                raw_text=text[pos:pos + len(pattern.pattern)]
+            ),
+            pattern_id=pattern.id
+        )
+
+    def _regex_match(self, text: str, pattern: ExtractionPattern, compiled: CompiledRule) -> list[MatchResult]:
+        """Find regex matches."""
+        results = []
+        regex = compiled.regexes.get(pattern.id)
+        if regex is None:
+            return results
+
+        for match in regex.finditer(text):
+            # Get the captured group or full match
+            value = match.group(1) if match.groups() else match.group(0)
+            normalized = self._normalize_value(value)
+
+            context_start = max(0, match.start() - 50)
+            context_end = min(len(text), match.end() + 50)
+
+            results.append(MatchResult(
+                value=value,
+                normalized_value=normalized,
+                confidence=pattern.confidence,
+                source=ExtractionSource(
+                    context=text[context_start:context_end],
+                    matched_pattern=pattern.pattern,
+                    raw_text=match.group(0)
+                ),
+                pattern_id=pattern.id
+            ))
 
         return results
 
     def _fuzzy_match(
         self,
-        text: str,
+        view: DocumentView,
         pattern: ExtractionPattern,
         variations: dict[str, list[str]]
     ) -> list[MatchResult]:
@@ -176,132 +462,344 @@ class RuleBasedExtractor:
             return []
 
         results = []
-        words = text.split()
+        text = view.text
         search_term = pattern.pattern.lower()
 
         # Get all variations of the search term
         all_terms = variations.get(search_term, [search_term])
 
+        # Best matches in the text for all variations at once
+        best_matches = self._fuzzy_search(view, all_terms, limit=5, score_cutoff=70)
+
         for term in all_terms:
-            # Find best fuzzy matches in the text
-            matches = process.extract(term, words, scorer=fuzz.ratio, limit=5)
-            for match_word, score, idx in matches:
-                if score >= 70:  # 70% similarity threshold
-                    # Find position in original text
-                    pos = text.lower().find(match_word.lower())
-                    if pos != -1:
-                        value, normalized = self._extract_nearby_value(text, pos, pos + len(match_word))
-                        if value:
-                            context_start = max(0, pos - 100)
-                            context_end = min(len(text), pos + 200)
-
-                            results.append(MatchResult(
-                                value=value,
-                                normalized_value=normalized,
-                                confidence=pattern.confidence * (score / 100),
-                                source=ExtractionSource(
-                                    context=text[context_start:context_end],
-                                    matched_pattern=term,
-                                    raw_text=match_word
-                                ),
-                                pattern_id=pattern.id
-                            ))
+            for score, pos, end in best_matches.get(term.lower(), []):
+                value, normalized = self._extract_nearby_value(text, pos, end)
+                if value:
+                    context_start = max(0, pos - 100)
+                    context_end = min(len(text), pos + 200)
+
+                    results.append(MatchResult(
+                        value=value,
+                        normalized_value=normalized,
+                        confidence=pattern.confidence * (score / 100),
+                        source=ExtractionSource(
+                            context=text[context_start:context_end],
+                            matched_pattern=term,
+                            raw_text=text[pos:end]
+                        ),
+                        pattern_id=pattern.id
+                    ))
 
         return results
 
+    def _fuzzy_search(
+        self,
+        view: DocumentView,
+        terms: list[str],
+        limit: int = 5,
+        score_cutoff: float = 70
+    ) -> dict[str, list[tuple[float, int, int]]]:
+        """Find the best `limit` (score, start, end) token windows per lowercase term.
+
+        Terms are grouped by word count and scored against windows of as many
+        tokens in one cdist call per group, so multi-word labels match whole
+        phrases. Ties keep the earliest window.
+        """
+        by_size: dict[int, list[str]] = defaultdict(list)
+        for term in dict.fromkeys(term.lower() for term in terms):
+            size = len(term.split())
+            if size:
+                by_size[size].append(term)
+
+        best = {}
+        for size, group in by_size.items():
+            windows, spans = view.token_windows(size)
+            candidates: list[list[tuple[float, int]]] = [[] for _ in group]
+
+            for block_start in range(0, len(windows), FUZZY_BLOCK_SIZE):
+                scores = process.cdist(
+                    group,
+                    windows[block_start:block_start + FUZZY_BLOCK_SIZE],
+                    scorer=fuzz.ratio,
+                    score_cutoff=score_cutoff,
+                    workers=-1,
+                )
+                for row, term_scores in enumerate(scores):
+                    # Scores under the cutoff come back as 0
+                    hits = np.flatnonzero(term_scores)
+                    if len(hits) > limit:
+                        hits = hits[np.lexsort((hits, -term_scores[hits]))[:limit]]
+                    candidates[row].extend(
+                        (float(term_scores[idx]), block_start + int(idx)) for idx in hits
+                    )
+
+            for term, found in zip(group, candidates):
+                found.sort(key=lambda c: (-c[0], c[1]))
+                best[term] = [(score, *spans[idx]) for score, idx in found[:limit]]
+
+        return best
+
     def _label_value_match(
         self,
         text: str,
         pattern: ExtractionPattern,
-        variations: dict[str, list[str]],
-        rule: ExtractionRule
+        compiled: CompiledRule
     ) -> list[MatchResult]:
         """Find label: value pairs."""
         results = []
 
-        # Get all label variations
-        labels = [pattern.pattern]
-        for mapping in rule.semantic_mappings:
-            if mapping.canonical_term.lower() == pattern.pattern.lower():
-                labels.extend(mapping.variations)
-
-        # Common patterns for label-value extraction
-        value_patterns = [
-            r"{label}[:\s]+\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?",
-            r"{label}[:\s]+\(\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?\)",
-            r"\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million|thousand)?\s+{label}",
-        ]
-
-        for label in labels:
-            escaped_label = re.escape(label)
-            for vp in value_patterns:
-                regex_pattern = vp.format(label=escaped_label)
-                try:
-                    regex = re.compile(regex_pattern, re.IGNORECASE)
-                    for match in regex.finditer(text):
-                        value = match.group(1)
-                        multiplier = match.group(2) if len(match.groups()) > 1 else None
-                        normalized = self._normalize_value(value, multiplier)
-
-                        context_start = max(0, match.start() - 30)
-                        context_end = min(len(text), match.end() + 30)
-
-                        results.append(MatchResult(
-                            value=value,
-                            normalized_value=normalized,
-                            confidence=pattern.confidence,
-                            source=ExtractionSource(
-                                context=text[context_start:context_end],
-                                matched_pattern=label,
-                                raw_text=match.group(0)
-                            ),
-                            pattern_id=pattern.id
-                        ))
-                except re.error:
-                    continue
+        for label, regexes in compiled.label_values.get(pattern.id, []):
+            for regex in regexes:
+                for match in regex.finditer(text):
+                    results.append(self._label_value_result(
+                        text, pattern, label, match.group(1), match.group(2), match.start(), match.end()
+                    ))
 
         return results
 
-    def _table_header_match(
+    def _label_value_result(
         self,
         text: str,
         pattern: ExtractionPattern,
+        label: str,
+        value: str,
+        multiplier: Optional[str],
+        start: int,
+        end: int
+    ) -> MatchResult:
+        """Build the result for a label-value match spanning text[start:end]."""
+        normalized = self._normalize_value(value, multiplier)
+
+        context_start = max(0, start - 30)
+        context_end = min(len(text), end + 30)
+
+        return MatchResult(
+            value=value,
+            normalized_value=normalized,
+            confidence=pattern.confidence,
+            source=ExtractionSource(
+                context=text[context_start:context_end],
+                matched_pattern=label,
+                raw_text=text[start:end]
+            ),
+            pattern_id=pattern.id
+        )
+
+    def _table_header_match(
+        self,
+        view: DocumentView,
+        pattern: ExtractionPattern,
         variations: dict[str, list[str]]
     ) -> list[MatchResult]:
-        """Extract values from table-like structures."""
-        # Simplified table extraction - looks for aligned columns
+        """Extract values from table-like structures.
+
+        Reads the document's parsed tables, if any, and also treats lines of
+        text as table rows, so labels outside the detected tables are still
+        found. Lines that render a table in which the term already matched
+        are skipped, as they would re-read the same cells.
+        """
         results = []
-        lines = text.split("\n")
 
         search_terms = [pattern.pattern.lower()]
         search_terms.extend(variations.get(pattern.pattern.lower(), []))
+        terms_lower = [term.lower() for term in search_terms]
+
+        # Term -> text spans of the tables it matched in
+        rendered: dict[str, list[tuple[int, int]]] = {}
+        for table in view.tables:
+            table_results = self._table_cells_header_match(table, pattern, search_terms, terms_lower)
+            results.extend(table_results)
+            for term in {result.source.matched_pattern for result in table_results}:
+                rendered.setdefault(term, []).extend(view.table_text_spans(table))
+
+        # Simplified table extraction - looks for aligned columns
+        lines = view.lines
+        hits = sorted(
+            (line_idx, term_idx)
+            for term_idx, term in enumerate(terms_lower)
+            for line_idx in view.lines_with(term)
+        )
+
+        for i, term_idx in hits:
+            line_start = view.line_starts[i]
+            if any(start <= line_start < end for start, end in rendered.get(search_terms[term_idx], ())):
+                continue
+            # Look at next few lines for values
+            for j in range(i + 1, min(i + 5, len(lines))):
+                line_value = view.line_value(j)
+                if line_value:
+                    value, multiplier = line_value
+                    results.append(MatchResult(
+                        value=value,
+                        normalized_value=self._normalize_value(value, multiplier),
+                        confidence=pattern.confidence * 0.8,
+                        source=ExtractionSource(
+                            context="\n".join(lines[max(0, i-1):min(len(lines), j+2)]),
+                            matched_pattern=search_terms[term_idx],
+                            raw_text=lines[j]
+                        ),
+                        pattern_id=pattern.id
+                    ))
+                    break
+
+        return results
 
-        for i, line in enumerate(lines):
-            line_lower = line.lower()
-            for term in search_terms:
-                if term in line_lower:
-                    # Look at next few lines for values
-                    for j in range(i + 1, min(i + 5, len(lines))):
-                        value, normalized = self._extract_value_from_line(lines[j])
-                        if value:
-                            results.append(MatchResult(
-                                value=value,
-                                normalized_value=normalized,
-                                confidence=pattern.confidence * 0.8,
-                                source=ExtractionSource(
-                                    context="\n".join(lines[max(0, i-1):min(len(lines), j+2)]),
-                                    matched_pattern=term,
-                                    raw_text=lines[j]
-                                ),
-                                pattern_id=pattern.id
-                            ))
-                            break
+    def _table_cells_header_match(
+        self,
+        table: TableCells,
+        pattern: ExtractionPattern,
+        search_terms: list[str],
+        terms_lower: list[str]
+    ) -> list[MatchResult]:
+        """Find header cells matching a term and take the value beside or below them.
+
+        A label in the table's header row only reads down its column, since
+        the cells beside it are other headers. Year-like cells ("2024",
+        "FY2023") in the header row or first column are labels, not values,
+        and are skipped.
+        """
+        results = []
+        row_count = len(table)
+        hits = sorted(
+            (r, c, term_idx)
+            for term_idx, term in enumerate(terms_lower)
+            for r, c in table.cells_with(term)
+        )
+
+        for r, c, term_idx in hits:
+            term = search_terms[term_idx]
+            # Row label: value to the right; column header: value below
+            in_header = r == 0 and table.has_header
+            candidates = [] if in_header else [(r, col) for col in range(c + 1, table.row_len(r))]
+            candidates += [
+                (row, c) for row in range(r + 1, min(r + 5, row_count)) if c < table.row_len(row)
+            ]
+            for value_r, value_c in candidates:
+                cell = table.cell(value_r, value_c)
+                is_label = value_c == 0 or (value_r == 0 and table.has_header)
+                if is_label and YEAR_CELL.fullmatch(cell.strip()):
+                    continue
+                value, normalized = self._extract_value_from_line(cell)
+                if value:
+                    context_rows = [r] if value_r == r else [r, value_r]
+                    results.append(MatchResult(
+                        value=value,
+                        normalized_value=normalized,
+                        confidence=pattern.confidence * 0.8,
+                        source=ExtractionSource(
+                            page=table.page,
+                            section=f"table {table.index + 1} row {value_r + 1} col {value_c + 1}",
+                            context="\n".join(" | ".join(table.row(row)) for row in context_rows),
+                            matched_pattern=term,
+                            raw_text=cell
+                        ),
+                        pattern_id=pattern.id
+                    ))
+                    break
 
         return results
 
+    def _table_cell_match(
+        self,
+        view: DocumentView,
+        pattern: ExtractionPattern,
+        variations: dict[str, list[str]]
+    ) -> list[MatchResult]:
+        """Read numeric cells straight from the document's parsed tables.
+
+        The pattern names a row or column label, optionally followed by
+        "|" and a column header to pick a single cell, e.g.
+        "Total Revenue | 2024". Labels are matched together with their
+        semantic variations against the first column and the header row.
+        """
+        results = []
+        if not view.tables:
+            return results
+
+        label, _, column = pattern.pattern.partition("|")
+        label = label.strip()
+        column = column.strip().lower()
+        labels = list(variations.get(label.lower(), [label]))
+        labels_lower = [term.lower() for term in labels]
+
+        for table in view.tables:
+            header_lower = [cell.lower() for cell in table.row(0)]
+            first_column_lower = table.column_lower(0)
+
+            # Row labels in the first column: numeric cells across the row
+            for r in range(1, len(table)):
+                if not table.row_len(r):
+                    continue
+                term_idx = self._find_label(first_column_lower[r], labels_lower)
+                if term_idx is None:
+                    continue
+                for c in range(1, table.row_len(r)):
+                    if column and (c >= len(header_lower) or column not in header_lower[c]):
+                        continue
+                    result = self._table_cell_result(table, pattern, labels[term_idx], r, c, 1.0)
+                    if result:
+                        results.append(result)
+
+            if column:
+                continue
+
+            # Column headers: numeric cells down the column
+            for c in range(1, len(header_lower)):
+                term_idx = self._find_label(header_lower[c], labels_lower)
+                if term_idx is None:
+                    continue
+                for r in range(1, len(table)):
+                    if c < table.row_len(r):
+                        result = self._table_cell_result(table, pattern, labels[term_idx], r, c, 0.9)
+                        if result:
+                            results.append(result)
+
+        return results
+
+    @staticmethod
+    def _find_label(cell_lower: str, labels_lower: list[str]) -> Optional[int]:
+        """Index of the first label contained in a lowercase cell."""
+        cell_lower = cell_lower.strip()
+        if not cell_lower:
+            return None
+        for idx, label in enumerate(labels_lower):
+            if label and label in cell_lower:
+                return idx
+        return None
+
+    def _table_cell_result(
+        self,
+        table: TableCells,
+        pattern: ExtractionPattern,
+        label: str,
+        r: int,
+        c: int,
+        weight: float
+    ) -> Optional[MatchResult]:
+        """Build the result for table cell (r, c) if it holds a number."""
+        raw_text = table.cell(r, c)
+        match = NUMBER_PATTERN.fullmatch(raw_text.strip())
+        if not match:
+            return None
+        value, multiplier = match.group(1), match.group(2)
+
+        return MatchResult(
+            value=value,
+            normalized_value=self._normalize_value(value, multiplier),
+            confidence=pattern.confidence * weight,
+            source=ExtractionSource(
+                page=table.page,
+                section=f"table {table.index + 1} row {r + 1} col {c + 1}",
+                context="\n".join(" | ".join(table.row(row)) for row in (0, r)),
+                matched_pattern=label,
+                raw_text=raw_text
+            ),
+            pattern_id=pattern.id
+        )
+
     def _context_match(
         self,
-        text: str,
+        view: DocumentView,
         pattern: ExtractionPattern,
         variations: dict[str, list[str]],
         rule: ExtractionRule
@@ -309,33 +807,34 @@ class RuleBasedExtractor:
         """Extract based on surrounding context patterns."""
         results = []
 
-        # Split into sentences/paragraphs
-        paragraphs = re.split(r'\n\n+', text)
-
         search_terms = [pattern.pattern.lower()]
         for mapping in rule.semantic_mappings:
             search_terms.append(mapping.canonical_term.lower())
             search_terms.extend([v.lower() for v in mapping.variations])
 
-        for para in paragraphs:
-            para_lower = para.lower()
-            for term in search_terms:
-                if term in para_lower:
-                    # Extract all numeric values from this paragraph
-                    values = re.findall(r'\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million)?', para)
-                    for value, multiplier in values:
-                        normalized = self._normalize_value(value, multiplier)
-                        results.append(MatchResult(
-                            value=value,
-                            normalized_value=normalized,
-                            confidence=pattern.confidence * 0.7,
-                            source=ExtractionSource(
-                                context=para[:300],
-                                matched_pattern=term,
-                                raw_text=f"{value}{multiplier or ''}"
-                            ),
-                            pattern_id=pattern.id
-                        ))
+        # Paragraphs containing each term, in document order
+        hits = sorted(
+            (para_idx, term_idx)
+            for term_idx, term in enumerate(search_terms)
+            for para_idx in view.paragraphs_with(term)
+        )
+
+        for para_idx, term_idx in hits:
+            context = view.paragraph(para_idx)[:300]
+            # All numeric values from this paragraph
+            for value, multiplier in view.paragraph_values(para_idx):
+                normalized = self._normalize_value(value, multiplier)
+                results.append(MatchResult(
+                    value=value,
+                    normalized_value=normalized,
+                    confidence=pattern.confidence * 0.7,
+                    source=ExtractionSource(
+                        context=context,
+                        matched_pattern=search_terms[term_idx],
+                        raw_text=f"{value}{multiplier or ''}"
+                    ),
+                    pattern_id=pattern.id
+                ))
 
         return results
 
@@ -347,7 +846,7 @@ class RuleBasedExtractor:
         window = text[window_start:window_end]
 
         # Find numeric values
-        matches = re.findall(r'\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million)?', window)
+        matches = NUMBER_PATTERN.findall(window)
         if matches:
             value, multiplier = matches[0]
             return value, self._normalize_value(value, multiplier)
@@ -356,7 +855,7 @@ class RuleBasedExtractor:
 
     def _extract_value_from_line(self, line: str) -> tuple[Optional[str], Optional[float]]:
         """Extract first numeric value from a line."""
-        match = re.search(r'\$?\s*([\d,]+(?:\.\d+)?)\s*([BMKbmk]|billion|million)?', line)
+        match = NUMBER_PATTERN.search(line)
         if match:
             value = match.group(1)
             multiplier = match.group(2)
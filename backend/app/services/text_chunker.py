@@ -0,0 +1,185 @@
+"""Token-budgeted chunking of document text for LLM prompts."""
+
+import logging
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
+
+# Context windows (tokens) by model name prefix; longest prefix wins
+MODEL_CONTEXT_TOKENS = {
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4-1106": 128_000,
+    "gpt-4-0125": 128_000,
+    "gpt-4-32k": 32_768,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4": 200_000,
+    "claude": 200_000,
+}
+DEFAULT_CONTEXT_TOKENS = 8_192
+
+# Blank lines separating paragraphs (and rendered tables)
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def context_window(model: str) -> int:
+    """Context window of a model, in tokens."""
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_TOKENS
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)]
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model: str):
+    """tiktoken encoding for a model, or None if unavailable (e.g. offline)."""
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Number of tokens in text for a model (len/4 without tiktoken)."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@dataclass
+class TextChunk:
+    """A piece of document text and its size in tokens."""
+    text: str
+    token_count: int
+
+
+class TokenChunker:
+    """Packs paragraphs into chunks of at most `max_tokens` tokens.
+
+    Paragraphs (and tables, which render as blocks of lines) are kept whole
+    where they fit; oversized ones are split by line and, as a last resort,
+    by tokens. Consecutive chunks share up to `overlap_tokens` of trailing
+    paragraphs so values near a boundary keep their context. Token counts
+    come from tiktoken, or len/4 when no encoding is available.
+    """
+
+    def __init__(self, model: str, max_tokens: int, overlap_tokens: int = 0):
+        self.encoding = _get_encoding(model)
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def chunk(self, text: str) -> list[TextChunk]:
+        """Split text into token-budgeted chunks."""
+        pieces = []
+        for paragraph in PARAGRAPH_BREAK.split(text):
+            if paragraph.strip():
+                pieces.extend(self._fit(paragraph))
+        if not pieces:
+            return [TextChunk(text=text, token_count=self.count(text))]
+        return self.pack(pieces)
+
+    def pack(
+        self,
+        pieces: list[tuple[str, int]],
+        separator: str = "\n\n",
+        overlap: bool = True
+    ) -> list[TextChunk]:
+        """Greedily pack (text, token count) pieces, carrying an overlap between chunks."""
+        separator_tokens = self.count(separator)
+        overlap_tokens = self.overlap_tokens if overlap else 0
+        chunks = []
+        current: list[tuple[str, int]] = []
+        current_tokens = 0
+
+        for piece, tokens in pieces:
+            if current and current_tokens + separator_tokens + tokens > self.max_tokens:
+                chunks.append(self._join(current, current_tokens, separator))
+                budget = min(overlap_tokens, self.max_tokens - tokens - separator_tokens)
+                current, current_tokens = self._overlap(current, separator_tokens, budget)
+            current_tokens += tokens + (separator_tokens if current else 0)
+            current.append((piece, tokens))
+
+        if current:
+            chunks.append(self._join(current, current_tokens, separator))
+        return chunks
+
+    def _join(self, pieces: list[tuple[str, int]], tokens: int, separator: str) -> TextChunk:
+        return TextChunk(text=separator.join(piece for piece, _ in pieces), token_count=tokens)
+
+    def _overlap(
+        self,
+        pieces: list[tuple[str, int]],
+        separator_tokens: int,
+        budget: int
+    ) -> tuple[list[tuple[str, int]], int]:
+        """Trailing pieces, up to `budget` tokens, to repeat at the start of the next chunk."""
+        kept: list[tuple[str, int]] = []
+        total = 0
+        for piece, tokens in reversed(pieces):
+            added = tokens + (separator_tokens if kept else 0)
+            if total + added > budget:
+                break
+            kept.insert(0, (piece, tokens))
+            total += added
+        return kept, total
+
+    def _fit(self, paragraph: str) -> list[tuple[str, int]]:
+        """Split a paragraph into pieces that each fit in one chunk."""
+        tokens = self.count(paragraph)
+        if tokens <= self.max_tokens:
+            return [(paragraph, tokens)]
+
+        lines = paragraph.split("\n")
+        if len(lines) > 1:
+            # Pack lines (e.g. table rows) into pieces that fit
+            pieces = []
+            for line in lines:
+                pieces.extend(self._fit(line))
+            return [(chunk.text, chunk.token_count) for chunk in self.pack(pieces, "\n", overlap=False)]
+
+        return self._split_tokens(paragraph)
+
+    def _split_tokens(self, text: str) -> list[tuple[str, int]]:
+        """Cut a single oversized line into max_tokens windows."""
+        if self.encoding is not None:
+            ids = self.encoding.encode(text, disallowed_special=())
+            return [
+                (self.encoding.decode(ids[start:start + self.max_tokens]), len(ids[start:start + self.max_tokens]))
+                for start in range(0, len(ids), self.max_tokens)
+            ]
+        size = self.max_tokens * 4
+        return [
+            (text[start:start + size], self.count(text[start:start + size]))
+            for start in range(0, len(text), size)
+        ]
@@ -17,6 +17,8 @@ from app.db.models import (
     AggregationType
 )
 from app.services.glossary_loader_db import get_glossary_loader_db
+from app.services.llm_clients import get_llm_clients
+from app.services.llm_scheduler import Priority, get_llm_scheduler
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -33,16 +35,9 @@ class WebhookProcessor:
 
     @property
     def openai_client(self):
-        """Lazy load OpenAI client."""
+        """Shared OpenAI client."""
         if self._openai_client is None:
-            try:
-                import openai
-                api_key = settings.openai_api_key
-                if not api_key:
-                    raise ValueError("OPENAI_API_KEY not configured. Please set it in .env file.")
-                self._openai_client = openai.OpenAI(api_key=api_key)
-            except ImportError:
-                raise ImportError("openai package not installed")
+            self._openai_client = get_llm_clients().openai()
         return self._openai_client
 
     def get_mapping_config(self, raw_metric_name: str) -> Optional[DBMetricMappingConfig]:
@@ -123,14 +118,22 @@ Respond with JSON in this format:
     "suggested_canonical_name": "if no match, suggest a canonical name for this metric"
 }}"""
 
-            response = self.openai_client.chat.completions.create(
-                model=settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a precise data mapping assistant. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=500
+            model = settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview"
+            system_prompt = "You are a precise data mapping assistant. Always respond with valid JSON."
+            scheduler = get_llm_scheduler()
+            response = scheduler.call(
+                "openai",
+                scheduler.estimate_tokens(model, 500, system_prompt, prompt),
+                Priority.WEBHOOK,
+                lambda: self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=500
+                ),
             )
 
             response_text = response.choices[0].message.content
@@ -251,14 +254,22 @@ Respond with JSON:
     "confidence": 0.0-1.0
 }}"""
 
-            response = self.openai_client.chat.completions.create(
-                model=settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview",
-                messages=[
-                    {"role": "system", "content": "You are a precise data validation assistant. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=200
+            model = settings.default_ai_model if "gpt" in settings.default_ai_model else "gpt-4-turbo-preview"
+            system_prompt = "You are a precise data validation assistant. Always respond with valid JSON."
+            scheduler = get_llm_scheduler()
+            response = scheduler.call(
+                "openai",
+                scheduler.estimate_tokens(model, 200, system_prompt, prompt),
+                Priority.WEBHOOK,
+                lambda: self.openai_client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=200
+                ),
             )
 
             response_text = response.choices[0].message.content
@@ -5,6 +5,7 @@ This script demonstrates the extraction flow and shows extracted data before app
 """
 
 import sys
+import asyncio
 import logging
 from pathlib import Path
 
@@ -52,7 +53,7 @@ def test_pdf_extraction(file_path: str):
         with open(file_path, "rb") as f:
             content = f.read()
         
-        doc = parser.parse(file_path.name, content)
+        doc = parser.parse(file_path.name, content, detect_tables=True)
         
         print(f"\n✓ Document parsed successfully!")
         print(f"  - Filename: {doc.filename}")
@@ -124,14 +125,14 @@ def test_pdf_extraction(file_path: str):
     print("-" * 80)
     
     try:
-        results = extraction_service.process_document(
+        results = asyncio.run(extraction_service.process_document(
             file_path=str(file_path),
             file_content=None,
             rules=[test_rule],
             method=ExtractionMethod.RULE_BASED,
             document_id="test",
             job_id="test-job-1"
-        )
+        ))
         
         print(f"\n✓ Rule-based extraction completed!")
         print(f"  - Results found: {len(results)}")
@@ -153,14 +154,14 @@ def test_pdf_extraction(file_path: str):
     print("-" * 80)
     
     try:
-        results = extraction_service.process_document(
+        results = asyncio.run(extraction_service.process_document(
             file_path=str(file_path),
             file_content=None,
             rules=[test_rule],
             method=ExtractionMethod.HYBRID,
             document_id="test",
             job_id="test-job-2"
-        )
+        ))
         
         print(f"\n✓ Hybrid extraction completed!")
         print(f"  - Results found: {len(results)}")
@@ -0,0 +1,45 @@
+"""Shared fixtures: keep caches and batch files out of the real data directories."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings
+from app.models import ExtractionPattern, ExtractionRule, SemanticMapping
+import app.services.llm_cache as llm_cache
+import app.services.llm_scheduler as llm_scheduler
+import app.services.parse_cache as parse_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """Fresh LLM cache, parse cache and rate limiter under tmp_path for every test."""
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(
+        llm_cache, "_llm_cache",
+        llm_cache.LLMResponseCache(tmp_path / "llm_cache.db", settings.llm_cache_ttl_seconds, settings.llm_cache_max_bytes),
+    )
+    monkeypatch.setattr(parse_cache, "_parse_cache", None)
+    monkeypatch.setattr(llm_scheduler, "_llm_scheduler", None)
+    yield
+
+
+def make_rule(rule_id: str, metric: str, variations: list[str] = (), patterns: list[tuple] = ()) -> ExtractionRule:
+    """Rule for `metric` with optional semantic variations and (type, pattern) patterns."""
+    return ExtractionRule(
+        id=rule_id,
+        name=metric,
+        description=f"{metric} reported in the document",
+        target_metric_id=f"metric-{rule_id}",
+        target_metric_name=metric,
+        patterns=[
+            ExtractionPattern(id=f"{rule_id}-p{idx}", type=pattern_type, pattern=pattern)
+            for idx, (pattern_type, pattern) in enumerate(patterns)
+        ],
+        semantic_mappings=[
+            SemanticMapping(id=f"{rule_id}-s", canonical_term=metric, variations=list(variations))
+        ] if variations else [],
+    )
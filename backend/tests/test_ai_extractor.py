@@ -0,0 +1,137 @@
+"""Concurrent chunk dispatch in AIExtractor, against a stub OpenAI client."""
+
+import asyncio
+import json
+import logging
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.models import AIConfig
+from app.services.ai_extractor import AIExtractor
+from app.services.document_parser import ParsedPage
+from app.services.text_chunker import count_tokens
+from tests.conftest import make_rule
+
+CHUNK_COUNT = 6
+PARAGRAPH = "revenue 2024 " + "filler " * 100
+# Room for one paragraph per chunk, with or without tiktoken's vocabularies
+CHUNK_TOKENS = int(count_tokens(f"CHUNK0 {PARAGRAPH}", "gpt-4o") * 1.5)
+
+
+class StubCompletions:
+    """chat.completions stand-in answering with the chunk number found in the prompt.
+
+    Later chunks answer faster, so completion order is the reverse of chunk order.
+    """
+
+    def __init__(self, fail_chunk=None):
+        self.fail_chunk = fail_chunk
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **body):
+        chunk = int(re.search(r"CHUNK(\d+)", body["messages"][-1]["content"]).group(1))
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01 * (CHUNK_COUNT - chunk))
+            if chunk == self.fail_chunk:
+                raise RuntimeError("upstream error")
+        finally:
+            self.in_flight -= 1
+        content = json.dumps({"results": [{"metric": {"value": chunk, "confidence": 0.9}, "source": {"raw_text": str(chunk), "context": "revenue"}}]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(total_tokens=100),
+        )
+
+
+def make_extractor(completions: StubCompletions) -> AIExtractor:
+    extractor = AIExtractor(AIConfig(provider="openai", model="gpt-4o", max_tokens=500))
+    extractor._async_openai_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return extractor
+
+
+def document() -> str:
+    return "\n\n".join(f"CHUNK{idx} {PARAGRAPH}" for idx in range(CHUNK_COUNT))
+
+
+@pytest.fixture(autouse=True)
+def send_every_chunk(monkeypatch):
+    monkeypatch.setattr(settings, "ai_relevance_top_k", 0)
+    monkeypatch.setattr(settings, "ai_chunk_overlap_tokens", 0)
+
+
+def test_results_follow_chunk_order_within_the_concurrency_limit(monkeypatch):
+    monkeypatch.setattr(settings, "ai_max_concurrent_requests", 2)
+    completions = StubCompletions()
+
+    results = asyncio.run(make_extractor(completions).extract(document(), make_rule("revenue", "Revenue"), CHUNK_TOKENS))
+
+    assert completions.calls == CHUNK_COUNT
+    assert completions.max_in_flight == 2
+    assert [result.value for result in results] == [float(idx) for idx in range(CHUNK_COUNT)]
+
+
+def test_limit_of_one_sends_chunks_serially(monkeypatch):
+    monkeypatch.setattr(settings, "ai_max_concurrent_requests", 1)
+    completions = StubCompletions()
+
+    asyncio.run(make_extractor(completions).extract(document(), make_rule("revenue", "Revenue"), CHUNK_TOKENS))
+
+    assert completions.max_in_flight == 1
+
+
+def test_failed_chunk_is_logged_and_others_are_kept(caplog):
+    completions = StubCompletions(fail_chunk=2)
+
+    with caplog.at_level(logging.WARNING, logger="app.services.ai_extractor"):
+        results = asyncio.run(make_extractor(completions).extract(document(), make_rule("revenue", "Revenue"), CHUNK_TOKENS))
+
+    assert [result.value for result in results] == [float(idx) for idx in range(CHUNK_COUNT) if idx != 2]
+    assert "upstream error" in caplog.text
+
+
+def test_prepared_chunks_are_sent_as_given():
+    completions = StubCompletions()
+    extractor = make_extractor(completions)
+    rules = [make_rule("revenue", "Revenue"), make_rule("enrollment", "Enrollment")]
+
+    prepared = extractor.prepare_chunks(document(), rules, CHUNK_TOKENS)
+    assert prepared["revenue"] == prepared["enrollment"]
+    assert len(prepared["revenue"]) == CHUNK_COUNT
+
+    results = asyncio.run(extractor.extract(document(), rules[0], chunks=prepared["revenue"][:2]))
+
+    assert completions.calls == 2
+    assert [result.value for result in results] == [0.0, 1.0]
+
+
+def test_streamed_pages_are_sent_for_every_rule_in_page_order(monkeypatch):
+    monkeypatch.setattr(settings, "ai_max_concurrent_requests", 3)
+    completions = StubCompletions()
+    rules = [make_rule("revenue", "Revenue"), make_rule("enrollment", "Enrollment")]
+    pages = (ParsedPage(number=idx + 1, text=f"CHUNK{idx} {PARAGRAPH}") for idx in range(CHUNK_COUNT))
+
+    results = asyncio.run(make_extractor(completions).extract_pages(pages, rules, CHUNK_TOKENS))
+
+    assert completions.calls == CHUNK_COUNT * len(rules)
+    assert completions.max_in_flight <= 3
+    for rule in rules:
+        assert [result.value for result in results[rule.id]] == [float(idx) for idx in range(CHUNK_COUNT)]
+
+
+def test_batch_leaves_out_rules_whose_requests_failed():
+    rules = [make_rule("revenue", "Revenue"), make_rule("enrollment", "Enrollment")]
+
+    # Failing first: successful responses are cached and would be reused
+    failed = asyncio.run(make_extractor(StubCompletions(fail_chunk=2)).extract_batch(document(), rules, CHUNK_TOKENS))
+    succeeded = asyncio.run(make_extractor(StubCompletions()).extract_batch(document(), rules, CHUNK_TOKENS))
+
+    assert set(succeeded) == {"revenue", "enrollment"}
+    assert failed == {}
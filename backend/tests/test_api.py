@@ -0,0 +1,93 @@
+"""Extraction API: parse queue back-pressure and compiled rule invalidation."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.core.config import settings
+from app.services.parse_executor import ParseExecutor
+from app.services.rule_extractor import RuleBasedExtractor
+
+API = settings.api_prefix
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Client for the extraction routes with a private rule store."""
+    monkeypatch.setattr(routes, "rules_db", dict(routes.rules_db))
+    app = FastAPI()
+    app.include_router(routes.router, prefix=API)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def full_executor(monkeypatch):
+    """Parse executor whose worker and queue slots are all taken."""
+    executor = ParseExecutor(workers=1, queue_size=1)
+    executor._in_flight = executor.max_in_flight
+    monkeypatch.setattr(routes, "parse_executor", executor)
+    return executor
+
+
+def extracted_values(rule_id: str, text: str) -> list[float]:
+    """Values the current version of a stored rule finds in text, via the shared compiled cache."""
+    extractor = RuleBasedExtractor(routes.compiled_rules)
+    return [match.normalized_value for match in extractor.extract(text, routes.rules_db[rule_id])]
+
+
+def test_extract_returns_503_with_retry_after_when_parse_queue_is_full(client, full_executor):
+    rule_id = next(iter(routes.rules_db))
+    response = client.post(
+        f"{API}/extract",
+        data={"rule_ids": rule_id, "method": "rule_based"},
+        files={"file": ("report.txt", b"Total Revenue: $1,000", "text/plain")},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    # Rejected requests do not take a slot
+    assert full_executor.in_flight == full_executor.max_in_flight
+
+
+def test_preview_returns_503_with_retry_after_when_parse_queue_is_full(client, full_executor):
+    response = client.post(
+        f"{API}/extract/preview",
+        files={"file": ("report.txt", b"Total Revenue: $1,000", "text/plain")},
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_rule_edits_recompile_cached_patterns(client):
+    created = client.post(f"{API}/rules", json={
+        "id": "rule-api-enrollment",
+        "name": "Enrollment",
+        "description": "Total enrollment",
+        "target_metric_id": "metric-enrollment",
+        "target_metric_name": "Enrollment",
+        "patterns": [{"id": "p-label", "type": "label_value", "pattern": "Enrollment"}],
+    }).json()
+    rule_id = created["id"]
+
+    # Compile and cache the rule before editing it
+    assert extracted_values(rule_id, "Headcount: 5,000") == []
+
+    # Adding a mapping edits the stored rule in place
+    response = client.post(f"{API}/rules/{rule_id}/mappings", json={
+        "id": "sem-headcount",
+        "canonical_term": "Enrollment",
+        "variations": ["Headcount"],
+    })
+    assert response.status_code == 200
+    assert extracted_values(rule_id, "Headcount: 5,000") == [5000]
+
+    # A client echoing the rule back keeps the old updated_at; the server bumps it
+    edited = dict(created, patterns=[{"id": "p-label", "type": "label_value", "pattern": "Students"}])
+    response = client.put(f"{API}/rules/{rule_id}", json=edited)
+    assert response.status_code == 200
+    assert response.json()["updated_at"] != created["updated_at"]
+    assert extracted_values(rule_id, "Students: 700") == [700]
+    assert extracted_values(rule_id, "Headcount: 5,000") == []
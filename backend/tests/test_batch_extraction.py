@@ -0,0 +1,116 @@
+"""End-to-end batch extraction through the file-based batch provider."""
+
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import AIConfig
+from app.services.ai_extractor import AIExtractor
+from app.services.batch_extraction import BatchError, BatchExtractionRunner, LocalFileBatchProvider
+from tests.conftest import make_rule
+
+DOCUMENTS = {
+    f"doc-{idx}": f"Annual report {idx}\n\nTotal revenue was ${idx + 1}.5M in 2024.\n\nEnrollment: {1000 * (idx + 1)} students."
+    for idx in range(3)
+}
+
+
+def batch_documents(rules):
+    for document_id, text in DOCUMENTS.items():
+        yield document_id, text, rules
+
+
+def answer(prompt: str) -> str:
+    """Model response reporting the dollar amount found in the prompt's document text."""
+    amount = re.findall(r"\$(\d+\.\d)M", prompt)[-1]
+    return json.dumps({"results": [{
+        "metric": {"value": float(amount) * 1e6, "confidence": 0.9},
+        "source": {"raw_text": f"${amount}M", "context": "Total revenue", "page_number": 1},
+    }]})
+
+
+@pytest.mark.parametrize("provider_name", ["openai", "anthropic"])
+def test_local_batch_round_trip(tmp_path, provider_name):
+    bodies = []
+
+    def responder(body):
+        bodies.append(body)
+        return answer(body["messages"][-1]["content"])
+
+    extractor = AIExtractor(AIConfig(provider=provider_name))
+    provider = LocalFileBatchProvider(tmp_path / "batches", responder, api=provider_name)
+    runner = BatchExtractionRunner(extractor, provider, work_dir=tmp_path / "work", poll_interval=0.01, timeout=5)
+    rules = [make_rule("revenue", "Total Revenue")]
+
+    results = asyncio.run(runner.run(batch_documents(rules)))
+
+    assert len(bodies) == len(DOCUMENTS)
+    if provider_name == "anthropic":
+        assert all("system" in body and body["model"] == extractor.config.model for body in bodies)
+    else:
+        assert all(body["messages"][0]["role"] == "system" for body in bodies)
+    assert {
+        document_id: [result.value for result in by_rule["revenue"]] for document_id, by_rule in results.items()
+    } == {"doc-0": [1.5e6], "doc-1": [2.5e6], "doc-2": [3.5e6]}
+    # The input file is removed once the provider has it
+    assert not list((tmp_path / "work").iterdir())
+
+    # A second run is served entirely from the LLM response cache
+    bodies.clear()
+    cached = asyncio.run(runner.run(batch_documents(rules)))
+    assert bodies == []
+    assert cached == results
+
+
+def test_documents_without_rules_send_no_requests(tmp_path):
+    bodies = []
+    provider = LocalFileBatchProvider(tmp_path / "batches", lambda body: bodies.append(body) or "{}")
+    runner = BatchExtractionRunner(AIExtractor(AIConfig(provider="openai")), provider, work_dir=tmp_path / "work")
+
+    results = asyncio.run(runner.run(batch_documents([])))
+
+    assert bodies == []
+    assert results == {document_id: {} for document_id in DOCUMENTS}
+
+
+def test_unanswered_batch_times_out_and_is_cancelled(tmp_path):
+    # Without a responder nothing ever writes output.jsonl
+    provider = LocalFileBatchProvider(tmp_path / "batches")
+    runner = BatchExtractionRunner(
+        AIExtractor(AIConfig(provider="openai")), provider, work_dir=tmp_path / "work", poll_interval=0.01, timeout=0.05
+    )
+
+    with pytest.raises(BatchError, match="did not complete"):
+        asyncio.run(runner.run(batch_documents([make_rule("revenue", "Total Revenue")])))
+
+
+def test_failed_batch_requests_are_sent_directly(tmp_path):
+    direct_prompts = []
+
+    async def create(**body):
+        prompt = body["messages"][-1]["content"]
+        direct_prompts.append(prompt)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=answer(prompt)), finish_reason="stop")],
+            usage=SimpleNamespace(total_tokens=100),
+        )
+
+    def responder(body):
+        prompt = body["messages"][-1]["content"]
+        # The provider reports doc-1's request as failed
+        return None if "Annual report 1" in prompt else answer(prompt)
+
+    extractor = AIExtractor(AIConfig(provider="openai"))
+    extractor._async_openai_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    provider = LocalFileBatchProvider(tmp_path / "batches", responder)
+    runner = BatchExtractionRunner(extractor, provider, work_dir=tmp_path / "work", poll_interval=0.01, timeout=5)
+
+    results = asyncio.run(runner.run(batch_documents([make_rule("revenue", "Total Revenue")])))
+
+    assert len(direct_prompts) == 1 and "Annual report 1" in direct_prompts[0]
+    assert {
+        document_id: [result.value for result in by_rule["revenue"]] for document_id, by_rule in results.items()
+    } == {"doc-0": [1.5e6], "doc-1": [2.5e6], "doc-2": [3.5e6]}
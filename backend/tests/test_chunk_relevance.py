@@ -0,0 +1,49 @@
+"""Chunk relevance filter: top-k selection and the keep-all fallback."""
+
+from app.services.chunk_relevance import ChunkRelevanceFilter, rule_terms
+from app.services.text_chunker import TextChunk
+from tests.conftest import make_rule
+
+CHUNKS = [
+    "Campus history and mission statement, founded 1890.",
+    "Fall enrollment reached 45,000 students.",
+    "Total revenue was $1.2 billion.",
+    "Total enrolment 12,000 (headcount), enrollment up 3%.",
+    "Enrollment figures are discussed in the next section.",
+]
+
+
+def relevance_filter(top_k: int) -> ChunkRelevanceFilter:
+    return ChunkRelevanceFilter([TextChunk(text, 10) for text in CHUNKS], top_k=top_k)
+
+
+def selected(top_k: int, terms: list[str]) -> list[int]:
+    return [CHUNKS.index(chunk.text) for chunk in relevance_filter(top_k).select(terms)]
+
+
+def test_top_k_keeps_best_chunks_in_document_order():
+    # Chunk 3 names the metric twice (once misspelled), chunk 1 once
+    assert selected(2, ["enrollment", "total enrollment"]) == [1, 3]
+
+
+def test_chunks_without_digits_never_score():
+    relevance = relevance_filter(5)
+    # Chunk 4 names the metric but holds no value
+    assert relevance.score(4, ["enrollment"]) == 0
+    assert relevance.score(1, ["enrollment"]) == 100
+
+
+def test_no_hits_keeps_every_chunk():
+    assert selected(1, ["endowment"]) == list(range(len(CHUNKS)))
+
+
+def test_small_documents_and_disabled_filter_keep_every_chunk():
+    assert selected(0, ["enrollment"]) == list(range(len(CHUNKS)))
+    assert selected(len(CHUNKS), ["enrollment"]) == list(range(len(CHUNKS)))
+    assert selected(1, []) == list(range(len(CHUNKS)))
+
+
+def test_rule_terms_are_lowercase_and_unique():
+    rule = make_rule("enrollment", "Enrollment", variations=["Headcount", "enrollment", " "])
+
+    assert rule_terms(rule) == ["enrollment", "headcount"]
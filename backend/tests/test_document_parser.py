@@ -0,0 +1,126 @@
+"""Spreadsheet parsing: streamed Excel sheets and column-oriented CSV tables."""
+
+import io
+
+import numpy as np
+import openpyxl
+
+from app.core.config import settings
+from app.services.document_parser import DocumentParser, table_rows
+from app.services.document_view import DocumentView
+
+
+def xlsx(sheets: dict[str, list[list]]) -> bytes:
+    """Workbook bytes with one sheet per (title, rows) item."""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def parse(filename: str, content: bytes):
+    return DocumentParser().parse(filename, content=content, use_cache=False)
+
+
+SHEETS = {
+    "Finance": [["Metric", "2023", "2024"], ["Total Revenue", 1200.0, 1350.5], [None, None, None], ["Expenses", 800, 900]],
+    "Students": [["Term", "Enrollment"], ["Fall", 45000]],
+}
+
+
+def test_streamed_excel_keeps_one_table_per_sheet():
+    doc = parse("book.xlsx", xlsx(SHEETS))
+
+    assert doc.metadata["parser"] == "openpyxl (read-only)"
+    assert doc.metadata["sheet_count"] == 2
+    assert [table["sheet"] for table in doc.tables] == ["Finance", "Students"]
+    assert doc.tables[0]["headers"] == ["Metric", "2023", "2024"]
+    # Blank rows are dropped
+    assert doc.tables[0]["data"] == [["Total Revenue", 1200, 1350.5], ["Expenses", 800, 900]]
+    assert doc.pages[0] == (
+        "--- Sheet: Finance ---\nMetric\t2023\t2024\nTotal Revenue\t1200\t1350.5\nExpenses\t800\t900"
+    )
+    assert doc.pages[1] == "--- Sheet: Students ---\nTerm\tEnrollment\nFall\t45000"
+
+
+def test_streamed_excel_caps_text_rows_but_keeps_every_table_row(monkeypatch):
+    monkeypatch.setattr(settings, "excel_text_row_cap", 2)
+    rows = [["Year", "Value"]] + [[2000 + idx, idx * 10] for idx in range(5)]
+
+    doc = parse("book.xlsx", xlsx({"Data": rows}))
+
+    assert len(doc.tables[0]["data"]) == 5
+    assert doc.pages[0].splitlines()[-1] == "... (3 more rows)"
+    assert "2002\t20" not in doc.pages[0]
+    assert doc.metadata["text_truncated_sheets"] == ["Data"]
+
+
+def test_streamed_and_pandas_excel_tables_agree(monkeypatch):
+    content = xlsx({"Finance": [row for row in SHEETS["Finance"] if any(row)]})
+    streamed = parse("book.xlsx", content)
+
+    monkeypatch.setattr(settings, "excel_streaming", False)
+    loaded = parse("book.xlsx", content)
+
+    assert "parser" not in loaded.metadata
+    assert loaded.tables[0]["headers"] == streamed.tables[0]["headers"]
+    assert loaded.tables[0]["data"] == streamed.tables[0]["data"]
+
+
+CSV_CONTENT = b"Term,Enrollment,Revenue\nFall 2023,45000,1200.0\nSpring 2024,43000,1350.5\nFall 2024,46000,1400.0\n"
+
+
+def test_csv_is_read_in_chunks_into_column_arrays(monkeypatch):
+    monkeypatch.setattr(settings, "csv_chunk_rows", 2)
+
+    doc = parse("report.csv", CSV_CONTENT)
+
+    table = doc.tables[0]
+    assert table["headers"] == ["Term", "Enrollment", "Revenue"]
+    assert table["row_count"] == 3
+    assert all(isinstance(column, np.ndarray) for column in table["columns"])
+    assert table["columns"][1].tolist() == [45000, 43000, 46000]
+    assert table_rows(table) == [
+        ["Fall 2023", 45000, 1200.0],
+        ["Spring 2024", 43000, 1350.5],
+        ["Fall 2024", 46000, 1400.0],
+    ]
+
+
+def test_csv_text_is_capped_but_columns_keep_every_row(monkeypatch):
+    monkeypatch.setattr(settings, "csv_chunk_rows", 2)
+    monkeypatch.setattr(settings, "csv_text_row_cap", 1)
+
+    doc = parse("report.csv", CSV_CONTENT)
+
+    assert doc.metadata == {"row_count": 3, "text_truncated": True}
+    assert "Fall 2023" in doc.text
+    assert "Spring 2024" not in doc.text
+    assert doc.text.endswith("... (2 more rows)")
+    assert len(doc.tables[0]["columns"][0]) == 3
+
+
+def test_header_only_csv_has_empty_columns():
+    doc = parse("report.csv", b"Term,Enrollment\n")
+
+    assert doc.tables[0]["headers"] == ["Term", "Enrollment"]
+    assert doc.tables[0]["row_count"] == 0
+    assert table_rows(doc.tables[0]) == []
+
+
+def test_csv_table_cells_format_numpy_scalars_like_python_values():
+    doc = parse("report.csv", CSV_CONTENT)
+
+    table = DocumentView.from_document(doc).tables[0]
+
+    assert isinstance(doc.tables[0]["columns"][2][0], np.floating)
+    assert table.row(0) == ["Term", "Enrollment", "Revenue"]
+    # Integral floats drop ".0", as format_cell does for Python floats
+    assert table.row(1) == ["Fall 2023", "45000", "1200"]
+    assert table.row(2) == ["Spring 2024", "43000", "1350.5"]
+    assert table.cells_with("46000") == [(3, 1)]
@@ -0,0 +1,83 @@
+"""ExtractionService orchestration against a stub AI extractor."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import ExtractionMethod, ExtractionSource, MetricDomain
+from app.services.ai_extractor import AIExtractionResult
+from app.services.extraction_service import ExtractionService
+from tests.conftest import make_rule
+
+TEXT = b"Revenue grew this year.\n\nEnrollment was stable."
+
+
+def ai_result(value: float) -> AIExtractionResult:
+    return AIExtractionResult(
+        value=value,
+        raw_text=str(value),
+        confidence=0.9,
+        fiscal_year=2024,
+        notes=None,
+        source=ExtractionSource(context="stub", raw_text=str(value)),
+    )
+
+
+class StubAIExtractor:
+    """Batched requests fail for `failing` rules; per-rule requests always succeed."""
+
+    def __init__(self, failing: set[str]):
+        self.failing = failing
+        self.per_rule_calls = []
+
+    async def extract_batch(self, text, rules, chunk_tokens=None, glossary_metrics=None):
+        return {rule.id: [ai_result(1.0)] for rule in rules if rule.id not in self.failing}
+
+    def prepare_chunks(self, text, rules, chunk_tokens=None, glossary_metrics=None):
+        return {rule.id: [] for rule in rules}
+
+    async def extract(self, text, rule, chunk_tokens=None, glossary_metric=None, chunks=None):
+        self.per_rule_calls.append(rule.id)
+        return [ai_result(2.0)]
+
+
+@pytest.fixture
+def service():
+    service = ExtractionService()
+    service.ai_config.batch_metrics = True
+    return service
+
+
+def test_rules_missing_from_a_batched_result_fall_back_to_per_rule_prompts(service):
+    service.ai_extractor = StubAIExtractor(failing={"enrollment"})
+    rules = [make_rule("revenue", "Revenue"), make_rule("enrollment", "Enrollment")]
+
+    results = asyncio.run(service.process_document(
+        "report.txt", TEXT, rules, ExtractionMethod.AI, "doc-1", "job-1", preview_only=True
+    ))
+
+    assert service.ai_extractor.per_rule_calls == ["enrollment"]
+    assert sorted((r.rule_id, r.normalized_value) for r in results) == [("enrollment", 2.0), ("revenue", 1.0)]
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.saves = []
+
+    def save_extracted_fact(self, fact):
+        self.saves.append((fact.metric_id, threading.current_thread()))
+
+
+def test_facts_are_saved_off_the_event_loop(service):
+    service.ai_extractor = StubAIExtractor(failing=set())
+    service.data_storage = RecordingStorage()
+    metric = SimpleNamespace(domain=MetricDomain.OPERATIONS, unit="USD", canonical_name="Metric", dimensions=None)
+    service.glossary_loader = SimpleNamespace(get_metric=lambda metric_id: metric)
+    rules = [make_rule("revenue", "Revenue"), make_rule("enrollment", "Enrollment")]
+
+    asyncio.run(service.process_document("report.txt", TEXT, rules, ExtractionMethod.AI, "doc-1", "job-1"))
+
+    assert sorted(metric_id for metric_id, _ in service.data_storage.saves) == ["metric-enrollment", "metric-revenue"]
+    assert all(thread is not threading.main_thread() for _, thread in service.data_storage.saves)
@@ -0,0 +1,140 @@
+"""LLM response cache: hits, misses, expiry, eviction and key invalidation."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.llm_cache as llm_cache
+from app.core.config import settings
+from app.models import AIConfig
+from app.services.ai_extractor import AIExtractor
+from app.services.llm_cache import LLMResponseCache
+
+KEY_ARGS = {
+    "provider": "openai",
+    "model": "gpt-4o",
+    "temperature": 0.1,
+    "max_tokens": 4096,
+    "prompt": "Extract revenue",
+    "system_prompt": "You are an extractor",
+}
+
+
+def test_miss_then_hit(tmp_path):
+    cache = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=60, max_bytes=1 << 20)
+    key = cache.make_key(**KEY_ARGS)
+
+    assert cache.get(key) is None
+    cache.put(key, "response")
+    assert cache.get(key) == "response"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_survive_a_restart(tmp_path):
+    key = LLMResponseCache.make_key(**KEY_ARGS)
+    LLMResponseCache(tmp_path / "cache.db", 60, 1 << 20).put(key, "response")
+
+    assert LLMResponseCache(tmp_path / "cache.db", 60, 1 << 20).get(key) == "response"
+
+
+def test_expired_entries_miss(tmp_path, monkeypatch):
+    cache = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=60, max_bytes=1 << 20)
+    key = cache.make_key(**KEY_ARGS)
+    now = 1_000_000.0
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now)
+    cache.put(key, "response")
+
+    now += 61
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=3600, max_bytes=25)
+    clock = iter(range(1_000_000, 1_000_100))
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(clock)))
+
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    cache.get("a")  # "b" is now least recently used
+    cache.put("c", "x" * 10)
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] <= 25
+
+
+def test_hits_queue_their_touches_instead_of_writing(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "TOUCH_FLUSH_THRESHOLD", 3)
+    cache = LLMResponseCache(tmp_path / "cache.db", ttl_seconds=3600, max_bytes=1 << 20)
+    for key in ("a", "b", "c"):
+        cache.put(key, "response")
+    changes = cache._conn.total_changes
+
+    cache.get("a")
+    cache.get("b")
+    assert cache._conn.total_changes == changes
+    assert not cache._conn.in_transaction
+
+    # The third queued touch flushes all of them in one commit
+    cache.get("c")
+    assert cache._conn.total_changes == changes + 3
+    assert not cache._conn.in_transaction
+
+
+@pytest.mark.parametrize("field,value", [
+    ("provider", "anthropic"),
+    ("model", "gpt-4o-mini"),
+    ("temperature", 0.2),
+    ("max_tokens", 1024),
+    ("prompt", "Extract enrollment"),
+    ("system_prompt", None),
+])
+def test_any_request_parameter_changes_the_key(field, value):
+    assert LLMResponseCache.make_key(**{**KEY_ARGS, field: value}) != LLMResponseCache.make_key(**KEY_ARGS)
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **body):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer {self.calls}"), finish_reason="stop")],
+            usage=SimpleNamespace(total_tokens=10),
+        )
+
+
+def call(config: AIConfig, completions: CountingCompletions, prompt: str = "Extract revenue") -> str:
+    extractor = AIExtractor(config)
+    extractor._async_openai_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return asyncio.run(extractor._call_openai(prompt))
+
+
+def test_extractor_serves_repeated_prompts_from_cache():
+    completions = CountingCompletions()
+    config = AIConfig(provider="openai", model="gpt-4o")
+
+    assert call(config, completions) == "answer 1"
+    assert call(config, completions) == "answer 1"
+    assert completions.calls == 1
+
+    # A different prompt or sampling setting is a new request
+    assert call(config, completions, "Extract enrollment") == "answer 2"
+    assert call(config.model_copy(update={"temperature": 0.5}), completions) == "answer 3"
+    assert completions.calls == 3
+
+
+def test_extractor_calls_every_time_when_cache_is_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_enabled", False)
+    completions = CountingCompletions()
+    config = AIConfig(provider="openai", model="gpt-4o")
+
+    call(config, completions)
+    call(config, completions)
+
+    assert completions.calls == 2
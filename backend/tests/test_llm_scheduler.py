@@ -0,0 +1,190 @@
+"""LLM scheduler: per-provider budgets and priority order."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services import llm_scheduler
+from app.services.llm_scheduler import LLMScheduler, Priority
+
+# 600 requests per minute refills one request every 0.1s
+FAST_RPM = 600
+
+
+class ProviderError(Exception):
+    """Stand-in for an SDK error carrying an HTTP status."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Usage:
+    total_tokens = 100
+
+
+class Response:
+    usage = Usage()
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "llm_max_retries", 2)
+    monkeypatch.setattr(llm_scheduler, "RETRY_INITIAL_DELAY_SECONDS", 0.01)
+
+
+def failing(*statuses):
+    """A send() that raises ProviderError for each status in turn, then returns a Response."""
+    remaining = list(statuses)
+
+    def send():
+        if remaining:
+            raise ProviderError(remaining.pop(0))
+        return Response()
+    return send
+
+
+async def acquire_all(scheduler, requests):
+    """Queue (label, provider, tokens, priority) requests in order; return labels in grant order."""
+    granted = []
+
+    async def acquire(label, provider, tokens, priority):
+        await scheduler.acquire_async(provider, tokens, priority)
+        granted.append(label)
+
+    tasks = []
+    for request in requests:
+        tasks.append(asyncio.create_task(acquire(*request)))
+        await asyncio.sleep(0)  # enqueue in this order
+    await asyncio.gather(*tasks)
+    return granted
+
+
+def test_requests_within_budget_are_granted_immediately():
+    scheduler = LLMScheduler(requests_per_minute=5, tokens_per_minute=0)
+    started = time.monotonic()
+    for _ in range(5):
+        scheduler.acquire("openai", 100)
+    assert time.monotonic() - started < 0.5
+    assert scheduler.stats()["granted"] == 5
+
+
+def test_request_budget_throttles():
+    scheduler = LLMScheduler(requests_per_minute=FAST_RPM, tokens_per_minute=0)
+    for _ in range(FAST_RPM):
+        scheduler.acquire("openai", 1)
+
+    started = time.monotonic()
+    scheduler.acquire("openai", 1)
+    assert time.monotonic() - started >= 0.05
+
+
+def test_token_budget_throttles_and_settle_refunds():
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=600)
+    scheduler.acquire("openai", 600)
+    # The response used only 100 of the 600 reserved tokens
+    scheduler.settle("openai", 600, 100)
+
+    started = time.monotonic()
+    scheduler.acquire("openai", 500)
+    assert time.monotonic() - started < 0.5
+
+
+def test_interactive_requests_go_before_background_ones():
+    scheduler = LLMScheduler(requests_per_minute=FAST_RPM, tokens_per_minute=0)
+    for _ in range(FAST_RPM):
+        scheduler.acquire("openai", 1)
+
+    granted = asyncio.run(acquire_all(scheduler, [
+        ("background-1", "openai", 1, Priority.BACKGROUND),
+        ("webhook", "openai", 1, Priority.WEBHOOK),
+        ("background-2", "openai", 1, Priority.BACKGROUND),
+        ("interactive", "openai", 1, Priority.INTERACTIVE),
+    ]))
+
+    assert granted == ["interactive", "webhook", "background-1", "background-2"]
+
+
+def test_exhausted_provider_does_not_block_another():
+    scheduler = LLMScheduler(requests_per_minute=1, tokens_per_minute=0)
+    scheduler.acquire("openai", 1)
+
+    async def main():
+        waiting = asyncio.create_task(scheduler.acquire_async("openai", 1))
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(scheduler.acquire_async("anthropic", 1), timeout=1)
+        assert not waiting.done()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+    # The cancelled ticket left the queue
+    assert scheduler.stats()["waiting"] == {}
+
+
+def test_blocking_acquire_refuses_to_run_on_the_event_loop():
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+
+    async def main():
+        scheduler.acquire("openai", 1)
+
+    with pytest.raises(RuntimeError, match="event loop"):
+        asyncio.run(main())
+
+
+def test_failed_call_refunds_its_reservation(fast_retries):
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=600)
+
+    with pytest.raises(ProviderError):
+        scheduler.call("openai", 600, Priority.INTERACTIVE, failing(400))
+
+    started = time.monotonic()
+    scheduler.acquire("openai", 600)
+    assert time.monotonic() - started < 0.5
+
+
+def test_transient_errors_are_retried_through_the_budgets(fast_retries):
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+
+    response = scheduler.call("openai", 10, Priority.INTERACTIVE, failing(429, 503))
+
+    assert isinstance(response, Response)
+    # Every attempt took its own request slot
+    assert scheduler.stats()["granted"] == 3
+    assert scheduler.stats()["retried"] == 2
+
+
+def test_retries_stop_after_max_retries(fast_retries):
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=0)
+
+    with pytest.raises(ProviderError):
+        scheduler.call("openai", 10, Priority.INTERACTIVE, failing(500, 500, 500))
+    assert scheduler.stats()["granted"] == 3
+
+
+def test_async_call_retries_and_refunds(fast_retries):
+    scheduler = LLMScheduler(requests_per_minute=0, tokens_per_minute=600)
+    send = failing(429)
+
+    async def send_async():
+        return send()
+
+    response = asyncio.run(scheduler.call_async("openai", 600, Priority.INTERACTIVE, send_async))
+
+    assert isinstance(response, Response)
+    assert scheduler.stats()["granted"] == 2
+    # The failed attempt was refunded in full and the successful one settled at 100 of 600
+    started = time.monotonic()
+    scheduler.acquire("openai", 500)
+    assert time.monotonic() - started < 0.5
+
+
+def test_retry_delay_honours_retry_after():
+    error = ProviderError(429)
+    error.response = type("HTTPResponse", (), {"headers": {"retry-after": "2"}})()
+    assert llm_scheduler.retry_delay(0, error) == 2.0
+    assert llm_scheduler.is_retryable(error)
+    assert not llm_scheduler.is_retryable(ProviderError(401))
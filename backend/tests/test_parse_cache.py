@@ -0,0 +1,104 @@
+"""Parse cache: content-addressed keys, cache hits, and LRU eviction."""
+
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.services.document_parser import DocumentParser, ParsedDocument
+from app.services.parse_cache import ParseCache, get_parse_cache
+
+CSV_CONTENT = b"Metric,2023\nRevenue,100\nExpenses,80\n"
+
+
+@pytest.fixture
+def counting_parser(monkeypatch):
+    """DocumentParser whose parse_calls list records every real (uncached) parse."""
+    parser = DocumentParser()
+    parser.parse_calls = []
+    parse_content = parser._parse_content
+
+    def recording_parse_content(filename, *args):
+        parser.parse_calls.append(filename)
+        return parse_content(filename, *args)
+
+    monkeypatch.setattr(parser, "_parse_content", recording_parse_content)
+    return parser
+
+
+def make_doc(name: str, text: str) -> ParsedDocument:
+    return ParsedDocument.from_pages(name, "text", pages=[text], tables=[], metadata={})
+
+
+def test_key_covers_content_and_options():
+    key = ParseCache.make_key(b"content", "7", "pdf", False)
+
+    assert ParseCache.make_key(b"content", "7", "pdf", False) == key
+    assert ParseCache.make_key(b"other content", "7", "pdf", False) != key
+    assert ParseCache.make_key(b"content", "8", "pdf", False) != key
+    assert ParseCache.make_key(b"content", "7", "pdf", True) != key
+    # Parts are delimited, so shifting text between them changes the key
+    assert ParseCache.make_key(b"content", "7p", "df", False) != key
+
+
+def test_same_content_is_parsed_once(counting_parser):
+    first = counting_parser.parse("report.csv", content=CSV_CONTENT)
+    second = counting_parser.parse("renamed.csv", content=CSV_CONTENT)
+
+    assert counting_parser.parse_calls == ["report.csv"]
+    assert second.text == first.text
+    # A hit under another upload name reports the new name
+    assert second.filename == "renamed.csv"
+
+
+def test_parser_version_and_options_change_the_key(counting_parser, monkeypatch):
+    counting_parser.parse("report.csv", content=CSV_CONTENT)
+
+    monkeypatch.setattr(DocumentParser, "PARSER_VERSION", DocumentParser.PARSER_VERSION + "-next")
+    counting_parser.parse("report.csv", content=CSV_CONTENT)
+
+    monkeypatch.setattr(settings, "csv_text_row_cap", settings.csv_text_row_cap + 1)
+    counting_parser.parse("report.csv", content=CSV_CONTENT)
+
+    counting_parser.parse("report.csv", content=CSV_CONTENT, use_cache=False)
+
+    assert len(counting_parser.parse_calls) == 4
+
+
+def test_table_parse_satisfies_a_text_only_pdf_request():
+    cache = get_parse_cache()
+    content = b"%PDF-1.4 not really parsed"
+    doc = make_doc("report.pdf", "cached with tables")
+    cache.put(cache.make_key(content, DocumentParser.PARSER_VERSION, "pdf", True), doc)
+
+    result = DocumentParser().parse("report.pdf", content=content, detect_tables=False)
+
+    assert result.text == "cached with tables"
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ParseCache(tmp_path / "cache", max_bytes=10 ** 9)
+    cache.put("a", make_doc("a.txt", "a" * 1000))
+    entry_bytes = os.path.getsize(cache._path("a"))
+    # Room for two entries, not three
+    cache.max_bytes = entry_bytes * 2 + entry_bytes // 2
+
+    cache.put("b", make_doc("b.txt", "b" * 1000))
+    os.utime(cache._path("a"), (1000, 1000))
+    os.utime(cache._path("b"), (2000, 2000))
+    # Reading "a" makes it the most recently used entry
+    assert cache.get("a").filename == "a.txt"
+
+    cache.put("c", make_doc("c.txt", "c" * 1000))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_unreadable_entry_is_discarded(tmp_path):
+    cache = ParseCache(tmp_path / "cache", max_bytes=10 ** 9)
+    cache._path("broken").write_bytes(b"not a compressed pickle")
+
+    assert cache.get("broken") is None
+    assert not cache._path("broken").exists()
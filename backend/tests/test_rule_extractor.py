@@ -0,0 +1,198 @@
+"""Single-pass multi-rule scanning must match rule-by-rule extraction."""
+
+from datetime import timedelta
+
+import pytest
+
+from app.api.mock_data import MOCK_RULES
+from app.models import PatternType
+from app.services.document_parser import ParsedDocument, ParsedPage
+from app.services.document_view import DocumentView
+from app.services.rule_extractor import RuleBasedExtractor
+from tests.conftest import make_rule
+
+DOCUMENTS = [
+    "Total Revenue: $1,234,567\nTotal Operating Revenue: $2.5M\nRevenues 345,000 thousand\n",
+    "Fall enrollment: 45,000 students\n\nRetention rate 92.5%\nEnrollment of 12,000 in 2023.",
+    "Net Income (1,200) million; total revenue $9.8 billion.\nRevenue\n  4,500\nrevenue revenue revenue",
+    "No figures here at all.",
+    "",
+]
+
+EXTRA_RULES = [
+    # Overlapping terms: one rule's label is a prefix of another's
+    make_rule(
+        "revenue",
+        "Revenue",
+        variations=["Revenues", "Total Revenue"],
+        patterns=[
+            (PatternType.EXACT, "revenue"),
+            (PatternType.LABEL_VALUE, "Revenue"),
+            (PatternType.LABEL_VALUE, "Total Revenue"),
+            (PatternType.FUZZY, "Total Revenue"),
+            (PatternType.REGEX, r"Revenue[:\s]+\$?([\d,]+)"),
+        ],
+    ),
+    make_rule(
+        "operating",
+        "Total Operating Revenue",
+        patterns=[(PatternType.LABEL_VALUE, "Total Operating Revenue"), (PatternType.EXACT, "Total Operating")],
+    ),
+    make_rule("income", "Net Income", patterns=[(PatternType.LABEL_VALUE, "Net Income"), (PatternType.CONTEXT, "income")]),
+    make_rule("empty", "Empty", patterns=[(PatternType.EXACT, "")]),
+]
+
+
+def summary(matches):
+    return [
+        (m.pattern_id, m.value, m.normalized_value, round(m.confidence, 6), m.source.raw_text, m.source.context)
+        for m in matches
+    ]
+
+
+@pytest.mark.parametrize("text", DOCUMENTS)
+def test_extract_many_matches_per_rule_extraction(text):
+    rules = MOCK_RULES + EXTRA_RULES
+    extractor = RuleBasedExtractor()
+
+    scanned = extractor.extract_many(DocumentView(text), rules)
+
+    assert set(scanned) == {rule.id for rule in rules}
+    for rule in rules:
+        assert summary(scanned[rule.id]) == summary(RuleBasedExtractor().extract(text, rule)), rule.id
+
+
+def test_matcher_is_rebuilt_when_a_rule_is_updated():
+    extractor = RuleBasedExtractor()
+    text = DOCUMENTS[0]
+    rule = EXTRA_RULES[1]
+
+    before = extractor.extract_many(text, [rule])[rule.id]
+    # Rule edits bump updated_at, which keys the cached matcher
+    changed = rule.model_copy(update={
+        "patterns": [p.model_copy(update={"pattern": "Revenues"}) for p in rule.patterns[:1]],
+        "updated_at": rule.updated_at + timedelta(seconds=1),
+    }, deep=True)
+    after = extractor.extract_many(text, [changed])[rule.id]
+
+    assert summary(after) == summary(RuleBasedExtractor().extract(text, changed))
+    assert summary(after) != summary(before)
+
+
+def test_extract_pages_tags_pages_and_deduplicates_across_them():
+    rules = EXTRA_RULES[:3]
+    pages = [
+        ParsedPage(number=1, text="Total Revenue: $1,234,567"),
+        ParsedPage(number=2, text="Net Income: $200\nTotal Revenue: $1,234,567"),
+        ParsedPage(number=3, text="No figures here at all."),
+    ]
+
+    streamed = RuleBasedExtractor().extract_pages(iter(pages), rules)
+
+    revenue = [m for m in streamed["revenue"] if m.normalized_value == 1234567.0]
+    assert [m.source.page for m in revenue] == [1]
+    assert ("200", 2) in {(m.value, m.source.page) for m in streamed["income"]}
+    whole = RuleBasedExtractor().extract_many("\n".join(page.text for page in pages), rules)
+    for rule in rules:
+        assert {m.normalized_value for m in streamed[rule.id]} == {m.normalized_value for m in whole[rule.id]}
+
+
+def table_header_matches(doc, *labels):
+    rule = make_rule("table", "Table", patterns=[(PatternType.TABLE_HEADER, label) for label in labels])
+    return [
+        (m.source.matched_pattern, m.value, m.source.page, m.source.section)
+        for m in RuleBasedExtractor().extract(DocumentView.from_document(doc), rule)
+    ]
+
+
+def pdf_with_table(table_page_text: str, other_page_text: str, rows: list[list[str]]) -> ParsedDocument:
+    """Two-page PDF whose first page is entirely a headerless parsed table."""
+    return ParsedDocument.from_pages(
+        filename="report.pdf",
+        file_type="pdf",
+        pages=[table_page_text, other_page_text],
+        tables=[{"page": 1, "data": rows, "bbox": [0, 0, 100, 40]}],
+        blocks=[{"page": 1, "bbox": [0, 0, 100, 40], "start": 0, "end": len(table_page_text)}],
+        metadata={},
+        page_header="--- Page {number} ---\n",
+    )
+
+
+def test_table_header_keeps_text_hits_outside_the_matched_table():
+    doc = pdf_with_table(
+        "Total Revenue\n700\n",
+        "Prose about Total Revenue\n  9,999\n",
+        [["Total Revenue", "700"]],
+    )
+
+    assert table_header_matches(doc, "Total Revenue") == [
+        ("total revenue", "700", 1, "table 1 row 1 col 2"),
+        ("total revenue", "9,999", None, None),
+    ]
+
+
+def test_table_header_reads_row_zero_of_headerless_tables_and_keeps_year_values():
+    doc = pdf_with_table("Founded 1998\n", "", [["Founded", "1998"], ["Staff", "2,000"]])
+
+    assert table_header_matches(doc, "Founded") == [("founded", "1998", 1, "table 1 row 1 col 2")]
+
+
+def test_table_header_labels_in_a_parsed_header_row_only_read_down():
+    doc = ParsedDocument.from_pages(
+        filename="book.xlsx",
+        file_type="excel",
+        pages=["Metric\t2023\t2024\nTotal Revenue\t100\t200"],
+        tables=[{"headers": ["Metric", "2023", "2024"], "data": [["Total Revenue", 100.0, 200.0]]}],
+        metadata={},
+    )
+
+    # The header-row label only reads down its column; the row label reads right
+    assert table_header_matches(doc, "Total Revenue", "Metric") == [
+        ("total revenue", "100", 1, "table 1 row 2 col 2"),
+    ]
+
+
+def table_cell_matches(doc, *patterns, variations=()):
+    rule = make_rule(
+        "cells", "Total Revenue", variations=list(variations),
+        patterns=[(PatternType.TABLE_CELL, pattern) for pattern in patterns],
+    )
+    return [
+        (m.source.matched_pattern, m.normalized_value, m.source.section)
+        for m in RuleBasedExtractor().extract(DocumentView.from_document(doc), rule)
+    ]
+
+
+def workbook(headers: list[str], rows: list[list]) -> ParsedDocument:
+    return ParsedDocument.from_pages(
+        filename="book.xlsx",
+        file_type="excel",
+        pages=["\n".join("\t".join(str(cell) for cell in row) for row in [headers, *rows])],
+        tables=[{"headers": headers, "data": rows}],
+        metadata={},
+    )
+
+
+def test_table_cell_label_and_column_picks_one_cell():
+    doc = workbook(["Metric", "FY 2023", "FY 2024"], [["Total Revenue", 100.0, 200.0], ["Expenses", 80.0, 90.0]])
+
+    assert table_cell_matches(doc, "Total Revenue | 2024") == [
+        ("Total Revenue", 200.0, "table 1 row 2 col 3"),
+    ]
+    assert table_cell_matches(doc, "Expenses | 2030") == []
+
+
+def test_table_cell_label_reads_its_row_and_column():
+    doc = workbook(["Year", "Total Revenue", "Notes"], [["2023", 100.0, "n/a"], ["2024", 200.0, "restated"]])
+
+    # A header label reads down its column, skipping non-numeric cells
+    assert sorted(value for _, value, _ in table_cell_matches(doc, "Total Revenue")) == [100.0, 200.0]
+    assert table_cell_matches(doc, "Notes") == []
+
+
+def test_table_cell_matches_semantic_variations():
+    doc = workbook(["Metric", "2024"], [["Revenues", "1.5 million"]])
+
+    assert table_cell_matches(doc, "Total Revenue | 2024", variations=["Revenues"]) == [
+        ("Revenues", 1_500_000.0, "table 1 row 2 col 2"),
+    ]
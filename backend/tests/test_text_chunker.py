@@ -0,0 +1,82 @@
+"""Token chunker: budgets, paragraph boundaries, and overlap between chunks."""
+
+from app.services.text_chunker import TokenChunker
+
+MODEL = "gpt-4o"
+
+
+def paragraphs(count: int, words: int = 40) -> list[str]:
+    return [f"P{idx} " + " ".join(f"word{idx}" for _ in range(words)) for idx in range(count)]
+
+
+def count(text: str) -> int:
+    return TokenChunker(MODEL, 1).count(text)
+
+
+def chunker_size(paras: list[str], per_chunk: int) -> int:
+    """Budget for about `per_chunk` of the given paragraphs per chunk."""
+    return count("\n\n".join(paras[:per_chunk])) + 1
+
+
+def chunk_paragraphs(chunk) -> list[str]:
+    return chunk.text.split("\n\n")
+
+
+def test_chunks_fit_the_budget_and_keep_paragraphs_whole():
+    paras = paragraphs(10)
+    chunker = TokenChunker(MODEL, max_tokens=chunker_size(paras, 3), overlap_tokens=0)
+
+    chunks = chunker.chunk("\n\n".join(paras))
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        # token_count sums the packed pieces, so it never undercounts the text
+        assert chunker.count(chunk.text) <= chunk.token_count <= chunker.max_tokens
+    # Without overlap every paragraph lands in exactly one chunk, in order
+    assert [p for chunk in chunks for p in chunk_paragraphs(chunk)] == paras
+
+
+def test_consecutive_chunks_share_trailing_paragraphs():
+    paras = paragraphs(10)
+    size = max(count(p) for p in paras)
+    chunker = TokenChunker(MODEL, max_tokens=chunker_size(paras, 3), overlap_tokens=size + 5)
+
+    chunks = chunker.chunk("\n\n".join(paras))
+
+    assert len(chunks) > 1
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk_paragraphs(chunk)[0] == chunk_paragraphs(previous)[-1]
+        assert chunk.token_count <= chunker.max_tokens
+    # Nothing is dropped
+    assert set(p for chunk in chunks for p in chunk_paragraphs(chunk)) == set(paras)
+
+
+def test_overlap_is_capped_at_half_the_budget():
+    assert TokenChunker(MODEL, max_tokens=100, overlap_tokens=500).overlap_tokens == 50
+
+
+def test_oversized_table_is_split_on_row_boundaries():
+    rows = [f"Row {idx}\t{idx * 100}\t{idx * 200}" for idx in range(60)]
+    table = "\n".join(rows)
+    chunker = TokenChunker(MODEL, max_tokens=count(table) // 4)
+
+    chunks = chunker.chunk(table)
+
+    assert len(chunks) >= 4
+    assert all(chunk.token_count <= chunker.max_tokens for chunk in chunks)
+    assert [row for chunk in chunks for row in chunk.text.split("\n")] == rows
+
+
+def test_oversized_line_is_cut_into_token_windows():
+    line = "x" * 4000
+    chunker = TokenChunker(MODEL, max_tokens=100)
+
+    chunks = chunker.chunk(line)
+
+    assert len(chunks) > 1
+    assert all(chunk.token_count <= chunker.max_tokens for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks) == line
+
+
+def test_blank_text_is_a_single_chunk():
+    assert [chunk.text for chunk in TokenChunker(MODEL, max_tokens=10).chunk("  \n\n ")] == ["  \n\n "]